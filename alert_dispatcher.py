@@ -0,0 +1,157 @@
+# alert_dispatcher.py
+# Background Telegram dispatcher: callers enqueue and return immediately. A worker thread collects
+# messages over a short window, merges duplicates ("… ×N"), packs them into as few Telegram messages as
+# fit, and sends them under a token-bucket rate limit. When the queue is full, messages are dropped and
+# reported in a one-line summary instead of blocking a trading thread.
+import os
+import time
+import queue
+import atexit
+import threading
+from order_pipeline import TokenBucket
+
+ALERT_WINDOW = float(os.getenv("ALERT_WINDOW", "2.0"))      # seconds to coalesce a burst
+ALERT_RATE = float(os.getenv("ALERT_RATE", "1.0"))          # Telegram: ~1 message/s per chat
+ALERT_BURST = 3
+ALERT_QUEUE_SIZE = 1000
+MAX_LINES_PER_BATCH = 40                                     # the rest is summarised
+TELEGRAM_MAX_LEN = 4096
+
+
+class AlertDispatcher:
+    """Non-blocking, coalescing, rate-limited message sender."""
+
+    def __init__(self, send_fn, window=ALERT_WINDOW, rate=ALERT_RATE, burst=ALERT_BURST,
+                 max_queue=ALERT_QUEUE_SIZE, max_lines=MAX_LINES_PER_BATCH):
+        self.send_fn = send_fn                # send_fn(text) -> bool
+        self.window = window
+        self.max_lines = max_lines
+        self.bucket = TokenBucket(rate, burst)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {"posted": 0, "sent_messages": 0, "merged": 0, "dropped": 0, "summarised": 0, "failed": 0}
+
+    # --- producer side (never blocks) ------------------------------------------------------
+    def post(self, text, key=None):
+        """Queues a message; returns False if it had to be dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((key or text, text))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+                self._stats["dropped"] += 1
+            return False
+        with self._lock:
+            self._stats["posted"] += 1
+        return True
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                    self._thread.start()
+
+    # --- worker ----------------------------------------------------------------------------
+    def _collect(self, first):
+        """The first message plus everything arriving within the window, merged by key (order kept)."""
+        batch = {first[0]: [first[1], 1]}
+        taken = 1
+        deadline = time.monotonic() + self.window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                key, text = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            taken += 1
+            if key in batch:
+                batch[key][1] += 1
+            else:
+                batch[key] = [text, 1]
+        return batch, taken
+
+    def _render(self, batch):
+        lines = [text if count == 1 else f"{text} (×{count})" for text, count in batch.values()]
+        merged = sum(count - 1 for _, count in batch.values())
+        if len(lines) > self.max_lines:
+            hidden = len(lines) - self.max_lines
+            lines = lines[:self.max_lines] + [f"… and {hidden} more alerts"]
+            self._stats["summarised"] += hidden
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+            self._stats["merged"] += merged
+        if dropped:
+            lines.append(f"⚠️ {dropped} alerts dropped (queue full)")
+        return self._pack(lines)
+
+    @staticmethod
+    def _pack(lines, limit=TELEGRAM_MAX_LEN):
+        """Joins lines into as few messages as fit Telegram's length limit."""
+        messages, current = [], ""
+        for line in lines:
+            line = line[:limit]
+            candidate = f"{current}\n\n{line}" if current else line
+            if len(candidate) > limit:
+                messages.append(current)
+                candidate = line
+            current = candidate
+        if current:
+            messages.append(current)
+        return messages
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            batch, taken = self._collect(first)
+            try:
+                for message in self._render(batch):
+                    self.bucket.acquire()
+                    try:
+                        ok = self.send_fn(message)
+                    except Exception as e:
+                        print(f"❌ Error sending Telegram alert: {e}")
+                        ok = False
+                    with self._lock:
+                        self._stats["sent_messages" if ok else "failed"] += 1
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    # --- lifecycle -------------------------------------------------------------------------
+    def flush(self, timeout=10.0):
+        """Waits (up to timeout) until everything queued so far has been sent."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+
+        def _join():
+            self._queue.join()
+            done.set()
+
+        threading.Thread(target=_join, daemon=True).start()
+        return done.wait(timeout)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, queued=self._queue.qsize())
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(send_fn=None):
+    """Process-wide dispatcher (created with send_fn on first call) that flushes at interpreter exit."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = AlertDispatcher(send_fn)
+                atexit.register(_dispatcher.flush, 5.0)
+    return _dispatcher
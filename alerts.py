@@ -1,12 +1,15 @@
 import os
+import time
 import requests
 import smtplib
+import pytz
 import pandas as pd
 from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 from utils import convert_to_ist
+from alert_dispatcher import get_dispatcher
 
 load_dotenv()
 
@@ -16,23 +19,44 @@ TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 EMAIL = os.getenv("EMAIL_ADDRESS")
 EMAIL_PASS = os.getenv("EMAIL_PASSWORD")
 
-# ✅ Simple alert (generic message)
-def send_general_telegram_message(msg):
+# ✅ Synchronous Telegram send, used only by the background dispatcher thread
+def _post_telegram(msg):
     payload = {
         "chat_id": TELEGRAM_CHAT_ID,
         "text": msg,
         "parse_mode": "Markdown"
     }
-    try:
-        response = requests.post(f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage", data=payload)
+    rate_limited = False
+    while True:
+        response = requests.post(f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage", data=payload, timeout=10)
+        if response.status_code == 429 and not rate_limited:
+            # ✅ Telegram rate limit: wait as instructed, then retry once
+            rate_limited = True
+            retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+            time.sleep(min(float(retry_after), 30))
+            continue
+        if response.status_code == 400 and "parse_mode" in payload:
+            # ✅ One alert with an unbalanced _ * ` (symbols, exception text) must not sink the whole
+            # merged batch: resend it as plain text
+            print(f"⚠️ Telegram rejected Markdown, resending as plain text: {response.text}")
+            payload.pop("parse_mode")
+            continue
         if response.status_code == 200:
             print("✅ Telegram alert sent.")
-        else:
-            print(f"❌ Telegram alert failed: {response.status_code} - {response.text}")
-    except Exception as e:
-        print(f"❌ Error sending Telegram alert: {e}")
-        
-# ✅ Telegram Alert
+            return True
+        print(f"❌ Telegram alert failed: {response.status_code} - {response.text}")
+        return False
+
+
+def _dispatcher():
+    return get_dispatcher(_post_telegram)
+
+
+# ✅ Simple alert (generic message) — queued, never blocks the caller
+def send_general_telegram_message(msg):
+    _dispatcher().post(msg)
+
+# ✅ Telegram Alert — queued; bursts are merged and rate limited by alert_dispatcher
 def send_telegram_alert(symbol, action, price, tp=None, sl=None, confidence=None, features=None, reason=None):
     msg = f"📢 *{action}* signal for *{symbol}* at ₹{price:.2f}"
     if confidence:
@@ -44,31 +68,26 @@ def send_telegram_alert(symbol, action, price, tp=None, sl=None, confidence=None
     if reason:
         msg += f"\nℹ️ Reason: {reason}"
 
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": msg,
-        "parse_mode": "Markdown"
-    }
+    _dispatcher().post(msg)
+
 
-    requests.post(f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage", data=payload)
+# ✅ Block until queued alerts are sent (e.g. before a short-lived script exits)
+def flush_alerts(timeout=10.0):
+    return _dispatcher().flush(timeout)
 
 # ✅ Daily Summary Email
 def send_trade_summary_email(use_google_sheets=False):
     try:
         if use_google_sheets:
-            from google_sheets import get_sheet
+            from google_sheets import get_sheet, flush_sheets
+            flush_sheets()   # ✅ include rows still buffered / spooled locally
             sheet = get_sheet("trade_log")
             records = sheet.get_all_records()
             df = pd.DataFrame(records)
         else:
-            if not os.path.exists("trade_log.csv"):
-                print("⚠️ No trade log found for summary email.")
-                return
-            df = pd.read_csv("trade_log.csv", names=[
-                "timestamp", "symbol", "action", "qty", "entry", "tp", "sl",
-                "exit_price", "pnl", "status", "strategy", "reason", "holding_days",
-                "exit_time", "trailing_sl_used", "market_condition", "model_confidence"
-            ])
+            from trade_journal import get_journal, to_frame
+            # ✅ Indexed read of today's trades only
+            df = to_frame(get_journal().for_date(datetime.now(pytz.timezone("Asia/Kolkata")).date()))
 
         df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
         df = df.dropna(subset=["timestamp"])
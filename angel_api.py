@@ -1,38 +1,48 @@
-import http.client
 import json
 import os
-import http.client
 from utils import convert_to_ist
-
-# ✅ Load credentials from online access_token.json (hosted in Gist)
-import requests
-ACCESS_JSON_URL = "https://gist.github.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/"
-access_data = requests.get(ACCESS_JSON_URL).json()
-
-TOKEN = access_data["access_token"]
-API_KEY = access_data["api_key"]
+from broker_client import BrokerClient
+from credentials import credentials, AUTH_ERROR_CODES
 
 CLIENT_LOCAL_IP = os.getenv('CLIENT_LOCAL_IP')
 CLIENT_PUBLIC_IP = os.getenv('CLIENT_PUBLIC_IP')
 MAC_ADDRESS = os.getenv('MAC_ADDRESS')
 
 BASE_URL = "apiconnect.angelone.in"
+ORDER_PATH = "/rest/secure/angelbroking/order/v1"
+
+
+# ✅ Headers are built per request from the in-memory credential cache (no fetch at import)
+def build_headers():
+    return credentials.auth_headers()
+
+
+def __getattr__(name):
+    # Backwards-compatible module attributes, resolved on first access
+    if name == "TOKEN":
+        return credentials.get("access_token")
+    if name == "API_KEY":
+        return credentials.get("api_key")
+    if name == "HEADERS":
+        return build_headers()
+    raise AttributeError(f"module 'angel_api' has no attribute {name!r}")
+
+
+# ✅ One pooled keep-alive client shared by every call below (connects on first request)
+client = BrokerClient(BASE_URL, headers=build_headers)
+
 
-HEADERS = {
-    'Authorization': f'Bearer {TOKEN}',
-    'Content-Type': 'application/json',
-    'Accept': 'application/json',
-    'X-UserType': 'USER',
-    'X-SourceID': 'WEB',
-    'X-ClientLocalIP': CLIENT_LOCAL_IP,
-    'X-ClientPublicIP': CLIENT_PUBLIC_IP,
-    'X-MACAddress': MAC_ADDRESS,
-    'X-PrivateKey': API_KEY
-}
-
-def place_order(tradingsymbol, transactiontype, quantity, exchange="NSE", producttype="INTRADAY"):
-    conn = http.client.HTTPSConnection(BASE_URL)
-    payload = json.dumps({
+def _request(method, path, payload=None):
+    """client.request with one retry after a rejected session token."""
+    token = credentials.get("access_token")
+    data = client.request(method, path, payload)
+    if data.errorcode in AUTH_ERROR_CODES:
+        credentials.invalidate(token)
+        data = client.request(method, path, payload)
+    return data
+
+def place_order(tradingsymbol, transactiontype, quantity, exchange="NSE", producttype="INTRADAY", ordertag=None):
+    payload = {
         "exchange": exchange,
         "tradingsymbol": tradingsymbol,
         "quantity": quantity,
@@ -41,10 +51,10 @@ def place_order(tradingsymbol, transactiontype, quantity, exchange="NSE", produc
         "ordertype": "MARKET",
         "variety": "NORMAL",
         "producttype": producttype
-    })
-    conn.request("POST", "/rest/secure/angelbroking/order/v1/placeOrder", payload, HEADERS)
-    res = conn.getresponse()
-    data = json.loads(res.read().decode("utf-8"))
+    }
+    if ordertag:
+        payload["ordertag"] = ordertag  # ✅ idempotency key, echoed back in the order book
+    data = _request("POST", f"{ORDER_PATH}/placeOrder", payload)
 
     # ✅ Add this logging block:
     if data.get("status") != True:
@@ -55,8 +65,7 @@ def place_order(tradingsymbol, transactiontype, quantity, exchange="NSE", produc
 
 
 def modify_order(orderid, new_price, new_quantity):
-    conn = http.client.HTTPSConnection(BASE_URL)
-    payload = json.dumps({
+    return _request("POST", f"{ORDER_PATH}/modifyOrder", {
         "variety": "NORMAL",
         "orderid": orderid,
         "ordertype": "LIMIT",
@@ -65,50 +74,43 @@ def modify_order(orderid, new_price, new_quantity):
         "price": str(new_price),
         "quantity": str(new_quantity)
     })
-    conn.request("POST", "/rest/secure/angelbroking/order/v1/modifyOrder", payload, HEADERS)
-    res = conn.getresponse()
-    return res.read().decode("utf-8")
 
 
 def cancel_order(orderid):
-    conn = http.client.HTTPSConnection(BASE_URL)
-    payload = json.dumps({
+    return _request("POST", f"{ORDER_PATH}/cancelOrder", {
         "variety": "NORMAL",
         "orderid": orderid
     })
-    conn.request("POST", "/rest/secure/angelbroking/order/v1/cancelOrder", payload, HEADERS)
-    res = conn.getresponse()
-    return res.read().decode("utf-8")
 
 
 def get_order_book():
-    conn = http.client.HTTPSConnection(BASE_URL)
-    conn.request("GET", "/rest/secure/angelbroking/order/v1/getOrderBook", "", HEADERS)
-    res = conn.getresponse()
-    return res.read().decode("utf-8")
+    return _request("GET", f"{ORDER_PATH}/getOrderBook")
 
 
 def get_trade_book():
-    conn = http.client.HTTPSConnection(BASE_URL)
-    conn.request("GET", "/rest/secure/angelbroking/order/v1/getTradeBook", "", HEADERS)
-    res = conn.getresponse()
-    return res.read().decode("utf-8")
+    return _request("GET", f"{ORDER_PATH}/getTradeBook")
 
 
 def get_ltp(tradingsymbol, symboltoken, exchange="NSE"):
-    conn = http.client.HTTPSConnection(BASE_URL)
-    payload = json.dumps({
+    return _request("POST", f"{ORDER_PATH}/getLtpData", {
         "exchange": exchange,
         "tradingsymbol": tradingsymbol,
         "symboltoken": symboltoken
     })
-    conn.request("POST", "/rest/secure/angelbroking/order/v1/getLtpData", payload, HEADERS)
-    res = conn.getresponse()
-    return res.read().decode("utf-8")
 
 
 def get_order_status(orderid):
-    conn = http.client.HTTPSConnection(BASE_URL)
-    conn.request("GET", f"/rest/secure/angelbroking/order/v1/details/{orderid}", "", HEADERS)
-    res = conn.getresponse()
-    return res.read().decode("utf-8")
+    return _request("GET", f"{ORDER_PATH}/details/{orderid}")
+
+
+def get_quotes(exchange_tokens, mode="LTP"):
+    """Batch market quote, e.g. get_quotes({"NSE": ["3045", "2885"]}) — up to 50 tokens per call."""
+    return _request("POST", "/rest/secure/angelbroking/market/v1/quote/", {
+        "mode": mode,
+        "exchangeTokens": exchange_tokens
+    })
+
+
+def get_rms():
+    """Funds / margin summary (availablecash etc.)."""
+    return _request("GET", "/rest/secure/angelbroking/user/v1/getRMS")
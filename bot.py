@@ -1,11 +1,14 @@
 import os
+import threading
 import json
 import pandas as pd
 from datetime import datetime, time
+from time import perf_counter
 from utils import convert_to_ist
 from executor import (
     place_order,
     get_live_price,
+    get_live_prices,
     cancel_order,
     modify_order,
     get_order_book,
@@ -14,49 +17,28 @@ from executor import (
     get_order_status
 )
 from alerts import send_telegram_alert
-import yfinance as yf
-import plotly.graph_objects as go
-import joblib
 import requests
-from io import BytesIO
-from funds import get_available_funds
-from token_utils import fetch_access_token_from_gist
-from model.signal_predictor import predict_signal
+from runtime import runtime
+from model_cache import lazy_model, NIFTY25_MODEL_URL
 from fno_executor import place_order_fno
+from ohlcv_store import get_history, get_history_many
+from exit_engine import ExitEngine
+from order_pipeline import get_pipeline, new_order_tag, find_order_by_tag, OrderStateUnknown
+from concurrent.futures import wait as wait_futures
+from order_tracker import get_tracker
+from websocket_data import add_tick_listener
+from tick_feed import get_tick_feed
+from trade_journal import log_trade
+from trade_charts import build_trade_chart
+from signal_memo import signal_memo, model_key, last_bar
+from indicators import add_features, compute_features, latest_feature_rows, right_aligned_panel
 
-# ✅ Load access token
-gist_url = "https://gist.github.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/access_token.json"
-tokens = fetch_access_token_from_gist(gist_url)
-access_token = tokens.get("access_token")
+# ✅ Credentials and funds come from the lazy runtime; nothing is fetched at import
+available_funds = None  # cash budget for trade_logic, fetched on first run
+_funds_lock = threading.Lock()  # ✅ trade_logic and late order callbacks (pipeline threads) both adjust it
 
-if not access_token:
-    raise Exception("❌ Failed to fetch access token. Check Gist or token_utils.py.")
-
-# ✅ Fetch available funds
-funds_data = get_available_funds()
-if funds_data and funds_data.get("status"):
-    available_funds = float(funds_data['data'].get('availablecash', 0))
-else:
-    print(f"❌ Failed to fetch funds: {funds_data.get('error', 'Unknown error')}")
-    available_funds = 0
-
-# ✅ Load AI model from Gist (base64 .txt version)
-model = None
-try:
-    model_url = "https://gist.githubusercontent.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/nifty25_model_b64.txt"
-    
-    print("📥 Downloading model from Gist...")
-    response = requests.get(model_url)
-    response.raise_for_status()
-    
-    print("🧠 Decoding and loading model...")
-    model_b64 = response.text.strip()
-    model_bytes = base64.b64decode(model_b64)
-    model = joblib.load(BytesIO(model_bytes))
-    
-    print("✅ Model loaded from Gist.")
-except Exception as e:
-    print(f"❌ Error loading model from Gist: {e}")
+# ✅ AI model from the local content-addressed cache (loaded on first prediction, no download at import)
+model = lazy_model(NIFTY25_MODEL_URL)
 
 # ✅ Load stock list
 try:
@@ -71,8 +53,49 @@ STOP_LOSS = 3
 TRAIL_BUFFER = 2
 MAX_HOLD_DAYS = 5
 
+# ✅ Universe scan configuration ("batch" = bulk download + one model.predict, "serial" = per-symbol)
+SCAN_MODE = os.getenv("SCAN_MODE", "batch")
+SCAN_BATCH_SIZE = 100
+ORDER_RESULT_TIMEOUT = float(os.getenv("ORDER_RESULT_TIMEOUT", "30"))  # max wait for all BUYs in trade_logic
+FEATURES = ["SMA", "RSI", "MACD", "Signal"]
+
 portfolio = {}
 
+
+def _on_tick_exit(symbol, position, price, reason, response):
+    """Books an exit fired by the tick-driven engine (same records as monitor_holdings)."""
+    pnl = price - position.entry
+    send_telegram_alert(symbol, "SELL", price, reason=f"Tick exit {reason}")
+    log_trade(symbol, "SELL", position.qty, entry=position.entry, tp=position.tp_price, sl=position.sl_price,
+              exit_price=price, pnl=pnl, status="CLOSED", strategy="tick_exit", reason=f"TICK_{reason}",
+              holding_days=(datetime.now().timestamp() - position.opened_at) / 86400, exit_time=datetime.now(),
+              trailing_sl_used=reason == "TRAIL")
+    portfolio.pop(symbol, None)
+    get_tick_feed().unsubscribe(symbol)
+    print(f"⚡ Tick exit {reason} {symbol} | PnL: ₹{pnl:.2f}")
+    plot_trade_chart(symbol, position.entry, price)
+
+
+def _on_fill(fill):
+    """Order tracker fill: re-bases the position on the actual average fill price and quantity."""
+    if fill["side"] != "BUY":
+        return
+    for symbol, info in list(portfolio.items()):
+        if info.get("orderid") == fill["orderid"]:
+            info["entry"], info["qty"] = fill["avg_price"], int(fill["filled"])
+            if exit_engine.is_open(symbol):
+                exit_engine.open(symbol, info["entry"], info["qty"], info["time"])
+            print(f"📥 Fill {symbol} × {info['qty']} @ ₹{info['entry']:.2f}")
+            return
+
+
+# ✅ TP / SL / trailing / max-hold checked on every tick of the bot's SmartAPI feed (tick_feed ->
+# websocket_data.update_realtime_candle -> tick listeners); monitor_holdings is the backstop
+exit_engine = ExitEngine(TAKE_PROFIT, STOP_LOSS, TRAIL_BUFFER, MAX_HOLD_DAYS,
+                         exit_fn=place_order, on_exit=_on_tick_exit)
+add_tick_listener(exit_engine.on_tick)
+get_tracker().add_fill_listener(_on_fill)
+
 def is_market_open():
     now = datetime.now().time()
     return time(9, 15) <= now <= time(15, 30)
@@ -85,41 +108,36 @@ def run():
         
 def plot_trade_chart(symbol, entry_price, exit_price):
     try:
-        df = yf.download(symbol, period="30d", interval="1d")
-        df.dropna(inplace=True)
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df.index, y=df["Close"], mode="lines", name="Price"))
-        fig.add_trace(go.Scatter(x=[df.index[-1]], y=[entry_price], mode="markers+text",
-                                 marker=dict(color="green", size=12), text=["BUY"],
-                                 textposition="top center", name="BUY"))
-        fig.add_trace(go.Scatter(x=[df.index[-1]], y=[exit_price], mode="markers+text",
-                                 marker=dict(color="red", size=12), text=["SELL"],
-                                 textposition="bottom center", name="SELL"))
-        fig.update_layout(title=f"{symbol} Trade Chart", xaxis_title="Date", yaxis_title="Price")
+        df = get_history(symbol, period="30d", interval="1d")
+        last = df.index[-1]
+        trades = pd.DataFrame({"timestamp": [last, last], "action": ["BUY", "SELL"],
+                               "entry": [entry_price, entry_price], "exit_price": [None, exit_price]})
+        fig = build_trade_chart(symbol, df, trades)
         os.makedirs("charts", exist_ok=True)
-        fig.write_html(f"charts/{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
+        # ✅ Load plotly.js from the CDN instead of embedding ~3.5 MB in every chart file
+        fig.write_html(f"charts/{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html", include_plotlyjs="cdn")
     except Exception as e:
         print(f"❌ Chart error for {symbol}: {e}")
 
 def compute_indicators_for_prediction(df):
-    df['SMA'] = df['Close'].rolling(window=14).mean()
-    delta = df['Close'].diff()
-    gain = delta.where(delta > 0, 0).rolling(14).mean()
-    loss = -delta.where(delta < 0, 0).rolling(14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = exp1 - exp2
-    df['Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    add_features(df, FEATURES)
     df.dropna(inplace=True)
     return df
 
 def predict_signal(symbol):
-    if model is None:
+    """Daily-bar model signal, memoized per (symbol, last bar, model) — scan_universe fills the same memo."""
+    if not model:
         return "HOLD"
     try:
-        df = yf.download(symbol, period="1mo", interval="1d", auto_adjust=True)
+        df = get_history(symbol, period="1mo", interval="1d")
+    except Exception as e:
+        print(f"❌ Prediction error for {symbol}: {e}")
+        return "HOLD"
+    return signal_memo.get("ai_daily", symbol, last_bar(df), lambda: _predict_from_history(symbol, df),
+                           model=model_key(model))
+
+def _predict_from_history(symbol, df):
+    try:
         if df.empty or len(df) < 20:
             return "HOLD"
         df = compute_indicators_for_prediction(df)
@@ -130,29 +148,109 @@ def predict_signal(symbol):
         print(f"❌ Prediction error for {symbol}: {e}")
         return "HOLD"
 
+def download_history_batch(symbols, period="1mo", interval="1d"):
+    """Loads history for many symbols from the OHLCV store (bulk tail fetch), returns {symbol: df}."""
+    return get_history_many(symbols, period=period, interval=interval)
+
+def scan_universe(symbols=None, batch_size=SCAN_BATCH_SIZE):
+    """Scores the whole universe with bulk downloads and a single model.predict.
+
+    Returns (signals, timings) where signals maps symbol -> BUY/SELL/HOLD exactly
+    like predict_signal, and timings holds seconds spent per stage.
+    """
+    symbols = list(symbols or STOCK_LIST)
+    signals = {symbol: "HOLD" for symbol in symbols}
+    timings = {}
+    if not model:
+        return signals, timings
+
+    start = perf_counter()
+    history = {}
+    for i in range(0, len(symbols), batch_size):
+        batch = symbols[i:i + batch_size]
+        try:
+            history.update(download_history_batch(batch))
+        except Exception as e:
+            print(f"❌ Batch download error ({batch[0]}..{batch[-1]}): {e}")
+    timings["download"] = perf_counter() - start
+
+    # ✅ One symbols x time close panel, every feature computed in a single vectorized pass
+    stage = perf_counter()
+    eligible = [symbol for symbol in symbols if symbol in history and len(history[symbol]) >= 20]
+    panel = right_aligned_panel([history[symbol]["Close"].to_numpy() for symbol in eligible])
+    rows, has_row = latest_feature_rows(compute_features(panel, FEATURES), FEATURES)
+    timings["features"] = perf_counter() - stage
+
+    stage = perf_counter()
+    scored = [symbol for symbol, ok in zip(eligible, has_row) if ok]
+    if scored:
+        try:
+            X = pd.DataFrame(rows[has_row], columns=FEATURES)
+            key = model_key(model)
+            for symbol, pred in zip(scored, model.predict(X)):
+                signals[symbol] = "BUY" if pred == 1 else "SELL"
+                # ✅ monitor_holdings / dashboards reuse this prediction until the next daily bar
+                signal_memo.put("ai_daily", symbol, last_bar(history[symbol]), signals[symbol], model=key)
+        except Exception as e:
+            print(f"❌ Batch prediction error: {e}")
+    timings["predict"] = perf_counter() - stage
+    timings["total"] = perf_counter() - start
+
+    print(f"⏱️ Scanned {len(symbols)} symbols ({len(scored)} scored) in {timings['total']:.2f}s | "
+          f"download {timings['download']:.2f}s, features {timings['features']:.2f}s, "
+          f"predict {timings['predict']:.2f}s")
+    return signals, timings
+
+def verify_scan_parity(symbols):
+    """Compares scan_universe against per-symbol predict_signal, returns mismatches."""
+    batch_signals, _ = scan_universe(symbols)
+    mismatches = {}
+    for symbol in symbols:
+        serial = _predict_from_history(symbol, get_history(symbol, period="1mo", interval="1d"))  # bypasses the memo
+        if serial != batch_signals[symbol]:
+            mismatches[symbol] = (serial, batch_signals[symbol])
+    return mismatches
+
 def trade_logic():
     global available_funds
     if not is_market_open():
         print("⏰ Market is closed.")
         return
     print(f"🚀 Starting trade logic at {datetime.now()}")
+    if available_funds is None:
+        available_funds = runtime.available_funds
     top_stocks = []
     trades_executed = False
 
+    if SCAN_MODE == "batch":
+        signals, _ = scan_universe(STOCK_LIST)
+    else:
+        signals = None
+
+    buy_candidates = []
     for symbol in STOCK_LIST:
         try:
-            signal = predict_signal(symbol)
+            signal = signals[symbol] if signals is not None else predict_signal(symbol)
             if signal == "BUY":
-                price = get_live_price(symbol)
-                if price and available_funds >= price:
-                    top_stocks.append(symbol)
+                buy_candidates.append(symbol)
         except Exception as e:
             msg = f"⚠️ Signal error on {symbol}: {e}"
             print(msg)
             send_telegram_alert(symbol, "ERROR", 0, reason=msg)
 
+    # ✅ One batched quote for every BUY candidate; entry prices below reuse this snapshot
+    prices = get_live_prices(buy_candidates)
+    for symbol in buy_candidates:
+        price = prices.get(symbol)
+        if price and available_funds >= price:
+            top_stocks.append(symbol)
+
     top_stocks = top_stocks[:5]
 
+    # ✅ Size every order up front (funds reserved in universe order), then submit them concurrently
+    # through the rate-limited pipeline; each order carries an idempotency tag so retries never double-fill
+    pipeline = get_pipeline()
+    pending = []
     for symbol in top_stocks:
         try:
             if symbol in portfolio:
@@ -163,41 +261,109 @@ def trade_logic():
                 print(f"❌ Could not fetch live price for {symbol}")
                 continue
 
-            max_qty = int(available_funds // entry_price)
+            with _funds_lock:
+                max_qty = int(available_funds // entry_price)
+                if max_qty >= 1:
+                    available_funds -= max_qty * entry_price
             if max_qty < 1:
                 print(f"⚠️ Not enough funds for {symbol}")
                 continue
 
-            response = place_order(symbol, "BUY", max_qty)
-            print(f"📤 Order response for {symbol}: {response}")
-
-            if response and isinstance(response, dict) and response.get("status"):
-                portfolio[symbol] = {
-                    "entry": entry_price,
-                    "time": datetime.now(),
-                    "qty": max_qty
-                }
-                available_funds -= max_qty * entry_price
-                trades_executed = True
-                print(f"✅ Bought {symbol} × {max_qty} at ₹{entry_price:.2f} | ₹{available_funds:.2f} left")
-                send_telegram_alert(symbol, "BUY", entry_price, reason="AI Strategy")
-            else:
-                msg = f"❌ Failed to place BUY order for {symbol}: {response}"
-                print(msg)
-                send_telegram_alert(symbol, "ERROR", 0, reason=msg)
-
+            tag = new_order_tag()
+            pending.append((symbol, entry_price, max_qty, tag, pipeline.submit(symbol, "BUY", max_qty, tag=tag)))
         except Exception as e:
             msg = f"❌ Order error for {symbol}: {e}"
             print(msg)
             send_telegram_alert(symbol, "ERROR", 0, reason=msg)
 
-    if not trades_executed:
+    # ✅ One shared deadline for every BUY, not ORDER_RESULT_TIMEOUT per order
+    done, _ = wait_futures([future for *_, future in pending], timeout=ORDER_RESULT_TIMEOUT)
+    unresolved = 0
+    for symbol, entry_price, max_qty, tag, future in pending:
+        if future in done:
+            try:
+                response = future.result()
+            except OrderStateUnknown as e:
+                _hold_unknown_buy(symbol, tag, e)
+                unresolved += 1
+                continue
+            except Exception as e:
+                response = {"status": False, "message": str(e)}
+        else:
+            # ✅ Outcome unknown (the order may be live): ask the order book by tag, keep the funds reserved
+            existing = _order_by_tag(tag)
+            if existing is None:
+                print(f"⏳ BUY {symbol} unresolved after {ORDER_RESULT_TIMEOUT:.0f}s (tag {tag}); funds stay reserved")
+                future.add_done_callback(lambda f, s=symbol, p=entry_price, q=max_qty, t=tag: _settle_late_buy(s, p, q, t, f))
+                unresolved += 1
+                continue
+            response = {"status": True, "message": "SUCCESS", "data": {"orderid": existing.get("orderid")}}
+        if _book_buy(symbol, entry_price, max_qty, response):
+            trades_executed = True
+        else:
+            _release_funds(max_qty * entry_price)
+
+    if not trades_executed and not unresolved:
         msg = "⚠️ No trades executed today. All signals were HOLD or insufficient funds."
         print(msg)
         send_telegram_alert("BOT", "INFO", 0, reason=msg)
 
 
+def _order_by_tag(tag):
+    try:
+        return find_order_by_tag(tag)
+    except Exception as e:
+        print(f"⚠️ Order book lookup failed for tag {tag}: {e}")
+        return None
+
+def _book_buy(symbol, entry_price, qty, response):
+    """Records an accepted BUY (portfolio, exit engine, tick feed, fill tracking). False if it failed."""
+    print(f"📤 Order response for {symbol}: {response}")
+    if not (response and isinstance(response, dict) and response.get("status")):
+        msg = f"❌ Failed to place BUY order for {symbol}: {response}"
+        print(msg)
+        send_telegram_alert(symbol, "ERROR", 0, reason=msg)
+        return False
+    orderid = (response.get("data") or {}).get("orderid")
+    portfolio[symbol] = {
+        "entry": entry_price,
+        "time": datetime.now(),
+        "qty": qty,
+        "orderid": orderid
+    }
+    exit_engine.open(symbol, entry_price, qty)
+    get_tick_feed().subscribe(symbol)  # ✅ live ticks for the exit engine from now on
+    get_tracker().track(orderid)  # ✅ fill price/qty arrive via _on_fill
+    print(f"✅ Bought {symbol} × {qty} at ₹{entry_price:.2f} | ₹{available_funds:.2f} left")
+    send_telegram_alert(symbol, "BUY", entry_price, reason="AI Strategy")
+    return True
+
+def _release_funds(amount):
+    global available_funds
+    with _funds_lock:
+        available_funds += amount
+
+def _hold_unknown_buy(symbol, tag, error):
+    """The order book couldn't confirm the BUY either way: keep its funds reserved and ask for a manual check."""
+    msg = f"❓ BUY {symbol} state unknown (tag {tag}), funds stay reserved — check the order book: {error}"
+    print(msg)
+    send_telegram_alert(symbol, "ERROR", 0, reason=msg)
+
+def _settle_late_buy(symbol, entry_price, qty, tag, future):
+    """Books a BUY whose result arrived after trade_logic stopped waiting, or releases its funds.
+    Runs on a pipeline worker thread."""
+    try:
+        response = future.result()
+    except OrderStateUnknown as e:
+        _hold_unknown_buy(symbol, tag, e)
+        return
+    except Exception as e:
+        response = {"status": False, "message": str(e)}
+    if not _book_buy(symbol, entry_price, qty, response):
+        _release_funds(qty * entry_price)
+
 def monitor_holdings():
+    get_live_prices(list(portfolio))  # ✅ Warm the price snapshot with one batched quote
     for symbol, info in list(portfolio.items()):
         try:
             current_price = get_live_price(symbol)
@@ -211,15 +377,26 @@ def monitor_holdings():
                 signal == "SELL" or
                 time_held >= MAX_HOLD_DAYS
             ):
+                # ✅ Skip positions the tick engine is already selling (or has sold)
+                if not exit_engine.claim(symbol) or symbol not in portfolio:
+                    continue
                 place_order(symbol, "SELL", info["qty"])
                 send_telegram_alert(symbol, "SELL", current_price, reason="AI Exit/TP/SL")
                 plot_trade_chart(symbol, info["entry"], current_price)
-                with open("trade_log.csv", "a") as log:
-                    log.write(f"{datetime.now()},{symbol},SELL,{info['qty']},{current_price},{pnl},AI_EXIT\n")
+                log_trade(symbol, "SELL", info["qty"], entry=info["entry"], tp=info["entry"] + TAKE_PROFIT,
+                          sl=info["entry"] - STOP_LOSS, exit_price=current_price, pnl=pnl, status="CLOSED",
+                          strategy="ai", reason="AI_EXIT", holding_days=time_held, exit_time=datetime.now())
                 del portfolio[symbol]
+                get_tick_feed().unsubscribe(symbol)
                 print(f"💰 Sold {symbol} | PnL: ₹{pnl:.2f}")
         except Exception as e:
             print(f"❌ Monitoring error for {symbol}: {e}")
+    if portfolio:
+        get_tick_feed().subscribe(*portfolio)  # ✅ positions restored from elsewhere get ticks too
+    # ✅ Tick-to-order latency from live ticks (exchange timestamp -> dispatch / broker ack)
+    stats = exit_engine.latency_stats()
+    if stats["ticks"]:
+        print(f"⚡ Exit engine: {stats} | feed: {get_tick_feed().stats()}")
         
 # ✅ Run the bot
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+# broker_client.py
+# Pooled keep-alive HTTP(S) client for the Angel One REST API.
+import json
+import time
+import queue
+import socket
+import threading
+import http.client
+
+BASE_URL = "apiconnect.angelone.in"
+
+# ✅ Errors that mean a pooled connection went stale (server closed it while idle).
+# Timeouts are deliberately not retried: the request may already have reached the broker.
+STALE_ERRORS = (http.client.HTTPException, OSError)
+
+# ✅ Endpoints that must never be sent twice. Once their request is written, a dropped connection is
+# surfaced to the caller (who reconciles through the order book) instead of being re-sent here.
+NON_IDEMPOTENT_PATHS = ("/placeOrder", "/modifyOrder", "/cancelOrder")
+
+
+class ApiResponse(dict):
+    """Decoded broker response. Still a dict, with typed accessors for the common fields."""
+
+    @property
+    def status(self):
+        return bool(self.get("status"))
+
+    @property
+    def message(self):
+        return self.get("message", "")
+
+    @property
+    def errorcode(self):
+        return self.get("errorcode", "")
+
+    @property
+    def data(self):
+        return self.get("data")
+
+
+def parse_response(body):
+    """Decodes a raw response body once into an ApiResponse."""
+    try:
+        raw = json.loads(body) if body else {}
+    except ValueError:
+        raw = {"status": False, "message": body}
+    if not isinstance(raw, dict):
+        raw = {"status": True, "data": raw}
+    return ApiResponse(raw)
+
+
+class BrokerClient:
+    """Thread-safe pool of persistent connections to one broker host."""
+
+    def __init__(self, host=BASE_URL, port=None, headers=None, pool_size=4, timeout=10,
+                 use_tls=True, max_idle=60):
+        self.host = host
+        self.port = port
+        self.headers = headers or {}          # dict or zero-arg callable returning a dict
+        self.timeout = timeout
+        self.use_tls = use_tls
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()        # (connection, last_used) — most recently used first
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "handshakes": 0, "reused": 0, "reconnects": 0, "errors": 0}
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def stats(self):
+        """Returns a copy of request / handshake / reuse counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.use_tls else http.client.HTTPConnection
+        conn = cls(self.host, self.port, timeout=self.timeout)
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._count("handshakes")
+        return conn
+
+    def _acquire(self):
+        self._slots.acquire()
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                try:
+                    return self._connect(), False
+                except Exception:
+                    self._slots.release()
+                    raise
+            if time.monotonic() - last_used > self.max_idle:
+                conn.close()
+                continue
+            return conn, True
+
+    def _release(self, conn, reusable):
+        if reusable:
+            self._idle.put((conn, time.monotonic()))
+        else:
+            conn.close()
+        self._slots.release()
+
+    def _headers(self, extra):
+        base = self.headers() if callable(self.headers) else self.headers
+        headers = {k: v for k, v in base.items() if v is not None}
+        headers["Connection"] = "keep-alive"
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def request(self, method, path, payload=None, headers=None, idempotent=None):
+        """Sends one request over a pooled connection and returns an ApiResponse.
+
+        A stale pooled connection is replaced and the request re-sent only if the send itself failed, or if
+        the request is idempotent (default: any path outside NON_IDEMPOTENT_PATHS).
+        """
+        body = payload if payload is None or isinstance(payload, str) else json.dumps(payload)
+        headers = self._headers(headers)
+        if idempotent is None:
+            idempotent = not path.endswith(NON_IDEMPOTENT_PATHS)
+        self._count("requests")
+        for attempt in range(2):
+            conn, reused = self._acquire()
+            sent = False
+            try:
+                conn.request(method, path, body or "", headers)
+                sent = True
+                res = conn.getresponse()
+                data = res.read()
+            except TimeoutError:
+                self._release(conn, False)
+                self._count("errors")
+                raise
+            except STALE_ERRORS:
+                self._release(conn, False)
+                if reused and attempt == 0 and (idempotent or not sent):
+                    # ✅ Idle connection was dropped by the server — reconnect once
+                    self._count("reconnects")
+                    continue
+                self._count("errors")
+                raise
+            except Exception:
+                self._release(conn, False)
+                self._count("errors")
+                raise
+            if reused:
+                self._count("reused")
+            self._release(conn, not res.will_close)
+            return parse_response(data.decode("utf-8"))
+
+    def close(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
@@ -0,0 +1,194 @@
+# credentials.py
+# One in-memory holder for the Angel One session tokens (access/feed token, api key, client code).
+# Reads are a dict lookup while the JWT is valid; an expired token triggers a single-flight refresh
+# (local file -> Gist -> generate_access_token.generate_token) that every other caller waits on.
+import os
+import json
+import time
+import base64
+import threading
+from datetime import datetime, timedelta
+import requests
+
+GIST_RAW_URL = "https://gist.githubusercontent.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/access_token.json"
+TOKEN_FILE = "access_token.json"
+REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", "300"))   # seconds before expiry to refresh in background
+AUTH_ERROR_CODES = {"AG8001", "AG8002", "AG8003"}                   # invalid / expired / missing token
+
+
+def token_expiry(access_token):
+    """Epoch seconds from the JWT `exp` claim; end of today when the token carries none."""
+    try:
+        payload = access_token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except Exception:
+        tomorrow = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+        return tomorrow.timestamp()
+
+
+class CredentialProvider:
+    """Thread-safe token cache with expiry and single-flight refresh."""
+
+    def __init__(self, gist_url=GIST_RAW_URL, token_file=TOKEN_FILE, refresh_margin=REFRESH_MARGIN):
+        self.gist_url = gist_url
+        self.token_file = token_file
+        self.refresh_margin = refresh_margin
+        self._tokens = None
+        self._expires_at = 0.0
+        self.refreshed_at = None
+        self._refreshing = False
+        self._attempted_for = None   # expiry the last background refresh was started for
+        self._rejected = set()       # access tokens the broker has rejected (never reloaded)
+        self._error = None
+        self._cond = threading.Condition()
+        self._stats = {"reads": 0, "refreshes": 0, "waits": 0, "generated": 0}
+
+    # --- sources ---------------------------------------------------------------------------
+    def _from_file(self):
+        try:
+            with open(self.token_file) as f:
+                tokens = json.load(f)
+        except (OSError, ValueError):
+            return None
+        mtime = datetime.fromtimestamp(os.path.getmtime(self.token_file)).date()
+        return tokens if mtime == datetime.now().date() else None
+
+    def _from_gist(self):
+        try:
+            response = requests.get(self.gist_url, timeout=10)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            print(f"❌ Error fetching access_token.json from Gist: {e}")
+            return None
+
+    def _generate(self):
+        from generate_access_token import generate_token
+
+        print("🔄 Regenerating token via generate_token()...")
+        with self._cond:
+            self._stats["generated"] += 1
+        generate_token()
+        return self._from_gist()
+
+    def _usable(self, tokens, margin=0.0):
+        """Has an access token the broker has not rejected that stays valid for `margin` more seconds."""
+        if not (tokens and tokens.get("access_token")) or tokens["access_token"] in self._rejected:
+            return False
+        return token_expiry(tokens["access_token"]) > time.time() + margin
+
+    def _load(self):
+        """Local file, then Gist, then a fresh login, skipping rejected tokens and any that expire within
+        refresh_margin. A token inside the margin is only kept when no source has a longer-lived one."""
+        fallback = None
+        for source in (self._from_file, self._from_gist, self._generate):
+            tokens = source()
+            if self._usable(tokens, self.refresh_margin):
+                break
+            if fallback is None and self._usable(tokens):
+                fallback = tokens
+        else:
+            if fallback is None:
+                raise RuntimeError("❌ Failed to fetch fresh access_token.json")
+            tokens = fallback
+        try:
+            with open(self.token_file, "w") as f:
+                json.dump(tokens, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not write {self.token_file}: {e}")
+        return tokens
+
+    # --- public API ------------------------------------------------------------------------
+    def tokens(self):
+        """Current tokens. Only blocks when there is no valid token in memory."""
+        tokens, expires_at = self._tokens, self._expires_at
+        now = time.time()
+        with self._cond:
+            self._stats["reads"] += 1
+        if tokens is not None and now < expires_at:
+            if now > expires_at - self.refresh_margin:
+                self._start_background_refresh(expires_at)
+            return tokens
+        return self.refresh()
+
+    def get(self, key, default=None):
+        return self.tokens().get(key, default)
+
+    def refresh(self, force=False):
+        """Single-flight refresh: one caller loads, concurrent callers wait for its result."""
+        with self._cond:
+            if not force and self._tokens is not None and time.time() < self._expires_at:
+                return self._tokens
+            if self._refreshing:
+                self._stats["waits"] += 1
+                while self._refreshing:
+                    self._cond.wait()
+                if self._tokens is not None and time.time() < self._expires_at:
+                    return self._tokens
+                raise RuntimeError(f"Token refresh failed: {self._error}")
+            self._refreshing = True
+        try:
+            tokens = self._load()
+            error = None
+        except Exception as e:
+            tokens, error = None, e
+        with self._cond:
+            if tokens is not None:
+                self._tokens = tokens
+                self._expires_at = token_expiry(tokens["access_token"])
+                self.refreshed_at = datetime.now()
+                self._stats["refreshes"] += 1
+            self._error = error
+            self._refreshing = False
+            self._cond.notify_all()
+        if error is not None:
+            raise error
+        return tokens
+
+    def _start_background_refresh(self, expires_at):
+        """At most one background attempt per token expiry; a failed attempt waits for the blocking refresh."""
+        with self._cond:
+            if self._refreshing or self._attempted_for == expires_at:
+                return
+            self._attempted_for = expires_at
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh(force=True)
+        except Exception as e:
+            print(f"⚠️ Background token refresh failed (current token kept): {e}")
+
+    def invalidate(self, access_token=None):
+        """Marks the token expired (e.g. after AG8001) and never reloads it from the file or Gist.
+        Ignored if the rejected token was already replaced."""
+        with self._cond:
+            current = self._tokens.get("access_token") if self._tokens else None
+            if access_token is None or current == access_token:
+                if current:
+                    self._rejected.add(current)
+                self._expires_at = 0.0
+
+    def auth_headers(self):
+        """Angel One SmartAPI headers for the current session."""
+        tokens = self.tokens()
+        return {
+            'Authorization': f'Bearer {tokens["access_token"]}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'X-UserType': 'USER',
+            'X-SourceID': 'WEB',
+            'X-ClientLocalIP': os.getenv('CLIENT_LOCAL_IP'),
+            'X-ClientPublicIP': os.getenv('CLIENT_PUBLIC_IP'),
+            'X-MACAddress': os.getenv('MAC_ADDRESS'),
+            'X-PrivateKey': tokens.get("api_key")
+        }
+
+    def stats(self):
+        with self._cond:
+            return {**self._stats, "expires_in": max(0.0, self._expires_at - time.time())}
+
+
+# ✅ Process-wide provider shared by the bot, broker wrappers and dashboards
+credentials = CredentialProvider()
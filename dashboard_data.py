@@ -0,0 +1,272 @@
+# dashboard_data.py
+# Process-wide data layer for the Streamlit dashboards. Every source (tokens, funds, trade log, holdings,
+# prices, charts, model) has its own TTL and background refresher thread, and the cache lives in this
+# module, so all sessions share it. Script reruns only read memory: a source that has not loaded yet
+# returns its default and schedules a load, and it never blocks the rerun on the network.
+import os
+import time
+import threading
+import pandas as pd
+
+TOKENS_TTL = 300
+FUNDS_TTL = float(os.getenv("DASH_FUNDS_TTL", "30"))
+TRADES_TTL = float(os.getenv("DASH_TRADES_TTL", "60"))
+HOLDINGS_TTL = 5
+PRICES_TTL = float(os.getenv("DASH_PRICES_TTL", "2"))
+CHART_TTL = float(os.getenv("DASH_CHART_TTL", "300"))
+CHART_IDLE = 900            # stop refreshing a chart nobody has viewed for this long
+LIVE_REFRESH = float(os.getenv("LIVE_REFRESH_SECS", "1"))   # live widget (st.fragment) redraw interval
+WATCH_IDLE = 60             # stop quoting a watched symbol no widget has asked for this long
+ERROR_BACKOFF_MAX = 300.0
+DASHBOARD_MODEL_PATH = "ai_model/advanced_model.pkl"
+
+
+class CachedSource:
+    """One value kept fresh by a daemon thread every `ttl` seconds (ttl=None: load once)."""
+
+    def __init__(self, name, loader, ttl, default=None, alive=None):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.value = default
+        self.loaded_at = None       # wall clock of the last successful load
+        self.error = None
+        self.load_ms = None
+        self.alive = alive          # alive() -> False stops the refresher
+        self._failures = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=f"dash-{self.name}", daemon=True)
+                    self._thread.start()
+        return self
+
+    def get(self):
+        """Current value from memory (the default until the first load finishes)."""
+        self.start()
+        return self.value
+
+    def refresh(self):
+        """Asks the refresher to reload now (returns immediately)."""
+        self.start()
+        self._wake.set()
+
+    def load(self):
+        start = time.perf_counter()
+        try:
+            self.value = self.loader()
+            self.loaded_at = time.time()
+            self.error = None
+            self._failures = 0
+        except Exception as e:
+            self.error = str(e)
+            self._failures += 1
+            print(f"❌ Dashboard source {self.name} failed: {e}")
+        self.load_ms = (time.perf_counter() - start) * 1000
+
+    def _run(self):
+        while True:
+            self.load()
+            if (self.ttl is None and not self.error) or (self.alive is not None and not self.alive()):
+                return
+            wait = self.ttl or 30.0
+            if self.error:
+                wait = min(ERROR_BACKOFF_MAX, wait * 2 ** (self._failures - 1))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def age(self):
+        return None if self.loaded_at is None else time.time() - self.loaded_at
+
+    def status(self):
+        return {"loaded_at": self.loaded_at, "age": self.age(), "error": self.error, "load_ms": self.load_ms}
+
+
+class KeyedSource:
+    """A CachedSource per key (e.g. one chart per symbol), created on first request, dropped when idle."""
+
+    def __init__(self, name, loader, ttl, idle=CHART_IDLE):
+        self.name = name
+        self.loader = loader        # loader(*key)
+        self.ttl = ttl
+        self.idle = idle
+        self._sources = {}
+        self._used = {}
+        self._lock = threading.Lock()
+
+    def get(self, *key):
+        with self._lock:
+            source = self._sources.get(key)
+            if source is None:
+                source = CachedSource(f"{self.name}:{key}", lambda: self.loader(*key), self.ttl,
+                                      alive=lambda: self._alive(key))
+                self._sources[key] = source
+            self._used[key] = time.time()
+        return source.get()
+
+    def _alive(self, key):
+        with self._lock:
+            if time.time() - self._used.get(key, 0) <= self.idle:
+                return True
+            self._sources.pop(key, None)
+            self._used.pop(key, None)
+            return False
+
+    def status(self):
+        with self._lock:
+            return {key: source.status() for key, source in self._sources.items()}
+
+
+# === Loaders (imports deferred: importing this module costs nothing) ===
+def _load_token_time():
+    from credentials import credentials
+
+    credentials.tokens()
+    return credentials.refreshed_at
+
+
+def _load_funds():
+    from funds import get_available_funds
+
+    funds = get_available_funds()
+    if not funds.get("status"):
+        raise RuntimeError(funds.get("error") or funds.get("message") or "funds unavailable")
+    return float(funds["data"]["availablecash"])
+
+
+def _load_trades():
+    """TradeLog sheet when GOOGLE_CREDENTIALS_JSON is set, otherwise the local trade journal."""
+    from trade_journal import COLUMNS, get_journal, to_frame
+
+    if not os.getenv("GOOGLE_CREDENTIALS_JSON"):
+        return to_frame(get_journal().all())
+    from google_sheets import get_sheet, reset_client
+
+    try:
+        records = get_sheet("TradeLog").get_all_records()   # ✅ the process-wide cached client
+    except Exception:
+        reset_client()      # the next refresh re-authorises
+        raise
+    df = pd.DataFrame(records) if records else pd.DataFrame(columns=COLUMNS)
+    for col in COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    return df
+
+
+def _load_holdings():
+    from helpers import load_holdings
+
+    return load_holdings()
+
+
+_watched = {}              # symbol -> last time a live widget asked for it
+
+
+def _load_prices():
+    """One batched quote for holdings + symbols shown in live widgets (websocket ticks fill in between)."""
+    from price_service import get_live_prices
+
+    now = time.time()
+    for symbol, seen in list(_watched.items()):
+        if now - seen > WATCH_IDLE:
+            _watched.pop(symbol, None)
+    return get_live_prices(sorted(set(sources["holdings"].get() or {}) | set(_watched)))
+
+
+def _load_chart(symbol, period="7d", interval="15m"):
+    from ohlcv_store import get_history
+
+    return get_history(symbol, period=period, interval=interval)
+
+
+def _load_model():
+    import joblib
+
+    return joblib.load(DASHBOARD_MODEL_PATH)
+
+
+def _load_stock_list():
+    try:
+        df_stocks = pd.read_csv("nifty500list.csv")
+        return [f"{s.strip()}.NS" for s in df_stocks["Symbol"] if isinstance(s, str)]
+    except Exception:
+        return ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]
+
+
+sources = {
+    "token_time": CachedSource("token_time", _load_token_time, TOKENS_TTL),
+    "funds": CachedSource("funds", _load_funds, FUNDS_TTL),
+    "trades": CachedSource("trades", _load_trades, TRADES_TTL),
+    "holdings": CachedSource("holdings", _load_holdings, HOLDINGS_TTL, default={}),
+    "prices": CachedSource("prices", _load_prices, PRICES_TTL, default={}),
+    "model": CachedSource("model", _load_model, None),
+    "stock_list": CachedSource("stock_list", _load_stock_list, None, default=["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]),
+}
+charts = KeyedSource("chart", _load_chart, CHART_TTL)
+
+
+def get(name):
+    return sources[name].get()
+
+
+def refresh(name):
+    sources[name].refresh()
+
+
+def get_chart(symbol, period="7d", interval="15m"):
+    return charts.get(symbol, period, interval)
+
+
+def watch(*symbols):
+    """Keeps these symbols in the background price refresh while a live widget shows them."""
+    now = time.time()
+    for symbol in symbols:
+        _watched[symbol] = now
+    sources["prices"].start()
+
+
+def live_price(symbol):
+    """(price, updated_at) straight from the shared price snapshot, or (None, None). No network."""
+    from price_service import price_service
+
+    watch(symbol)
+    entry = price_service.peek(symbol)
+    return (None, None) if entry is None else (entry[0], entry[1])
+
+
+def memo_signals(*kinds):
+    """Latest value and bar per symbol for each signal_memo kind, as one frame. Reads only, never computes."""
+    from signal_memo import signal_memo
+
+    rows = {}
+    for kind in kinds:
+        for symbol, (bar, value) in signal_memo.latest(kind).items():
+            row = rows.setdefault(symbol, {"symbol": symbol})
+            row[kind] = value
+            row[f"{kind} bar"] = pd.Timestamp(bar)
+    columns = ["symbol"] + [c for kind in kinds for c in (kind, f"{kind} bar")]
+    return pd.DataFrame(sorted(rows.values(), key=lambda r: r["symbol"]), columns=columns)
+
+
+def trades_frame():
+    from trade_journal import COLUMNS
+
+    df = get("trades")
+    return pd.DataFrame(columns=COLUMNS) if df is None else df
+
+
+def status():
+    """Per-source freshness for a dashboard footer / debugging."""
+    return {name: source.status() for name, source in sources.items()}
+
+
+def warm():
+    """Starts every refresher (first dashboard session calls this; later ones find them running)."""
+    for source in sources.values():
+        source.start()
@@ -9,16 +9,26 @@ from angel_api import (
     get_ltp as angel_get_ltp_data,
     get_order_status as angel_get_order_status
 )
+from price_service import price_service
+from order_tracker import get_tracker
+from instrument_master import get_token, get_trading_symbol
 
-# Wrapper to fetch only the price
+# Wrapper to fetch only the price (served from the shared batched/TTL price snapshot)
 def get_live_price(symbol):
     try:
-        ltp_data = angel_get_ltp_data(symbol)
-        return ltp_data.get("ltp", None)
+        return price_service.get_price(symbol)
     except Exception as e:
         print(f"❌ Error getting LTP for {symbol}: {e}")
         return None
 
+# Batch wrapper: one quote request for every symbol not already fresh in the snapshot
+def get_live_prices(symbols):
+    try:
+        return price_service.get_prices(symbols)
+    except Exception as e:
+        print(f"❌ Error getting LTPs for {len(symbols)} symbols: {e}")
+        return {}
+
 # Place order wrapper
 def place_order(symbol, transaction_type, quantity):
     try:
@@ -60,17 +70,26 @@ def get_trade_book():
         return []
 
 # LTP data
-def get_ltp(symbol):
+def get_ltp(symbol, exchange="NSE"):
     try:
-        return angel_get_ltp_data(symbol)
+        token = get_token(symbol, exchange)
+        if token is None:
+            raise ValueError(f"No symbol token for {symbol}")
+        return angel_get_ltp_data(get_trading_symbol(symbol, exchange), token, exchange)
     except Exception as e:
         print(f"❌ Failed to fetch LTP data: {e}")
         return {}
 
-# Order status
+# Order status (served from the bulk order-book tracker; one per-order request only for unknown ids)
 def get_order_status(order_id):
     try:
-        return angel_get_order_status(order_id)
+        tracker = get_tracker()
+        record = tracker.status(order_id)
+        if record is None:
+            tracker.track(order_id)  # ✅ the poll thread picks it up; later calls are served from memory
+            return angel_get_order_status(order_id)
+        return {"status": True, "message": "SUCCESS",
+                "data": dict(record["raw"], state=record["state"], filled=record["filled"])}
     except Exception as e:
         print(f"❌ Failed to get status for order {order_id}: {e}")
         return {}
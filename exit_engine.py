@@ -0,0 +1,169 @@
+# exit_engine.py
+# Tick-driven exits: every websocket tick for an open position is checked against TAKE_PROFIT / STOP_LOSS
+# (₹ per share), the trailing buffer and MAX_HOLD_DAYS in O(1), and the SELL is dispatched as soon as a
+# rule fires. bot.monitor_holdings keeps running on its 10-minute schedule as a backstop (model SELL
+# signals, symbols that stopped ticking).
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from instrument_master import normalize_symbol
+
+EXIT_WORKERS = int(os.getenv("EXIT_WORKERS", "4"))
+RETRY_AFTER = 5.0          # seconds before a failed exit is attempted again
+LATENCY_SAMPLES = 10000
+DAY = 86400.0
+
+
+class Position:
+    """Open position with its exit thresholds precomputed as absolute prices."""
+
+    __slots__ = ("symbol", "qty", "entry", "peak", "opened_at", "deadline", "tp_price", "sl_price", "retry_at")
+
+    def __init__(self, symbol, entry, qty, opened_at, take_profit, stop_loss, max_hold_days):
+        self.symbol = symbol
+        self.qty = qty
+        self.entry = entry
+        self.peak = entry
+        self.opened_at = opened_at
+        self.deadline = opened_at + max_hold_days * DAY
+        self.tp_price = entry + take_profit
+        self.sl_price = entry - stop_loss
+        self.retry_at = 0.0
+
+
+class ExitEngine:
+    """Per-tick exit rules for every open position, with tick-to-order latency tracking."""
+
+    def __init__(self, take_profit=10, stop_loss=3, trail_buffer=2, max_hold_days=5,
+                 exit_fn=None, on_exit=None, workers=EXIT_WORKERS):
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.trail_buffer = trail_buffer
+        self.max_hold_days = max_hold_days
+        self.exit_fn = exit_fn          # exit_fn(symbol, "SELL", qty) -> broker response
+        self.on_exit = on_exit          # on_exit(symbol, position, price, reason, response)
+        self._positions = {}
+        self._exiting = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="exit")
+        self._dispatch_ms = deque(maxlen=LATENCY_SAMPLES)   # tick received -> order call started
+        self._ack_ms = deque(maxlen=LATENCY_SAMPLES)        # tick received -> broker response
+        self._exchange_ms = deque(maxlen=LATENCY_SAMPLES)   # exchange tick timestamp -> order call started
+        self._counts = {"ticks": 0, "exits": 0, "failed": 0}
+
+    # --- positions -------------------------------------------------------------------------
+    def open(self, symbol, entry, qty, opened_at=None):
+        """Starts watching a position (call right after the BUY fills)."""
+        opened_at = opened_at.timestamp() if hasattr(opened_at, "timestamp") else (opened_at or time.time())
+        key = normalize_symbol(symbol)
+        position = Position(symbol, float(entry), int(qty), opened_at,
+                            self.take_profit, self.stop_loss, self.max_hold_days)
+        with self._lock:
+            self._positions[key] = position
+            self._exiting.discard(key)
+
+    def claim(self, symbol):
+        """Takes a position away from the engine before someone else exits it.
+
+        Returns False if the engine is already exiting it (the caller must not sell).
+        """
+        key = normalize_symbol(symbol)
+        with self._lock:
+            if key in self._exiting:
+                return False
+            self._positions.pop(key, None)
+            return True
+
+    def is_open(self, symbol):
+        return normalize_symbol(symbol) in self._positions
+
+    def positions(self):
+        with self._lock:
+            return list(self._positions.values())
+
+    # --- ticks -----------------------------------------------------------------------------
+    def on_tick(self, symbol, price, ts_ns=None):
+        """Websocket tick listener: O(1) rule check, dispatches the exit when one fires."""
+        received = time.perf_counter()
+        self._counts["ticks"] += 1
+        position = self._positions.get(normalize_symbol(symbol))
+        if position is None:
+            return None
+        price = float(price)
+        if price > position.peak:
+            position.peak = price
+        reason = self._check(position, price, time.time())
+        if reason is None:
+            return None
+        with self._lock:
+            key = normalize_symbol(symbol)
+            if self._positions.get(key) is not position:
+                return None       # already claimed by another tick or by monitor_holdings
+            del self._positions[key]
+            self._exiting.add(key)
+        self._pool.submit(self._exit, key, position, price, reason, received, ts_ns)
+        return reason
+
+    def _check(self, position, price, now):
+        if now < position.retry_at:
+            return None
+        if price >= position.tp_price:
+            return "TP"
+        if price <= position.sl_price:
+            return "SL"
+        if self.trail_buffer is not None and position.entry < price < position.peak - self.trail_buffer:
+            return "TRAIL"
+        if now >= position.deadline:
+            return "MAX_HOLD"
+        return None
+
+    def _exit(self, key, position, price, reason, received, ts_ns=None):
+        self._dispatch_ms.append((time.perf_counter() - received) * 1000)
+        if ts_ns:
+            self._exchange_ms.append((time.time_ns() - ts_ns) / 1e6)
+        try:
+            response = self.exit_fn(position.symbol, "SELL", position.qty)
+            ok = bool(response) and (not isinstance(response, dict) or response.get("status"))
+        except Exception as e:
+            response, ok = {"status": False, "message": str(e)}, False
+        self._ack_ms.append((time.perf_counter() - received) * 1000)
+
+        if not ok:
+            self._counts["failed"] += 1
+            print(f"❌ Tick exit ({reason}) failed for {position.symbol}: {response}")
+            position.retry_at = time.time() + RETRY_AFTER
+            with self._lock:
+                self._exiting.discard(key)
+                self._positions.setdefault(key, position)
+            return
+
+        self._counts["exits"] += 1
+        try:
+            if self.on_exit is not None:
+                self.on_exit(position.symbol, position, price, reason, response)
+        except Exception as e:
+            print(f"⚠️ Exit callback error for {position.symbol}: {e}")
+        finally:
+            # ✅ Released only after the callback so claim() can't race a half-recorded exit
+            with self._lock:
+                self._exiting.discard(key)
+
+    # --- metrics ---------------------------------------------------------------------------
+    def latency_stats(self):
+        """Tick-to-order latency in milliseconds (p50 / p99 for dispatch, broker ack and, on real ticks,
+        exchange timestamp to dispatch)."""
+        stats = dict(self._counts, open=len(self._positions))
+        for name, samples in (("dispatch", self._dispatch_ms), ("ack", self._ack_ms),
+                              ("exchange", self._exchange_ms)):
+            values = np.fromiter(list(samples), dtype=np.float64)
+            if len(values):
+                stats[f"{name}_p50_ms"] = float(np.percentile(values, 50))
+                stats[f"{name}_p99_ms"] = float(np.percentile(values, 99))
+        return stats
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
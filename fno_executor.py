@@ -1,29 +1,22 @@
-import pandas as pd
-import datetime
-import os
-from angel_api import get_ltp, place_order  # ✅ your existing functions
-from telegram.alert import send_alert
+from angel_api import place_order  # ✅ your existing functions
+from executor import get_ltp
+from alerts import send_general_telegram_message as send_alert  # ✅ queued Telegram message
+from option_chain import get_chain
+from trade_journal import log_trade as journal_log_trade
 
-df_instruments = pd.read_csv("instruments.csv")  # Daily instrument file
+# ✅ Scrip master names of the index underlyings (their spot LTP sets the ATM strike)
+INDEX_SYMBOLS = {"NIFTY": "Nifty 50", "BANKNIFTY": "Nifty Bank", "FINNIFTY": "Nifty Fin Service"}
 
-def get_atm_option(symbol="NIFTY", option_type="CE"):
+def get_atm_option(symbol="NIFTY", option_type="CE", strikes_away=0):
     try:
-        ltp = float(get_ltp(symbol)["data"]["ltp"])
-        nearest_strike = int(round(ltp / 50) * 50)  # Strike step for NIFTY
-
-        expiry = df_instruments[
-            (df_instruments["name"] == symbol) &
-            (df_instruments["segment"] == "NFO-OPT")
-        ]["expiry"].drop_duplicates().sort_values().iloc[0]
-
-        row = df_instruments[
-            (df_instruments["name"] == symbol) &
-            (df_instruments["expiry"] == expiry) &
-            (df_instruments["strike"] == nearest_strike) &
-            (df_instruments["symbol"].str.endswith(option_type))
-        ].iloc[0]
-
-        return row["symbol"], row["token"], nearest_strike, expiry
+        quote = get_ltp(INDEX_SYMBOLS.get(symbol.upper(), symbol))
+        if not quote.get("data"):
+            raise ValueError(f"No LTP for {symbol}: {quote.get('message', 'token not in instrument master')}")
+        ltp = float(quote["data"]["ltp"])
+        trading_symbol, token, strike, expiry = get_chain().option(symbol, ltp, option_type, strikes_away)
+        if trading_symbol is None:
+            raise ValueError(f"No {option_type} contract near {ltp} for {symbol}")
+        return trading_symbol, token, strike, expiry
 
     except Exception as e:
         send_alert(f"❌ Option fetch error: {e}")
@@ -67,12 +60,6 @@ def place_order_fno(symbol="NIFTY", signal="BUY", qty=50):
         send_alert(f"❌ Order Exception: {e}")
 
 def log_trade(symbol, trading_symbol, strike, signal, qty):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_row = pd.DataFrame([[timestamp, symbol, trading_symbol, strike, signal, qty]],
-        columns=["timestamp", "symbol", "option", "strike", "signal", "qty"])
-
-    log_file = "logs/trades.csv"
-    if os.path.exists(log_file):
-        log_row.to_csv(log_file, mode="a", header=False, index=False)
-    else:
-        log_row.to_csv(log_file, index=False)
+    # ✅ Same journal as the equity bot; the option contract is the traded symbol
+    journal_log_trade(trading_symbol, "BUY", qty, status="OPEN", strategy="fno",
+                      reason=f"{signal} {symbol} strike {strike}")
@@ -1,28 +1,283 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import pandas as pd
+# google_sheets.py
+# Google Sheets logging with one cached client. Trade rows are spooled to a local file and sent in batched
+# append_rows calls (timer or size triggered) by a background thread; holdings are synced as a diff with a
+# single batch_update. A failed flush never loses a row: it stays spooled and is retried with backoff.
+import os
+import json
+import time
+import atexit
+import threading
 
 # Google Sheets setup
 SHEET_ID = "1GTmmYKh6cFwtSTpWATMDoL0Z0RgQ5OWNaHklOeUXPQs"
 CREDENTIALS_FILE = "smart-ai-bot-463112-a36ec5d41477.json"  # uploaded already
 
+SHEETS_FLUSH_SECS = float(os.getenv("SHEETS_FLUSH_SECS", "10"))   # timer flush
+SHEETS_BATCH_ROWS = int(os.getenv("SHEETS_BATCH_ROWS", "50"))     # size-triggered flush
+SHEETS_SPOOL_DIR = os.getenv("SHEETS_SPOOL_DIR", "sheets_spool")  # rows not yet confirmed by Sheets
+MAX_BACKOFF = 300.0
+
+_client = None
+_worksheets = {}
+_client_lock = threading.Lock()
+
+
+def _credentials(scope):
+    """Service account from GOOGLE_CREDENTIALS_JSON (hosted dashboards), else the bundled key file."""
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
+    if creds_json:
+        return ServiceAccountCredentials.from_json_keyfile_dict(json.loads(creds_json), scope)
+    return ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, scope)
+
+
+# ✅ One authorised client and one handle per worksheet for the whole process
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import gspread
+
+                scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+                _client = gspread.authorize(_credentials(scope))
+    return _client
+
+
 def get_sheet(sheet_name):
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, scope)
-    client = gspread.authorize(creds)
-    return client.open_by_key(SHEET_ID).worksheet(sheet_name)
+    sheet = _worksheets.get(sheet_name)
+    if sheet is None:
+        sheet = get_client().open_by_key(SHEET_ID).worksheet(sheet_name)
+        _worksheets[sheet_name] = sheet
+    return sheet
+
+
+def reset_client():
+    """Drops the cached client / worksheets (next call re-authorises)."""
+    global _client
+    with _client_lock:
+        _client = None
+        _worksheets.clear()
+
+
+class SheetSink:
+    """Buffered append-only writer: rows are spooled locally, then sent in one append_rows call."""
+
+    def __init__(self, sheet_name, flush_interval=SHEETS_FLUSH_SECS, max_rows=SHEETS_BATCH_ROWS,
+                 spool_dir=SHEETS_SPOOL_DIR):
+        self.sheet_name = sheet_name
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.spool_path = os.path.join(spool_dir, f"{sheet_name}.jsonl")
+        self._rows = self._load_spool()   # ✅ rows a previous run could not deliver
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._retry_at = 0.0
+        self._failures = 0
+
+    def _load_spool(self):
+        try:
+            with open(self.spool_path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return []
+
+    def _rewrite_spool(self, rows):
+        os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+        tmp = f"{self.spool_path}.tmp"
+        with open(tmp, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+        os.replace(tmp, self.spool_path)
+
+    def append(self, row):
+        """Never blocks on the network: the row is on local disk before this returns."""
+        row = [str(v) if not isinstance(v, (int, float, str, type(None))) else v for v in row]
+        with self._lock:
+            os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+            with open(self.spool_path, "a") as f:
+                f.write(json.dumps(row) + "\n")
+            self._rows.append(row)
+            full = len(self._rows) >= self.max_rows
+        if full:
+            _flusher.wake()
+        else:
+            _flusher.start()   # ✅ timer flush (also delivers rows spooled by a previous run)
+
+    def pending(self):
+        return len(self._rows)
+
+    def due(self, now):
+        if not self._rows or now < self._retry_at:
+            return False
+        return len(self._rows) >= self.max_rows or now - self._last_flush >= self.flush_interval
+
+    def flush(self):
+        """Sends every buffered row in one request. On failure the rows stay buffered and spooled."""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._rows)
+            if not rows:
+                return True
+            try:
+                get_sheet(self.sheet_name).append_rows(rows, value_input_option="USER_ENTERED")
+            except Exception as e:
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(MAX_BACKOFF, self.flush_interval * 2 ** self._failures)
+                print(f"❌ Sheets flush failed for {self.sheet_name} ({len(rows)} rows kept locally): {e}")
+                if self._failures % 3 == 0:
+                    reset_client()
+                return False
+            with self._lock:
+                del self._rows[:len(rows)]
+                self._rewrite_spool(self._rows)
+            self._failures = 0
+            self._last_flush = time.monotonic()
+            print(f"✅ {len(rows)} rows logged to Google Sheets ({self.sheet_name}).")
+            return True
+
 
-# ✅ Update holdings to Google Sheets
+class HoldingsSheet:
+    """Keeps the holdings worksheet in sync by writing only changed rows (one batch_update per flush)."""
+
+    HEADER = ["symbol", "details"]
+
+    def __init__(self, sheet_name="holdings", flush_interval=SHEETS_FLUSH_SECS):
+        self.sheet_name = sheet_name
+        self.flush_interval = flush_interval
+        self._desired = None        # latest {symbol: details_json} requested
+        self._written = None        # {symbol: details_json} as on the sheet
+        self._row_of = {}           # symbol -> 1-based sheet row
+        self._free_rows = []
+        self._next_row = 2
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._retry_at = 0.0
+        self._failures = 0
+
+    def update(self, data):
+        snapshot = {str(symbol): json.dumps(details, default=str, sort_keys=True) for symbol, details in data.items()}
+        with self._lock:
+            self._desired = snapshot
+        _flusher.wake()
+
+    def due(self, now):
+        return self._desired is not None and self._desired != self._written and now >= self._retry_at
+
+    def _load_layout(self, sheet):
+        """Reads the sheet once to learn which row holds which symbol."""
+        values = sheet.get_all_values()
+        self._written, self._row_of, self._free_rows = {}, {}, []
+        for i, row in enumerate(values[1:], start=2):
+            symbol = row[0] if row else ""
+            if symbol:
+                self._row_of[symbol] = i
+                self._written[symbol] = row[1] if len(row) > 1 else ""
+            else:
+                self._free_rows.append(i)
+        self._next_row = len(values) + 1 if values else 2
+        return [] if values[:1] == [self.HEADER] else [{"range": "A1:B1", "values": [self.HEADER]}]
+
+    def flush(self):
+        with self._lock:
+            desired = self._desired
+        if desired is None:
+            return True
+        try:
+            sheet = get_sheet(self.sheet_name)
+            updates = self._load_layout(sheet) if self._written is None else []
+            row_of, free_rows, next_row = dict(self._row_of), list(self._free_rows), self._next_row
+            for symbol in [s for s in row_of if s not in desired]:
+                row = row_of.pop(symbol)
+                free_rows.append(row)
+                updates.append({"range": f"A{row}:B{row}", "values": [["", ""]]})
+            for symbol, details in desired.items():
+                if symbol in row_of and self._written.get(symbol) == details:
+                    continue
+                if symbol not in row_of:
+                    if free_rows:
+                        free_rows.sort()
+                        row_of[symbol] = free_rows.pop(0)
+                    else:
+                        row_of[symbol], next_row = next_row, next_row + 1
+                row = row_of[symbol]
+                updates.append({"range": f"A{row}:B{row}", "values": [[symbol, details]]})
+            if updates:
+                sheet.batch_update(updates)
+        except Exception as e:
+            self._failures += 1
+            self._retry_at = time.monotonic() + min(MAX_BACKOFF, self.flush_interval * 2 ** self._failures)
+            self._written = None    # re-read the layout on the next attempt
+            print(f"❌ Holdings sync to Google Sheets failed: {e}")
+            return False
+        self._row_of, self._free_rows, self._next_row = row_of, free_rows, next_row
+        self._written = desired
+        self._failures = 0
+        self._last_flush = time.monotonic()
+        if updates:
+            print(f"✅ Holdings updated to Google Sheets ({len(updates)} changed rows).")
+        return True
+
+
+class _Flusher:
+    """One background thread that flushes every registered sink when it is due."""
+
+    def __init__(self, tick=1.0):
+        self.tick = tick
+        self.sinks = []
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def register(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def start(self):
+        """Starts the thread on first use (never at import: importing this module touches no network)."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="sheets-flusher", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush_all)
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.tick)
+            self._wake.clear()
+            now = time.monotonic()
+            for sink in self.sinks:
+                if sink.due(now):
+                    sink.flush()
+
+    def flush_all(self):
+        return all(sink.flush() for sink in self.sinks)
+
+
+_flusher = _Flusher()
+trade_log_sink = _flusher.register(SheetSink("trade_log"))
+holdings_sheet = _flusher.register(HoldingsSheet("holdings"))
+
+
+# ✅ Update holdings to Google Sheets (diff written in the background)
 def update_holdings_sheet(data):
-    sheet = get_sheet("holdings")
-    df = pd.DataFrame.from_dict(data, orient="index").reset_index()
-    df.columns = ["symbol", "details"]
-    sheet.clear()
-    sheet.update([df.columns.values.tolist()] + df.values.tolist())
-    print("✅ Holdings updated to Google Sheets.")
-
-# ✅ Append trade log entry to Google Sheets
+    holdings_sheet.update(data)
+
+# ✅ Append trade log entry to Google Sheets (buffered; spooled locally until Sheets confirms)
 def log_trade_to_sheet(entry):
-    sheet = get_sheet("trade_log")
-    sheet.append_row(entry)
-    print("✅ Trade logged to Google Sheets.")
+    trade_log_sink.append(entry)
+
+# ✅ Starts background delivery now, e.g. to send rows spooled by a previous run before the first trade
+def start_sheets_sync():
+    _flusher.start()
+
+# ✅ Push everything buffered now (e.g. end of day)
+def flush_sheets():
+    return _flusher.flush_all()
@@ -4,6 +4,7 @@ import numpy as np
 import pandas as pd
 from sklearn.metrics import accuracy_score
 from utils import convert_to_ist
+from indicators import rsi as panel_rsi, add_features
 from google_sheets import update_holdings_sheet, log_trade_to_sheet
 
 HOLDINGS_FILE = "holdings.json"
@@ -39,23 +40,13 @@ def pretty_time(ts):
 
 # ✅ Compute RSI
 def compute_rsi(series, period=14):
-    delta = series.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
+    rsi = panel_rsi(np.asarray(series, dtype=np.float64), period)
+    if isinstance(series, pd.Series):
+        return pd.Series(rsi, index=series.index)
     return rsi
 
 def compute_indicators(df):
-    df["Return"] = df["Close"].pct_change()
-    df["MA10"] = df["Close"].rolling(window=10).mean()
-    df["MA20"] = df["Close"].rolling(window=20).mean()
-    df["RSI"] = compute_rsi(df["Close"], 14)
+    add_features(df, ["Return", "MA10", "MA20", "RSI"])
     df.dropna(inplace=True)
     return df
     
@@ -63,12 +54,7 @@ def compute_indicators(df):
 #import pandas as pd
 
 def run_backtest(df, model):
-    df = df.copy()
-    df["Return"] = df["Close"].pct_change()
-    df["MA10"] = df["Close"].rolling(10).mean()
-    df["MA20"] = df["Close"].rolling(20).mean()
-    df["RSI"] = compute_rsi(df["Close"].values, 14)
-    df.dropna(inplace=True)
+    df = compute_indicators(df.copy())
 
     features = ["MA10", "MA20", "RSI"]
     X = df[features]
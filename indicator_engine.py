@@ -0,0 +1,227 @@
+# indicator_engine.py
+# Streaming indicators: MA10/MA20/SMA14/RSI14/EMA12/EMA26/MACD/Signal updated in O(1) per bar or tick.
+# Matches the pandas formulas in helpers.compute_indicators and bot.compute_indicators_for_prediction.
+import math
+import threading
+
+WINDOW = 20          # longest rolling window (MA20)
+RSI_PERIOD = 14
+RESUM_EVERY = 1024   # ✅ Rebuild running sums periodically so float drift never accumulates
+NAN = float("nan")
+
+
+def _alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+A12, A26, A9 = _alpha(12), _alpha(26), _alpha(9)
+
+
+class IncrementalIndicators:
+    """Indicator state for one symbol. update() commits a bar, preview() evaluates a live tick."""
+
+    def __init__(self):
+        self.count = 0                       # committed bars
+        self.closes = [0.0] * WINDOW         # ring of the last WINDOW closes
+        self.gains = [0.0] * RSI_PERIOD      # ring of the last RSI_PERIOD up-moves
+        self.losses = [0.0] * RSI_PERIOD     # ring of the last RSI_PERIOD down-moves
+        self.sum10 = self.sum14 = self.sum20 = 0.0
+        self.gain_sum = self.loss_sum = 0.0
+        self.ema12 = self.ema26 = self.signal = NAN
+        self.prev_close = NAN
+
+    # --- helpers -------------------------------------------------------------------------
+    def _leaving(self, n):
+        """Close that drops out of an n-bar window when the next bar is added (0 if window not full)."""
+        return self.closes[(self.count - n) % WINDOW] if self.count >= n else 0.0
+
+    def _leaving_move(self):
+        k = self.count - 1 - RSI_PERIOD      # index of the diff that leaves the RSI window
+        if k < 0:
+            return 0.0, 0.0
+        i = k % RSI_PERIOD
+        return self.gains[i], self.losses[i]
+
+    def _evaluate(self, close):
+        """Returns (features, new_state) for `close` as the next bar without mutating self."""
+        n = self.count + 1
+        sum10 = self.sum10 + close - self._leaving(10)
+        sum14 = self.sum14 + close - self._leaving(14)
+        sum20 = self.sum20 + close - self._leaving(20)
+
+        gain_sum, loss_sum = self.gain_sum, self.loss_sum
+        gain = loss = 0.0
+        if self.count:
+            delta = close - self.prev_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            old_gain, old_loss = self._leaving_move()
+            gain_sum += gain - old_gain
+            loss_sum += loss - old_loss
+
+        if self.count:
+            ema12 = A12 * close + (1 - A12) * self.ema12
+            ema26 = A26 * close + (1 - A26) * self.ema26
+            macd = ema12 - ema26
+            signal = A9 * macd + (1 - A9) * self.signal
+        else:
+            ema12 = ema26 = close
+            macd = signal = 0.0
+
+        if n > RSI_PERIOD:
+            avg_gain, avg_loss = gain_sum / RSI_PERIOD, loss_sum / RSI_PERIOD
+            if avg_loss > 0:
+                rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+            else:
+                rsi = 100.0 if avg_gain > 0 else NAN
+        else:
+            rsi = NAN
+
+        features = {
+            "Close": close,
+            "Return": close / self.prev_close - 1 if self.count else NAN,
+            "MA10": sum10 / 10 if n >= 10 else NAN,
+            "MA20": sum20 / 20 if n >= 20 else NAN,
+            "SMA": sum14 / 14 if n >= 14 else NAN,
+            "RSI": rsi,
+            "EMA12": ema12,
+            "EMA26": ema26,
+            "MACD": macd,
+            "Signal": signal,
+        }
+        state = (sum10, sum14, sum20, gain_sum, loss_sum, gain, loss, ema12, ema26, signal)
+        return features, state
+
+    # --- public API ----------------------------------------------------------------------
+    def preview(self, close):
+        """Features if the in-progress bar closed at `close` — O(1), state untouched."""
+        return self._evaluate(float(close))[0]
+
+    def update(self, close):
+        """Commits a finished bar and returns its features."""
+        close = float(close)
+        features, state = self._evaluate(close)
+        (self.sum10, self.sum14, self.sum20, self.gain_sum, self.loss_sum,
+         gain, loss, self.ema12, self.ema26, self.signal) = state
+        if self.count:
+            i = (self.count - 1) % RSI_PERIOD
+            self.gains[i], self.losses[i] = gain, loss
+        self.closes[self.count % WINDOW] = close
+        self.prev_close = close
+        self.count += 1
+        if self.count % RESUM_EVERY == 0:
+            self._resum()
+        return features
+
+    def _resum(self):
+        last = [self.closes[(self.count - 1 - k) % WINDOW] for k in range(min(self.count, WINDOW))]
+        self.sum10, self.sum14, self.sum20 = sum(last[:10]), sum(last[:14]), sum(last[:20])
+        self.gain_sum, self.loss_sum = sum(self.gains), sum(self.losses)
+
+    def snapshot(self):
+        """Plain-dict copy of the state (JSON-serialisable)."""
+        return {k: (list(v) if isinstance(v, list) else v) for k, v in self.__dict__.items()}
+
+    @classmethod
+    def restore(cls, snapshot):
+        state = cls()
+        for k, v in snapshot.items():
+            setattr(state, k, list(v) if isinstance(v, list) else v)
+        return state
+
+
+class IndicatorEngine:
+    """Per-symbol incremental indicators fed by bars or live ticks."""
+
+    def __init__(self):
+        self._states = {}
+        self._current = {}   # symbol -> (bar_key, last price) of the in-progress bar
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def seed(self, symbol, closes):
+        """Warms a symbol up from historical closes (oldest first)."""
+        state = IncrementalIndicators()
+        features = None
+        for close in closes:
+            features = state.update(close)
+        with self._lock:
+            self._states[symbol] = state
+            self._current.pop(symbol, None)
+            self._latest[symbol] = features
+        return features
+
+    def on_bar(self, symbol, close):
+        """Commits one finished bar."""
+        with self._lock:
+            state = self._states.setdefault(symbol, IncrementalIndicators())
+            features = state.update(close)
+            self._latest[symbol] = features
+            return features
+
+    def on_price(self, symbol, bar_key, price):
+        """Live tick for the bar identified by bar_key (e.g. its start time). Commits the previous bar on rollover."""
+        with self._lock:
+            state = self._states.setdefault(symbol, IncrementalIndicators())
+            current = self._current.get(symbol)
+            if current is not None and bar_key < current[0]:
+                return self._latest.get(symbol)  # late tick for an already committed bar
+            if current is not None and current[0] != bar_key:
+                state.update(current[1])
+            self._current[symbol] = (bar_key, price)
+            features = state.preview(price)
+            self._latest[symbol] = features
+            return features
+
+    def latest(self, symbol):
+        """Most recent features for the symbol (including the live bar), or None."""
+        return self._latest.get(symbol)
+
+    def snapshot(self):
+        with self._lock:
+            return {symbol: {"state": state.snapshot(), "current": self._current.get(symbol)}
+                    for symbol, state in self._states.items()}
+
+    def restore(self, snapshot):
+        with self._lock:
+            self._states = {s: IncrementalIndicators.restore(v["state"]) for s, v in snapshot.items()}
+            self._current = {s: tuple(v["current"]) for s, v in snapshot.items() if v.get("current")}
+            self._latest = {}
+            for symbol, (_, price) in self._current.items():
+                self._latest[symbol] = self._states[symbol].preview(price)
+
+
+def verify_against_pandas(closes, tolerance=1e-8):
+    """Replays closes through the engine and returns {feature: max abs diff} vs the pandas pipelines."""
+    import pandas as pd
+
+    series = pd.Series(closes, dtype="float64")
+    delta = series.diff()
+    rs = delta.clip(lower=0).rolling(14).mean() / (-delta.clip(upper=0)).rolling(14).mean()
+    expected = pd.DataFrame({
+        "Return": series.pct_change(),
+        "MA10": series.rolling(10).mean(),
+        "MA20": series.rolling(20).mean(),
+        "SMA": series.rolling(14).mean(),
+        "RSI": 100 - (100 / (1 + rs)),   # helpers.compute_rsi
+        "MACD": series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean(),
+    })
+    expected["Signal"] = expected["MACD"].ewm(span=9, adjust=False).mean()
+
+    state = IncrementalIndicators()
+    actual = pd.DataFrame([state.update(c) for c in closes])
+    diffs = {}
+    for col in expected:
+        a, e = actual[col].to_numpy(), expected[col].to_numpy()
+        both = ~(pd.isna(a) | pd.isna(e))
+        if (pd.isna(a) != pd.isna(e)).any():
+            diffs[col] = math.inf
+        else:
+            diffs[col] = float(abs(a[both] - e[both]).max()) if both.any() else 0.0
+    bad = {k: v for k, v in diffs.items() if v > tolerance}
+    if bad:
+        print(f"❌ Incremental indicators diverge from pandas: {bad}")
+    return diffs
+
+
+# ✅ Process-wide engine fed by the websocket candle stream
+indicator_engine = IndicatorEngine()
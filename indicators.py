@@ -0,0 +1,138 @@
+# indicators.py
+# One vectorized indicator library for the whole project.
+# Every function takes a symbols x time panel (2-D, time on axis 1) or a single 1-D series and
+# works on all rows at once. Warm-up bars are NaN, matching pandas rolling(min_periods=window).
+import numpy as np
+import pandas as pd
+
+FEATURES = ["Return", "MA10", "MA20", "SMA", "RSI", "EMA12", "EMA26", "MACD", "Signal"]
+
+
+def as_panel(values, dtype=np.float64):
+    """Returns (2-D float array, was_1d)."""
+    panel = np.asarray(values, dtype=dtype)
+    if panel.ndim == 1:
+        return panel[np.newaxis, :], True
+    return panel, False
+
+
+def _out(panel, was_1d):
+    return panel[0] if was_1d else panel
+
+
+def right_aligned_panel(series_list, dtype=np.float64):
+    """Stacks ragged per-symbol series into one panel, right-aligned so column -1 is every symbol's latest bar."""
+    width = max((len(s) for s in series_list), default=0)
+    panel = np.full((len(series_list), width), np.nan, dtype=dtype)
+    for i, series in enumerate(series_list):
+        values = np.asarray(series, dtype=dtype)
+        if len(values):
+            panel[i, width - len(values):] = values
+    return panel
+
+
+def diff(values, dtype=np.float64):
+    panel, was_1d = as_panel(values, dtype)
+    out = np.full_like(panel, np.nan)
+    out[:, 1:] = panel[:, 1:] - panel[:, :-1]
+    return _out(out, was_1d)
+
+
+def pct_change(values, dtype=np.float64):
+    panel, was_1d = as_panel(values, dtype)
+    out = np.full_like(panel, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, 1:] = panel[:, 1:] / panel[:, :-1] - 1
+    return _out(out, was_1d)
+
+
+def rolling_mean(values, window, dtype=np.float64):
+    """Simple moving average; NaN unless the last `window` values are all present."""
+    panel, was_1d = as_panel(values, dtype)
+    valid = np.isfinite(panel)
+    # ✅ Accumulate in float64 even for float32 panels so long histories don't lose precision
+    sums = np.cumsum(np.where(valid, panel, 0.0), axis=1, dtype=np.float64)
+    counts = np.cumsum(valid, axis=1)
+    sums = np.concatenate([np.zeros((panel.shape[0], 1)), sums], axis=1)
+    counts = np.concatenate([np.zeros((panel.shape[0], 1), dtype=counts.dtype), counts], axis=1)
+    out = np.full(panel.shape, np.nan, dtype=dtype)
+    if panel.shape[1] >= window:
+        window_sum = sums[:, window:] - sums[:, :-window]
+        window_count = counts[:, window:] - counts[:, :-window]
+        out[:, window - 1:] = np.where(window_count == window, window_sum / window, np.nan)
+    return _out(out, was_1d)
+
+
+def ema(values, span, dtype=np.float64):
+    """Exponential moving average, pandas ewm(span, adjust=False). Leading NaNs stay NaN, interior NaNs carry the last value."""
+    panel, was_1d = as_panel(values, dtype)
+    alpha = 2.0 / (span + 1.0)
+    out = np.full(panel.shape, np.nan, dtype=dtype)
+    state = np.full(panel.shape[0], np.nan, dtype=np.float64)
+    for t in range(panel.shape[1]):
+        x = panel[:, t]
+        fresh = np.isnan(state)
+        state = np.where(np.isnan(x), state, np.where(fresh, x, alpha * x + (1 - alpha) * state))
+        out[:, t] = state
+    return _out(out, was_1d)
+
+
+def rsi(values, period=14, eps=0.0, dtype=np.float64):
+    """RSI from simple rolling means of gains/losses (helpers.compute_rsi). eps guards a zero loss average."""
+    panel, was_1d = as_panel(values, dtype)
+    delta = diff(panel, dtype)
+    gain = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+    loss = np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0))
+    avg_gain = rolling_mean(gain, period, dtype)
+    avg_loss = rolling_mean(loss, period, dtype)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100 - 100 / (1 + avg_gain / (avg_loss + eps))
+    return _out(out.astype(dtype, copy=False), was_1d)
+
+
+def macd(values, fast=12, slow=26, signal=9, dtype=np.float64):
+    """Returns (macd, signal) panels."""
+    panel, was_1d = as_panel(values, dtype)
+    line = ema(panel, fast, dtype) - ema(panel, slow, dtype)
+    return _out(line, was_1d), _out(ema(line, signal, dtype), was_1d)
+
+
+def compute_features(close, features=FEATURES, dtype=np.float64):
+    """Computes the requested feature panels for a close panel in one pass. Returns {name: panel}."""
+    panel, was_1d = as_panel(close, dtype)
+    out = {}
+    wanted = set(features)
+    if "Return" in wanted:
+        out["Return"] = pct_change(panel, dtype)
+    for name, window in (("MA10", 10), ("MA20", 20), ("SMA", 14)):
+        if name in wanted:
+            out[name] = rolling_mean(panel, window, dtype)
+    if "RSI" in wanted:
+        out["RSI"] = rsi(panel, 14, dtype=dtype)
+    if wanted & {"EMA12", "EMA26", "MACD", "Signal"}:
+        ema12, ema26 = ema(panel, 12, dtype), ema(panel, 26, dtype)
+        line = ema12 - ema26
+        out.update(EMA12=ema12, EMA26=ema26, MACD=line, Signal=ema(line, 9, dtype))
+    return {name: _out(out[name], was_1d) for name in features}
+
+
+def latest_feature_rows(features, names):
+    """Per symbol, the last time step where every named feature is finite (what df.dropna().iloc[-1] picks).
+
+    Returns (matrix symbols x len(names), has_row bool array).
+    """
+    stack = np.stack([np.atleast_2d(features[name]) for name in names], axis=-1)   # S x T x F
+    complete = np.isfinite(stack).all(axis=-1)
+    has_row = complete.any(axis=1)
+    last = stack.shape[1] - 1 - np.argmax(complete[:, ::-1], axis=1)
+    rows = stack[np.arange(stack.shape[0]), last]
+    rows[~has_row] = np.nan
+    return rows, has_row
+
+
+def add_features(df, features=FEATURES, column="Close"):
+    """pandas convenience: adds feature columns computed from df[column] (single symbol)."""
+    computed = compute_features(df[column].to_numpy(dtype=np.float64), features)
+    for name in features:
+        df[name] = pd.Series(computed[name], index=df.index)
+    return df
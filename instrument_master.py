@@ -0,0 +1,262 @@
+# instrument_master.py
+# In-memory instrument master: O(1) symbol <-> token lookups plus lot size, tick size and exchange.
+# Built once per day from the Angel One scrip master in a background thread and swapped in atomically; old
+# daily scrip master files are pruned from the cache. When the download fails, an older cached file (or
+# master.csv) is used, stamped with its own date, so the download is retried every REBUILD_RETRY_SECS.
+import os
+import json
+import time
+import threading
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import requests
+
+SCRIP_MASTER_URL = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
+CACHE_DIR = os.getenv("INSTRUMENTS_CACHE_DIR", "instruments_cache")
+MASTER_CSV = "master.csv"
+EXCHANGES = tuple(os.getenv("INSTRUMENT_EXCHANGES", "NSE,NFO").split(","))
+CACHE_KEEP_FILES = 2          # today's scrip master + the previous one as an offline fallback
+REBUILD_RETRY_SECS = 60
+EXCHANGE_CODES = {name: code for code, name in enumerate(("NSE", "NFO", "BSE", "BFO", "MCX", "CDS", "NCDEX"))}
+EXCHANGE_NAMES = {code: name for name, code in EXCHANGE_CODES.items()}
+
+
+def normalize_symbol(symbol):
+    """'RELIANCE.NS' / 'RELIANCE-EQ' / 'RELIANCE' -> 'RELIANCE'."""
+    symbol = str(symbol).strip().upper()
+    for suffix in (".NS", "-EQ"):
+        if symbol.endswith(suffix):
+            symbol = symbol[: -len(suffix)]
+    return symbol
+
+
+def _parse_expiry(value):
+    """'28NOV2024' -> date ordinal, 0 when empty."""
+    if not value:
+        return 0
+    try:
+        return datetime.strptime(value, "%d%b%Y").date().toordinal()
+    except ValueError:
+        return 0
+
+
+class InstrumentIndex:
+    """Immutable, array-backed snapshot of the scrip master. Row i describes one instrument."""
+
+    def __init__(self, records, built_on=None):
+        records = list(records)
+        n = len(records)
+        self.built_on = built_on or date.today()     # day of the scrip master the records came from
+        self.symbols = [r["symbol"] for r in records]
+        self.names = [r.get("name") or normalize_symbol(r["symbol"]) for r in records]
+        self.tokens = np.fromiter((int(r["token"]) for r in records), dtype=np.int64, count=n)
+        self.exchange_codes = np.fromiter((EXCHANGE_CODES.get(r.get("exch_seg", "NSE"), 255) for r in records),
+                                          dtype=np.uint8, count=n)
+        self.lot_sizes = np.fromiter((int(float(r.get("lotsize") or 1)) for r in records), dtype=np.int32, count=n)
+        # ✅ Scrip master quotes tick size in paise and option strikes x100
+        self.tick_sizes = np.fromiter((float(r.get("tick_size") or 5) / 100 for r in records), dtype=np.float32, count=n)
+        self.strikes = np.fromiter((float(r.get("strike") or -100) / 100 for r in records), dtype=np.float64, count=n)
+        self.expiries = np.fromiter((_parse_expiry(r.get("expiry")) for r in records), dtype=np.int32, count=n)
+        self.instrument_types = [r.get("instrumenttype") or "" for r in records]
+
+        # ✅ One flat dict per exchange (no tuple keys) keeps the full NSE+NFO master small
+        self._by_symbol = {}
+        self._by_token = {}
+        for row, r in enumerate(records):
+            exchange = r.get("exch_seg", "NSE")
+            by_symbol = self._by_symbol.setdefault(exchange, {})
+            self._by_token.setdefault(exchange, {})[int(r["token"])] = row
+            symbol = r["symbol"].upper()
+            by_symbol[symbol] = row
+            bare = normalize_symbol(symbol)
+            if bare != symbol and (bare not in by_symbol or symbol.endswith("-EQ")):
+                by_symbol[bare] = row
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def row(self, symbol, exchange="NSE"):
+        by_symbol = self._by_symbol.get(exchange, {})
+        key = str(symbol).strip().upper()
+        row = by_symbol.get(key)
+        if row is None:
+            row = by_symbol.get(normalize_symbol(key))
+        return row
+
+    def token(self, symbol, exchange="NSE"):
+        row = self.row(symbol, exchange)
+        return None if row is None else str(self.tokens[row])
+
+    def symbol(self, token, exchange="NSE"):
+        row = self._by_token.get(exchange, {}).get(int(token))
+        return None if row is None else self.symbols[row]
+
+    def trading_symbol(self, symbol, exchange="NSE"):
+        row = self.row(symbol, exchange)
+        return None if row is None else self.symbols[row]
+
+    def lot_size(self, symbol, exchange="NSE"):
+        row = self.row(symbol, exchange)
+        return None if row is None else int(self.lot_sizes[row])
+
+    def tick_size(self, symbol, exchange="NSE"):
+        row = self.row(symbol, exchange)
+        return None if row is None else round(float(self.tick_sizes[row]), 4)
+
+    def exchange(self, token):
+        for name in EXCHANGES:
+            if int(token) in self._by_token.get(name, {}):
+                return name
+        return None
+
+
+def _cache_path(day):
+    return os.path.join(CACHE_DIR, f"OpenAPIScripMaster_{day:%Y%m%d}.json")
+
+
+def _download_scrip_master(day):
+    """Downloads today's scrip master into the cache via tmp file + rename."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(day)
+    response = requests.get(SCRIP_MASTER_URL, timeout=60)
+    response.raise_for_status()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp, path)
+    return path
+
+
+def _cached_files():
+    try:
+        return sorted(f for f in os.listdir(CACHE_DIR) if f.startswith("OpenAPIScripMaster_") and f.endswith(".json"))
+    except FileNotFoundError:
+        return []
+
+
+def _latest_cached():
+    files = _cached_files()
+    return os.path.join(CACHE_DIR, files[-1]) if files else None
+
+
+def _file_day(path):
+    """Day of a cached scrip master from its file name (date.min if it can't be parsed)."""
+    try:
+        return datetime.strptime(os.path.basename(path)[len("OpenAPIScripMaster_"):-len(".json")], "%Y%m%d").date()
+    except ValueError:
+        return date.min
+
+
+def prune_cache(keep=CACHE_KEEP_FILES):
+    """Deletes all but the newest `keep` daily scrip master files."""
+    for name in _cached_files()[:-keep or None]:
+        try:
+            os.remove(os.path.join(CACHE_DIR, name))
+        except OSError as e:
+            print(f"⚠️ Could not delete old scrip master {name}: {e}")
+
+
+def _master_csv_records(path=MASTER_CSV):
+    df = pd.read_csv(path, dtype=str)
+    return [{"symbol": s.strip().upper(), "token": t.strip(), "exch_seg": "NSE"}
+            for s, t in zip(df["symbol"], df["token"]) if isinstance(s, str) and isinstance(t, str)]
+
+
+def _load(day, offline=False):
+    """(records, source_day): today's cache or a fresh download, else an older cache or master.csv
+    (master.csv has no day: date.min)."""
+    path = _cache_path(day)
+    if not os.path.exists(path) and not offline:
+        try:
+            path = _download_scrip_master(day)
+        except Exception as e:
+            print(f"⚠️ Scrip master download failed: {e}")
+    if not os.path.exists(path):
+        path = _latest_cached()
+    if path:
+        try:
+            with open(path, "r") as f:
+                records = json.load(f)
+            return [r for r in records if r.get("exch_seg") in EXCHANGES and r.get("token")], _file_day(path)
+        except Exception as e:
+            print(f"❌ Failed to read scrip master {path}: {e}")
+    print("⚠️ Using master.csv for instrument lookups.")
+    return _master_csv_records(), date.min
+
+
+def load_records(day=None, offline=False):
+    """Returns scrip master records for EXCHANGES: today's cache, a fresh download, an older cache, or master.csv."""
+    return _load(day or date.today(), offline)[0]
+
+
+_index = None
+_build_lock = threading.Lock()
+_rebuild_lock = threading.Lock()
+_rebuilding = False
+_rebuild_failed_at = 0.0
+
+
+def _build(day):
+    """Builds and swaps in the index for `day`. Returns it; built_on < day means only a fallback was available."""
+    global _index, _rebuild_failed_at
+    records, source_day = _load(day)
+    fresh = InstrumentIndex(records, built_on=source_day)
+    if _index is None or fresh.built_on >= _index.built_on:
+        _index = fresh  # ✅ Single reference assignment = atomic swap
+    print(f"✅ Instrument master loaded: {len(fresh)} instruments ({source_day if source_day > date.min else MASTER_CSV}).")
+    if fresh.built_on < day:
+        _rebuild_failed_at = time.monotonic()   # ✅ not today's download: retried from get_index
+    prune_cache()
+    return _index
+
+
+def _rebuild_in_background(day):
+    global _rebuilding, _rebuild_failed_at
+    try:
+        _build(day)
+    except Exception as e:
+        _rebuild_failed_at = time.monotonic()
+        print(f"❌ Instrument master rebuild failed, keeping {_index.built_on}: {e}")
+    finally:
+        _rebuilding = False
+
+
+def get_index():
+    """Returns the index. Only the very first build blocks: after a day change (or while only a fallback
+    is loaded) readers keep getting the current snapshot while one background thread downloads and builds
+    the new one, at most every REBUILD_RETRY_SECS after a failed download."""
+    global _rebuilding
+    index = _index
+    today = date.today()
+    if index is not None and index.built_on == today:
+        return index
+    if index is None:
+        with _build_lock:
+            return _index if _index is not None else _build(today)
+    with _rebuild_lock:
+        if not _rebuilding and time.monotonic() - _rebuild_failed_at >= REBUILD_RETRY_SECS:
+            _rebuilding = True
+            threading.Thread(target=_rebuild_in_background, args=(today,), name="instrument-master",
+                             daemon=True).start()
+    return index
+
+
+def get_token(symbol, exchange="NSE"):
+    return get_index().token(symbol, exchange)
+
+
+def get_symbol(token, exchange="NSE"):
+    return get_index().symbol(token, exchange)
+
+
+def get_trading_symbol(symbol, exchange="NSE"):
+    return get_index().trading_symbol(symbol, exchange)
+
+
+def get_lot_size(symbol, exchange="NSE"):
+    return get_index().lot_size(symbol, exchange)
+
+
+def get_tick_size(symbol, exchange="NSE"):
+    return get_index().tick_size(symbol, exchange)
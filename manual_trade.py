@@ -5,6 +5,7 @@ from datetime import datetime, time
 import pytz
 import math
 from utils import convert_to_ist
+from trade_journal import log_trade
 
 # ✅ Market hours check (IST)
 def is_market_open():
@@ -44,11 +45,9 @@ def manual_trade_ui(stock_list, take_profit=10, stop_loss=3, available_funds=0):
             if quantity > 0:
                 try:
                     place_order(selected_stock, "BUY", quantity)
-                    try:
-                        with open("trade_log.csv", "a") as log:
-                            log.write(f"{datetime.now()},{selected_stock},BUY,{quantity},{manual_price},manual,manual\n")
-                    except Exception as e:
-                        st.warning(f"⚠️ Failed to write log: {e}")
+                    if log_trade(selected_stock, "BUY", quantity, entry=manual_price, tp=manual_price + take_profit,
+                                 sl=manual_price - stop_loss, status="OPEN", strategy="manual", reason="manual") is None:
+                        st.warning("⚠️ Failed to write log")
 
                     send_telegram_alert(selected_stock, "BUY", manual_price, take_profit, stop_loss)
                     st.success(f"✅ BUY order placed: {selected_stock} at ₹{manual_price:.2f} × {quantity}")
@@ -63,11 +62,9 @@ def manual_trade_ui(stock_list, take_profit=10, stop_loss=3, available_funds=0):
         if st.button("✅ Execute Manual SELL"):
             try:
                 place_order(selected_stock, "SELL", sell_qty)
-                try:
-                    with open("trade_log.csv", "a") as log:
-                        log.write(f"{datetime.now()},{selected_stock},SELL,{sell_qty},{manual_price},manual,manual\n")
-                except Exception as e:
-                    st.warning(f"⚠️ Failed to write log: {e}")
+                if log_trade(selected_stock, "SELL", sell_qty, exit_price=manual_price, exit_time=datetime.now(),
+                             status="CLOSED", strategy="manual", reason="manual") is None:
+                    st.warning("⚠️ Failed to write log")
 
                 send_telegram_alert(selected_stock, "SELL", manual_price, take_profit, stop_loss)
                 st.success(f"✅ SELL order placed: {selected_stock} at ₹{manual_price:.2f} × {sell_qty}")
@@ -0,0 +1,275 @@
+# model_cache.py
+# Content-addressed model artifact cache: every model is stored once as model_cache/<sha256>.pkl.gz.
+# Startup loads from disk (no network, no base64); the Gist is only revalidated in the background with
+# a conditional GET (ETag / Last-Modified), so an unchanged model is never downloaded again.
+import os
+import io
+import re
+import json
+import gzip
+import time
+import base64
+import hashlib
+import threading
+import requests
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "model_cache")
+MODEL_OFFLINE = os.getenv("MODEL_OFFLINE", "0") == "1"                         # ✅ never touch the network
+MODEL_REVALIDATE_SECS = float(os.getenv("MODEL_REVALIDATE_SECS", "3600"))      # min gap between conditional GETs
+INDEX_FILE = "index.json"
+MODEL_RETRY_MIN = 5.0           # after a failed load, `if not model:` answers False without retrying for this long,
+MODEL_RETRY_MAX = 300.0         # doubling per consecutive failure up to this
+
+NIFTY25_MODEL_URL = "https://gist.githubusercontent.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/nifty25_model_b64.txt"
+NIFTY25_PKL_URL = "https://gist.githubusercontent.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/nifty25_model.pkl"
+
+# ✅ Copies shipped with a deployment that fill an empty cache without a download: url -> [(path, sha256)].
+# A seed is used only if its decoded bytes hash to the sha256 recorded for that URL, so a different model
+# can never stand in for the Gist one. The repo's model.b64 is not the nifty25 model (it is an 8-feature
+# RandomForest; bot.py feeds 4 features and strategies.py 3), so nothing is seeded by default.
+LOCAL_SEEDS = {}
+
+_BASE64_RE = re.compile(rb"^[A-Za-z0-9+/=\s]+$")
+_index_lock = threading.Lock()
+_load_lock = threading.Lock()
+_models = {}        # sha256 -> loaded model (shared by every proxy in the process)
+_current = {}       # url -> sha256 the process should be using
+_revalidating = set()
+
+
+# === Blob store ===
+def _blob_path(sha):
+    return os.path.join(MODEL_CACHE_DIR, f"{sha}.pkl.gz")
+
+
+def decode_payload(body):
+    """Gist bodies are base64 text; raw pickle bytes are accepted as well."""
+    body = body.strip()
+    if _BASE64_RE.match(body[:4096]):
+        return base64.b64decode(body)
+    return body
+
+
+def store_blob(raw):
+    """Stores raw model bytes under their sha256 (once) and returns the hash."""
+    sha = hashlib.sha256(raw).hexdigest()
+    path = _blob_path(sha)
+    if not os.path.exists(path):
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(raw, compresslevel=6))
+        os.replace(tmp, path)
+    return sha
+
+
+def read_blob(sha):
+    """Decompresses a cached model and verifies its hash. A corrupt file is removed."""
+    path = _blob_path(sha)
+    with open(path, "rb") as f:
+        raw = gzip.decompress(f.read())
+    if hashlib.sha256(raw).hexdigest() != sha:
+        os.remove(path)
+        raise ValueError(f"Model blob {sha[:12]} failed integrity check")
+    return raw
+
+
+def has_blob(sha):
+    return bool(sha) and os.path.exists(_blob_path(sha))
+
+
+# === Index (url -> sha256 + HTTP validators) ===
+def load_index():
+    try:
+        with open(os.path.join(MODEL_CACHE_DIR, INDEX_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_index(url, **fields):
+    with _index_lock:
+        index = load_index()
+        entry = index.setdefault(url, {})
+        entry.update(fields)
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        path = os.path.join(MODEL_CACHE_DIR, INDEX_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+        return entry
+
+
+# === Fetching ===
+def fetch(url, timeout=30):
+    """Conditional GET. Returns (sha256, changed); an unchanged model costs one 304 and no body."""
+    entry = load_index().get(url, {})
+    headers = {}
+    if has_blob(entry.get("sha256")):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        _update_index(url, checked_at=time.time())
+        return entry["sha256"], False
+    response.raise_for_status()
+    sha = store_blob(decode_payload(response.content))
+    _update_index(url, sha256=sha, etag=response.headers.get("ETag"),
+                  last_modified=response.headers.get("Last-Modified"), checked_at=time.time())
+    return sha, sha != entry.get("sha256")
+
+
+def seed_from_local(url, seeds=None):
+    """Fills the cache from a shipped copy (base64 text or raw pickle) whose hash matches the recorded one.
+    Returns the hash or None."""
+    for path, expected in seeds if seeds is not None else LOCAL_SEEDS.get(url, []):
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "rb") as f:
+                raw = decode_payload(f.read())
+            sha = hashlib.sha256(raw).hexdigest()
+            if sha != expected:
+                print(f"⚠️ Not seeding {url.rsplit('/', 1)[-1]} from {path}: hash {sha[:12]} is a different model")
+                continue
+            store_blob(raw)
+            # ✅ A verified seed counts as freshly checked: the cold start stays network-free for
+            # MODEL_REVALIDATE_SECS, then the first revalidation downloads once and only 304s follow
+            _update_index(url, sha256=sha, source=path, checked_at=time.time())
+            return sha
+        except Exception as e:
+            print(f"⚠️ Could not seed model cache from {path}: {e}")
+    return None
+
+
+def ensure(url):
+    """Hash of the cached model for url: disk first, then local seed, then the network."""
+    entry = load_index().get(url, {})
+    if has_blob(entry.get("sha256")):
+        return entry["sha256"]
+    sha = seed_from_local(url)
+    if sha:
+        return sha
+    if MODEL_OFFLINE:
+        raise RuntimeError(f"Model for {url} is not cached and MODEL_OFFLINE=1")
+    print("📥 Downloading AI model into the local cache...")
+    return fetch(url)[0]
+
+
+def revalidate(url):
+    """Conditional refresh; the next use of a LazyModel picks up a changed model."""
+    try:
+        sha, changed = fetch(url)
+        if changed:
+            _current[url] = sha
+            print(f"✅ New AI model {sha[:12]} cached; it will be used on next prediction.")
+    except Exception as e:
+        print(f"⚠️ Model revalidation failed (keeping cached copy): {e}")
+    finally:
+        _revalidating.discard(url)
+
+
+def _maybe_revalidate(url):
+    if MODEL_OFFLINE or url in _revalidating:
+        return
+    if time.time() - load_index().get(url, {}).get("checked_at", 0) < MODEL_REVALIDATE_SECS:
+        return
+    _revalidating.add(url)
+    threading.Thread(target=revalidate, args=(url,), daemon=True).start()
+
+
+# === Loading ===
+def _load_sha(sha):
+    model = _models.get(sha)
+    if model is None:
+        import joblib
+
+        model = joblib.load(io.BytesIO(read_blob(sha)))
+        _models[sha] = model
+    return model
+
+
+def load_model(url=NIFTY25_MODEL_URL):
+    """Loads the model for url from the cache (filling it if empty) and schedules a background revalidation."""
+    with _load_lock:
+        sha = _current.get(url)
+        if not has_blob(sha):
+            sha = ensure(url)
+            _current[url] = sha
+        model = _load_sha(sha)
+    _maybe_revalidate(url)
+    return model
+
+
+class LazyModel:
+    """Stand-in for a fitted model: nothing is read until the first attribute access.
+
+    bool(model) loads it and reports whether a model is available, so callers
+    can keep their `if not model:` guards. A failed load is remembered with exponential
+    backoff, so during a Gist outage the guards return False at once instead of re-fetching.
+    """
+
+    def __init__(self, url=NIFTY25_MODEL_URL):
+        self._url = url
+        self._sha = None
+        self._model = None
+        self._error = None
+        self._failure = None        # last load exception, re-raised until _retry_at
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def _get(self):
+        sha = _current.get(self._url)
+        if self._model is None or (sha and sha != self._sha):
+            if self._model is None and self._failure is not None and time.monotonic() < self._retry_at:
+                raise self._failure
+            try:
+                model = load_model(self._url)
+            except Exception as e:
+                self._failures += 1
+                self._failure = e
+                self._retry_at = time.monotonic() + min(MODEL_RETRY_MAX, MODEL_RETRY_MIN * 2 ** (self._failures - 1))
+                raise
+            self._model, self._failure, self._failures = model, None, 0
+            self._sha = _current.get(self._url)
+        return self._model
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._get(), name)
+
+    @property
+    def sha(self):
+        """Content hash of the model predictions should use (None before the first load)."""
+        return _current.get(self._url) or self._sha
+
+    def __bool__(self):
+        try:
+            self._get()
+            return True
+        except Exception as e:
+            if str(e) != self._error:
+                self._error = str(e)
+                print(f"❌ AI model unavailable: {e}")
+            return False
+
+    def __repr__(self):
+        state = self._sha[:12] if self._sha else "not loaded"
+        return f"LazyModel({self._url.rsplit('/', 1)[-1]}, {state})"
+
+
+def lazy_model(url=NIFTY25_MODEL_URL):
+    return LazyModel(url)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    sha = ensure(NIFTY25_MODEL_URL)
+    print(f"✅ {sha[:12]} ready in {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    read_blob(sha)
+    print(f"✅ Blob read + verified in {time.perf_counter() - start:.3f}s")
+    print(json.dumps(load_index(), indent=2))
@@ -0,0 +1,206 @@
+# ohlcv_store.py
+# Persistent local OHLCV store: one directory of .npy columns per (symbol, interval).
+# Requests only download the missing tail, reads slice memory-mapped arrays.
+import os
+import re
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.getenv("OHLCV_STORE_DIR", "data/ohlcv")
+OFFLINE = os.getenv("OHLCV_OFFLINE", "0") == "1"           # ✅ Never touch the network (tests / replays)
+MIN_REFRESH_SECONDS = int(os.getenv("OHLCV_MIN_REFRESH", "60"))  # ✅ At most one tail fetch per key per window
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+_PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+_locks = defaultdict(threading.Lock)
+stats = {"full_fetches": 0, "tail_fetches": 0, "cache_hits": 0}
+
+def period_to_timedelta(period):
+    """Converts a yfinance period string ('7d', '1mo', '6mo', '1y') to a timedelta."""
+    if period == "max":
+        return timedelta(days=365 * 30)
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    return timedelta(days=int(match.group(1)) * _PERIOD_DAYS[match.group(2)])
+
+def _key_dir(symbol, interval):
+    return os.path.join(STORE_DIR, interval, symbol.replace("/", "_").replace("^", "_"))
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _read(symbol, interval):
+    """Returns ({column: memmap}, meta) or (None, meta) if nothing usable is stored."""
+    path = _key_dir(symbol, interval)
+    meta = _read_meta(path)
+    try:
+        arrays = {"ts": np.load(os.path.join(path, "ts.npy"), mmap_mode="r")}
+        for col in COLUMNS:
+            arrays[col] = np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r")
+    except Exception:
+        return None, meta
+    if any(len(a) != len(arrays["ts"]) for a in arrays.values()):
+        print(f"⚠️ OHLCV store for {symbol} {interval} is inconsistent, refetching.")
+        return None, {}
+    return arrays, meta
+
+def _write(symbol, interval, arrays, meta):
+    path = _key_dir(symbol, interval)
+    os.makedirs(path, exist_ok=True)
+    for name, values in arrays.items():
+        tmp = os.path.join(path, f"{name}.tmp.npy")
+        np.save(tmp, values)
+        os.replace(tmp, os.path.join(path, f"{name}.npy"))
+    tmp = os.path.join(path, "meta.tmp.json")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, "meta.json"))
+
+def select_symbol(data, symbol):
+    """Picks one ticker out of a (possibly multi-ticker) yfinance frame, None if absent."""
+    if not isinstance(data.columns, pd.MultiIndex):
+        return data
+    for level in range(data.columns.nlevels):
+        if symbol in data.columns.get_level_values(level):
+            return data.xs(symbol, axis=1, level=level)
+    return None
+
+def _frame_to_arrays(df):
+    """Normalises a yfinance frame to {ts: int64 UTC ns, Open..Volume: float64} and its tz name."""
+    df = df.dropna(how="all")
+    index = pd.DatetimeIndex(df.index)
+    tz = str(index.tz) if index.tz is not None else None
+    if tz:
+        index = index.tz_convert("UTC").tz_localize(None)
+    arrays = {"ts": index.values.astype("datetime64[ns]").view(np.int64)}
+    for col in COLUMNS:
+        arrays[col] = df[col].to_numpy(dtype=np.float64) if col in df else np.full(len(df), np.nan)
+    return arrays, tz
+
+def _merge(old, new):
+    """Appends new bars, replacing any stored bars from the first new timestamp onwards."""
+    if old is None or len(old["ts"]) == 0:
+        return new
+    if len(new["ts"]) == 0:
+        return {k: np.asarray(v) for k, v in old.items()}
+    cut = int(np.searchsorted(old["ts"], new["ts"][0], side="left"))
+    return {k: np.concatenate([np.asarray(old[k][:cut]), new[k]]) for k in old}
+
+def _to_frame(arrays, start, tz):
+    """Builds a DataFrame from the memmapped columns from `start` (UTC ns) onwards."""
+    i = int(np.searchsorted(arrays["ts"], start, side="left"))
+    index = pd.to_datetime(np.asarray(arrays["ts"][i:]), utc=bool(tz))
+    if tz:
+        index = index.tz_convert(tz)
+    index.name = "Datetime" if tz else "Date"
+    return pd.DataFrame({col: np.asarray(arrays[col][i:]) for col in COLUMNS}, index=index)
+
+def _download(tickers, interval, period=None, start=None):
+    import yfinance as yf  # ✅ heavy import, only paid when the store actually has to fetch
+
+    return yf.download(tickers, period=period, start=start, interval=interval,
+                       auto_adjust=True, group_by="ticker", threads=True, progress=False)
+
+def _plan(symbol, interval, start_dt, now):
+    """Returns (arrays, meta, action) where action is None, 'full' or a tail start datetime."""
+    arrays, meta = _read(symbol, interval)
+    if OFFLINE:
+        return arrays, meta, None
+    covered_from = meta.get("covered_from")
+    if arrays is None or covered_from is None or covered_from > start_dt.timestamp() or len(arrays["ts"]) == 0:
+        return arrays, meta, "full"
+    if now.timestamp() - meta.get("last_fetch", 0) < MIN_REFRESH_SECONDS:
+        return arrays, meta, None
+    last = pd.Timestamp(int(arrays["ts"][-1]))
+    tail_start = last.normalize() if interval.endswith(("d", "wk", "mo")) else last
+    return arrays, meta, tail_start.to_pydatetime()
+
+def _store(symbol, interval, arrays, meta, frame, action, start_dt, now):
+    new, tz = _frame_to_arrays(frame)
+    if action == "full":
+        merged = new
+        meta["covered_from"] = start_dt.timestamp()
+    else:
+        merged = _merge(arrays, new)
+    meta["last_fetch"] = now.timestamp()
+    meta["tz"] = tz or meta.get("tz")
+    _write(symbol, interval, merged, meta)
+
+def _anchor(arrays, now):
+    # ✅ Offline reads are anchored on the last stored bar so replays don't drift with the clock
+    if OFFLINE and arrays is not None and len(arrays["ts"]):
+        return pd.Timestamp(int(arrays["ts"][-1])).to_pydatetime()
+    return now
+
+def get_history(symbol, period="1mo", interval="1d"):
+    """Drop-in for yf.download(symbol, period=..., interval=..., auto_adjust=True)."""
+    with _locks[(symbol, interval)]:
+        now = datetime.now(timezone.utc)
+        delta = period_to_timedelta(period)
+        arrays, meta, action = _plan(symbol, interval, now - delta, now)
+        if action is not None:
+            try:
+                if action == "full":
+                    stats["full_fetches"] += 1
+                    frame = _download(symbol, interval, period=period)
+                else:
+                    stats["tail_fetches"] += 1
+                    frame = _download(symbol, interval, start=action)
+                frame = select_symbol(frame, symbol) if frame is not None else None
+                if frame is not None and not frame.empty:
+                    _store(symbol, interval, arrays, meta, frame, action, now - delta, now)
+                    arrays, meta = _read(symbol, interval)
+            except Exception as e:
+                print(f"❌ OHLCV fetch error for {symbol} {interval}: {e}")
+        else:
+            stats["cache_hits"] += 1
+        if arrays is None:
+            return pd.DataFrame(columns=COLUMNS)
+        start = _anchor(arrays, now) - delta
+        return _to_frame(arrays, pd.Timestamp(start).value, meta.get("tz"))
+
+def get_history_many(symbols, period="1mo", interval="1d"):
+    """Bulk version of get_history: missing data is fetched in at most two multi-ticker calls."""
+    now = datetime.now(timezone.utc)
+    delta = period_to_timedelta(period)
+    plans = {symbol: _plan(symbol, interval, now - delta, now) for symbol in symbols}
+    full = [s for s, (_, _, action) in plans.items() if action == "full"]
+    tail = [s for s, (_, _, action) in plans.items() if action not in (None, "full")]
+
+    for group, kwargs in ((full, {"period": period}),
+                          (tail, {"start": min((plans[s][2] for s in tail), default=None)})):
+        if not group:
+            continue
+        try:
+            stats["full_fetches" if "period" in kwargs else "tail_fetches"] += 1
+            data = _download(group, interval, **kwargs)
+        except Exception as e:
+            print(f"❌ OHLCV bulk fetch error ({len(group)} symbols, {interval}): {e}")
+            continue
+        if data is None or data.empty:
+            continue
+        for symbol in group:
+            frame = select_symbol(data, symbol)
+            if frame is None or frame.dropna(how="all").empty:
+                continue
+            arrays, meta, action = plans[symbol]
+            with _locks[(symbol, interval)]:
+                _store(symbol, interval, arrays, meta, frame, action, now - delta, now)
+
+    frames = {}
+    for symbol in symbols:
+        arrays, meta = _read(symbol, interval)
+        if arrays is None:
+            continue
+        start = _anchor(arrays, now) - delta
+        frames[symbol] = _to_frame(arrays, pd.Timestamp(start).value, meta.get("tz"))
+    return frames
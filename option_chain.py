@@ -0,0 +1,161 @@
+# option_chain.py
+# Option-chain index: (underlying, expiry, strike, CE/PE) -> (symbol, token). Rebuilt whenever the
+# instrument master swaps in a new index (and at a day change, so expired contracts drop out).
+# Nearest-expiry, ATM and N-strikes-away lookups are dict/array indexing, no frame scans.
+import os
+import threading
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import instrument_master
+
+INSTRUMENTS_CSV = "instruments.csv"
+
+
+def _strike_key(strike):
+    return round(float(strike), 2)
+
+
+class OptionChainIndex:
+    """Per-underlying option chains for every live expiry, with derived strike steps."""
+
+    def __init__(self, rows, today=None, source_index=None):
+        self.built_on = today or date.today()
+        self.source_index = source_index    # instrument_master index the rows came from
+        today_ordinal = self.built_on.toordinal()
+        chains = {}
+        for underlying, expiry, strike, option_type, symbol, token in rows:
+            if expiry < today_ordinal or option_type not in ("CE", "PE"):
+                continue
+            chain = chains.setdefault((underlying, expiry), {"CE": {}, "PE": {}})
+            chain[option_type][_strike_key(strike)] = (symbol, str(token))
+
+        self._chains = {}
+        self._expiries = {}
+        for (underlying, expiry), chain in chains.items():
+            strikes = np.array(sorted(set(chain["CE"]) | set(chain["PE"])), dtype=np.float64)
+            chain["strikes"] = strikes
+            chain["position"] = {strike: i for i, strike in enumerate(strikes.tolist())}
+            self._chains[(underlying, expiry)] = chain
+            self._expiries.setdefault(underlying, []).append(expiry)
+
+        self._nearest = {}
+        self._steps = {}
+        for underlying, expiries in self._expiries.items():
+            expiries.sort()
+            self._nearest[underlying] = expiries[0]
+            self._steps[underlying] = self._derive_step(self._chains[(underlying, expiries[0])]["strikes"])
+
+    @staticmethod
+    def _derive_step(strikes):
+        """Most common gap between listed strikes (50 for NIFTY, 100 for BANKNIFTY, varies for stocks)."""
+        gaps = np.round(np.diff(strikes), 2)
+        gaps = gaps[gaps > 0]
+        if len(gaps) == 0:
+            return None
+        values, counts = np.unique(gaps, return_counts=True)
+        return float(values[np.argmax(counts)])
+
+    def underlyings(self):
+        return sorted(self._expiries)
+
+    def expiries(self, underlying):
+        return [date.fromordinal(e) for e in self._expiries.get(underlying, [])]
+
+    def nearest_expiry(self, underlying):
+        expiry = self._nearest.get(underlying)
+        return None if expiry is None else date.fromordinal(expiry)
+
+    def strike_step(self, underlying):
+        return self._steps.get(underlying)
+
+    def _chain(self, underlying, expiry):
+        if expiry is None:
+            expiry = self._nearest.get(underlying)
+        elif isinstance(expiry, date):
+            expiry = expiry.toordinal()
+        return expiry, self._chains.get((underlying, expiry))
+
+    def atm_strike(self, underlying, ltp, expiry=None):
+        """Listed strike closest to ltp for the given (default nearest) expiry."""
+        _, chain = self._chain(underlying, expiry)
+        if chain is None:
+            return None
+        step = self._steps.get(underlying)
+        if step:
+            strike = _strike_key(round(ltp / step) * step)
+            if strike in chain["position"]:
+                return strike
+        # ✅ Irregular strike grid: fall back to a binary search on the sorted strikes
+        strikes = chain["strikes"]
+        i = int(np.clip(np.searchsorted(strikes, ltp), 1, len(strikes) - 1)) if len(strikes) > 1 else 0
+        if i > 0 and abs(strikes[i - 1] - ltp) <= abs(strikes[i] - ltp):
+            i -= 1
+        return float(strikes[i])
+
+    def option(self, underlying, ltp, option_type="CE", strikes_away=0, expiry=None):
+        """Returns (symbol, token, strike, expiry) for the ATM strike shifted by strikes_away listed strikes."""
+        expiry, chain = self._chain(underlying, expiry)
+        atm = self.atm_strike(underlying, ltp, expiry)
+        if atm is None:
+            return None, None, None, None
+        position = chain["position"][atm] + strikes_away
+        if not 0 <= position < len(chain["strikes"]):
+            return None, None, None, None
+        strike = float(chain["strikes"][position])
+        hit = chain[option_type].get(strike)
+        if hit is None:
+            return None, None, None, None
+        return hit[0], hit[1], strike, date.fromordinal(expiry)
+
+
+def _rows_from_instrument_master(index):
+    for row in range(len(index)):
+        if index.instrument_types[row] not in ("OPTIDX", "OPTSTK") or index.expiries[row] <= 0:
+            continue
+        symbol = index.symbols[row]
+        yield (index.names[row], int(index.expiries[row]), float(index.strikes[row]),
+               symbol[-2:], symbol, int(index.tokens[row]))
+
+
+def _rows_from_frame(df):
+    df = df[df["segment"] == "NFO-OPT"]
+    expiries = pd.to_datetime(df["expiry"], errors="coerce")
+    for name, expiry, strike, symbol, token in zip(df["name"], expiries, df["strike"], df["symbol"], df["token"]):
+        if pd.isna(expiry):
+            continue
+        yield name, expiry.date().toordinal(), float(strike), str(symbol)[-2:], str(symbol), token
+
+
+def build_chain(today=None, index=None):
+    """Builds the chain from the daily scrip master, or instruments.csv when that is all we have."""
+    if index is None:
+        index = instrument_master.get_index()
+    rows = list(_rows_from_instrument_master(index))
+    if not rows and os.path.exists(INSTRUMENTS_CSV):
+        rows = list(_rows_from_frame(pd.read_csv(INSTRUMENTS_CSV)))
+    return OptionChainIndex(rows, today=today, source_index=index)
+
+
+_chain = None
+_chain_lock = threading.Lock()
+
+
+def _current(chain, index, today):
+    return chain is not None and chain.source_index is index and chain.built_on == today
+
+
+def get_chain():
+    """Option-chain index for the current instrument master, rebuilt when that index is replaced
+    (e.g. today's scrip master arriving after a stale one was served past midnight)."""
+    global _chain
+    index, today = instrument_master.get_index(), date.today()
+    chain = _chain
+    if _current(chain, index, today):
+        return chain
+    with _chain_lock:
+        if not _current(_chain, index, today):
+            _chain = build_chain(today, index)
+            print(f"✅ Option chain index built for {len(_chain.underlyings())} underlyings "
+                  f"(scrip master {index.built_on}).")
+        return _chain
@@ -0,0 +1,274 @@
+# order_pipeline.py
+# Asynchronous order submission: bounded queue -> token bucket (broker per-second order limit) -> worker
+# threads. Every order carries an idempotency key sent as Angel One's `ordertag`; before retrying a request
+# whose outcome is unknown (timeout, dropped connection) the order book is polled for that tag, so an order
+# that actually reached the exchange is never placed twice. If the order book itself can't be read, the
+# order fails as OrderStateUnknown instead of being re-sent. Completions are delivered through
+# concurrent.futures.Future and optional callbacks.
+import os
+import time
+import uuid
+import queue
+import threading
+import http.client
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+
+ORDER_RATE = float(os.getenv("ORDER_RATE", "10"))        # orders per second allowed by the broker
+ORDER_BURST = int(os.getenv("ORDER_BURST", "10"))
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", "4"))
+ORDER_QUEUE_SIZE = 256
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5                                        # seconds, doubled per attempt
+RETRYABLE = (TimeoutError, OSError, http.client.HTTPException)
+RETRYABLE_CODES = {"AB1004", "AB2000"}                     # broker-side "try again" errors
+ORDER_BOOK_LAG = float(os.getenv("ORDER_BOOK_LAG_SECS", "2"))   # how long a new order may be missing from the book
+LOOKUP_ATTEMPTS = 3                                        # failed order book reads before giving up
+LATENCY_SAMPLES = 10000
+
+
+class OrderStateUnknown(RuntimeError):
+    """The order may or may not be live: the order book could not confirm its tag. Reconcile before re-placing."""
+
+    def __init__(self, tag, error):
+        super().__init__(f"order state unknown for tag {tag}: {error}")
+        self.tag = tag
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `burst` saved up."""
+
+    def __init__(self, rate=ORDER_RATE, burst=ORDER_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until one token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def new_order_tag():
+    """Idempotency key; Angel One accepts up to 20 alphanumeric characters in ordertag."""
+    return uuid.uuid4().hex[:20]
+
+
+class OrderRequest:
+    __slots__ = ("symbol", "side", "qty", "tag", "kwargs", "future", "enqueued", "started")
+
+    def __init__(self, symbol, side, qty, tag, kwargs):
+        self.symbol = symbol
+        self.side = side
+        self.qty = qty
+        self.tag = tag
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+        self.started = None
+
+
+def _default_place(symbol, side, qty, ordertag=None, **kwargs):
+    from angel_api import place_order
+
+    return place_order(symbol, side, qty, ordertag=ordertag, **kwargs)
+
+
+def find_order_by_tag(tag, order_book_fn=None):
+    """Looks the idempotency key up in the order book; returns the order dict, or None if it is not there.
+
+    Raises RuntimeError when the order book can't be read ("not found" must mean the broker said so).
+    """
+    if order_book_fn is None:
+        from angel_api import get_order_book as order_book_fn
+    book = order_book_fn()
+    if not book or not book.get("status"):
+        raise RuntimeError(f"order book unavailable: {(book or {}).get('message', book)}")
+    for order in book.get("data") or []:
+        if order.get("ordertag") == tag:
+            return order
+    return None
+
+
+class OrderPipeline:
+    """Rate-limited concurrent order submitter with idempotent retries."""
+
+    def __init__(self, place_fn=_default_place, find_fn=find_order_by_tag, rate=ORDER_RATE, burst=ORDER_BURST,
+                 workers=ORDER_WORKERS, max_queue=ORDER_QUEUE_SIZE, max_attempts=MAX_ATTEMPTS,
+                 backoff=RETRY_BACKOFF, book_lag=ORDER_BOOK_LAG, lookup_attempts=LOOKUP_ATTEMPTS):
+        self.place_fn = place_fn          # place_fn(symbol, side, qty, ordertag=..., **kwargs) -> response dict
+        self.find_fn = find_fn            # find_fn(tag) -> order dict or None
+        self.bucket = TokenBucket(rate, burst)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.book_lag = book_lag
+        self.lookup_attempts = lookup_attempts
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._submit_ms = deque(maxlen=LATENCY_SAMPLES)    # worker pick-up -> broker ack (incl. retries)
+        self._total_ms = deque(maxlen=LATENCY_SAMPLES)     # submit() -> completion (incl. queue + rate limit)
+        self._counts = {"submitted": 0, "accepted": 0, "rejected": 0, "failed": 0, "retries": 0, "deduped": 0,
+                        "unknown": 0}
+        self._lock = threading.Lock()
+        self._workers = []
+        self._started = time.perf_counter()
+        for i in range(workers):
+            worker = threading.Thread(target=self._run, name=f"order-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    # --- public API ------------------------------------------------------------------------
+    def submit(self, symbol, side, qty, callback=None, tag=None, timeout=None, **kwargs):
+        """Queues an order and returns a Future resolving to the broker response.
+
+        Blocks (up to `timeout`) while the queue is full; raises queue.Full after that.
+        callback(response_or_exception) runs on the worker thread when the order completes.
+        """
+        request = OrderRequest(symbol, side, qty, tag or new_order_tag(), kwargs)
+        if callback is not None:
+            request.future.add_done_callback(
+                lambda f: callback(f.exception() if f.exception() is not None else f.result()))
+        self._queue.put(request, timeout=timeout)
+        self._count("submitted")
+        return request.future
+
+    def place_many(self, orders, timeout=None):
+        """Submits [(symbol, side, qty), ...] and waits; returns responses in the same order."""
+        futures = [self.submit(*order) for order in orders]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=timeout))
+            except Exception as e:
+                results.append({"status": False, "message": str(e)})
+        return results
+
+    def close(self, wait=True):
+        """Stops the workers after the queue drains."""
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    # --- workers ---------------------------------------------------------------------------
+    def _run(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            request.started = time.perf_counter()
+            if request.future.set_running_or_notify_cancel():
+                try:
+                    request.future.set_result(self._place(request))
+                except Exception as e:
+                    self._count("failed")
+                    request.future.set_exception(e)
+            done = time.perf_counter()
+            self._submit_ms.append((done - request.started) * 1000)
+            self._total_ms.append((done - request.enqueued) * 1000)
+
+    def _place(self, request):
+        error = None
+        sent = False        # a previous attempt may have reached the broker
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self._count("retries")
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            if sent:
+                # ✅ Never place the same tag twice: re-send only once the order book says it isn't there
+                existing = self._lookup(request.tag)
+                if existing is not None:
+                    return self._deduped(existing)
+            self.bucket.acquire()
+            try:
+                response = self.place_fn(request.symbol, request.side, request.qty,
+                                         ordertag=request.tag, **request.kwargs)
+            except RETRYABLE as e:
+                error, sent = e, True
+                continue
+            sent = False
+            if response and response.get("status"):
+                self._count("accepted")
+                return response
+            if response and response.get("errorcode") in RETRYABLE_CODES:
+                error = RuntimeError(response.get("message"))
+                continue
+            self._count("rejected")
+            return response
+        if sent:
+            # ✅ The last attempt may have been placed too: report it rather than a failure
+            existing = self._lookup(request.tag)
+            if existing is not None:
+                return self._deduped(existing)
+        raise error
+
+    def _deduped(self, existing):
+        self._count("deduped")
+        self._count("accepted")
+        return {"status": True, "message": "SUCCESS", "data": {"orderid": existing.get("orderid")},
+                "deduplicated": True}
+
+    def _lookup(self, tag):
+        """The order carrying `tag`, or None once the book has lacked it for `book_lag` seconds.
+
+        Raises OrderStateUnknown if the order book can't be read after `lookup_attempts` tries.
+        """
+        deadline = time.monotonic() + self.book_lag
+        failures = 0
+        while True:
+            try:
+                order = self.find_fn(tag)
+            except Exception as e:
+                failures += 1
+                print(f"⚠️ Order book lookup failed for tag {tag} ({failures}/{self.lookup_attempts}): {e}")
+                if failures >= self.lookup_attempts:
+                    self._count("unknown")
+                    raise OrderStateUnknown(tag, e)
+                time.sleep(self.backoff * 2 ** (failures - 1))
+                continue
+            if order is not None or time.monotonic() >= deadline:
+                return order
+            time.sleep(min(self.backoff, max(0.0, deadline - time.monotonic())))
+
+    # --- metrics ---------------------------------------------------------------------------
+    def stats(self):
+        """Counts, throughput (orders/s since start) and p50/p99 latencies in ms (submit = broker round trip)."""
+        with self._lock:
+            stats = dict(self._counts)
+        for name, samples in (("submit", self._submit_ms), ("total", self._total_ms)):
+            values = np.fromiter(samples, dtype=np.float64)
+            if len(values):
+                stats[f"{name}_p50_ms"] = float(np.percentile(values, 50))
+                stats[f"{name}_p99_ms"] = float(np.percentile(values, 99))
+        stats["throughput"] = (stats["accepted"] + stats["rejected"]) / max(time.perf_counter() - self._started, 1e-9)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """Process-wide pipeline against the live broker, started on first use."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = OrderPipeline()
+    return _pipeline
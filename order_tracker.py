@@ -0,0 +1,271 @@
+# order_tracker.py
+# Bulk order-state tracking: one getOrderBook + one getTradeBook request per poll covers every order.
+# Rows are parsed once into dicts indexed by orderid and symbol, a local state machine keeps only
+# forward transitions, and listeners receive just the changes (state events and new fills).
+# The poll interval is short while orders are live and backs off when everything is terminal. An order id
+# passed to track() that never shows up in the order book stops counting as live after ORDER_WATCH_TIMEOUT.
+import os
+import time
+import threading
+
+ORDER_POLL_FAST = float(os.getenv("ORDER_POLL_FAST", "1.0"))    # live orders (Angel: order book ~1 req/s)
+ORDER_POLL_SLOW = float(os.getenv("ORDER_POLL_SLOW", "15.0"))   # nothing in flight
+ORDER_POLL_MAX_BACKOFF = 60.0
+ORDER_WATCH_TIMEOUT = float(os.getenv("ORDER_WATCH_TIMEOUT", "120"))  # tracked id missing from the book
+
+PENDING, OPEN, PARTIAL, FILLED, CANCELLED, REJECTED = "PENDING", "OPEN", "PARTIAL", "FILLED", "CANCELLED", "REJECTED"
+TERMINAL = {FILLED, CANCELLED, REJECTED}
+_RANK = {PENDING: 0, OPEN: 1, PARTIAL: 2, FILLED: 3, CANCELLED: 3, REJECTED: 3}
+
+# Angel One `status` / `orderstatus` strings -> local states
+_STATUS_MAP = {
+    "complete": FILLED,
+    "cancelled": CANCELLED,
+    "rejected": REJECTED,
+    "open": OPEN,
+    "trigger pending": OPEN,
+    "modified": OPEN,
+    "open pending": PENDING,
+    "validation pending": PENDING,
+    "put order req received": PENDING,
+    "modify validation pending": OPEN,
+    "after market order req received": PENDING,
+}
+
+
+def _float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_state(row):
+    """Local state for one order book row."""
+    status = str(row.get("status") or row.get("orderstatus") or "").strip().lower()
+    state = _STATUS_MAP.get(status, PENDING)
+    if state == OPEN and _float(row.get("filledshares")) > 0:
+        state = PARTIAL
+    return state
+
+
+class OrderTracker:
+    """Indexed order / fill state refreshed from bulk order book and trade book polls."""
+
+    def __init__(self, order_book_fn=None, trade_book_fn=None, fast=ORDER_POLL_FAST, slow=ORDER_POLL_SLOW,
+                 watch_timeout=ORDER_WATCH_TIMEOUT):
+        if order_book_fn is None or trade_book_fn is None:
+            from angel_api import get_order_book, get_trade_book
+
+            order_book_fn = order_book_fn or get_order_book
+            trade_book_fn = trade_book_fn or get_trade_book
+        self.order_book_fn = order_book_fn
+        self.trade_book_fn = trade_book_fn
+        self.fast = fast
+        self.slow = slow
+        self.watch_timeout = watch_timeout
+        self._orders = {}          # orderid -> {"state", "symbol", "side", "qty", "filled", "avg_price", "tag", "raw"}
+        self._by_symbol = {}       # tradingsymbol -> set(orderid)
+        self._by_tag = {}          # ordertag -> orderid
+        self._fills = {}           # orderid -> {fillid: (size, price)}
+        self._watched = {}         # orderid -> monotonic deadline, until it first appears in the order book
+        self._listeners = []
+        self._fill_listeners = []
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {"polls": 0, "requests": 0, "events": 0, "fills": 0, "errors": 0,
+                       "expired": 0}
+
+    # --- listeners -------------------------------------------------------------------------
+    def add_listener(self, fn):
+        """fn(event) for every state change: {orderid, symbol, side, old, new, filled, avg_price, order}."""
+        self._listeners.append(fn)
+
+    def add_fill_listener(self, fn):
+        """fn(fill) for every new execution: {orderid, fillid, symbol, side, size, price, filled, avg_price}."""
+        self._fill_listeners.append(fn)
+
+    def _emit(self, listeners, items):
+        for item in items:
+            for fn in listeners:
+                try:
+                    fn(item)
+                except Exception as e:
+                    print(f"⚠️ Order tracker listener error: {e}")
+
+    # --- parsing / state machine -----------------------------------------------------------
+    def apply_order_book(self, rows):
+        """Merges order book rows; returns the list of state-change events."""
+        events = []
+        with self._cond:
+            for row in rows or []:
+                orderid = str(row.get("orderid") or "")
+                if not orderid:
+                    continue
+                new = parse_state(row)
+                filled = _float(row.get("filledshares"))
+                self._watched.pop(orderid, None)     # ✅ from now on its state decides whether it is live
+                record = self._orders.get(orderid)
+                if record is None:
+                    record = {"state": None, "symbol": row.get("tradingsymbol"), "side": row.get("transactiontype"),
+                              "qty": _float(row.get("quantity")), "filled": 0.0, "avg_price": 0.0,
+                              "tag": row.get("ordertag")}
+                    self._orders[orderid] = record
+                    self._by_symbol.setdefault(record["symbol"], set()).add(orderid)
+                    if record["tag"]:
+                        self._by_tag[record["tag"]] = orderid
+                old = record["state"]
+                record["raw"] = row
+                # ✅ Only forward transitions: a stale poll never moves a FILLED order back to OPEN
+                if old is not None and (_RANK[new] < _RANK[old] or (old in TERMINAL and new != old)):
+                    continue
+                if new == old and filled == record["filled"]:
+                    continue
+                record["state"] = new
+                record["filled"] = max(record["filled"], filled)
+                record["avg_price"] = _float(row.get("averageprice"), record["avg_price"])
+                events.append({"orderid": orderid, "symbol": record["symbol"], "side": record["side"],
+                               "old": old, "new": new, "filled": record["filled"],
+                               "avg_price": record["avg_price"], "order": row})
+            if events:
+                self._cond.notify_all()
+        self._stats["events"] += len(events)
+        return events
+
+    def apply_trade_book(self, rows):
+        """Merges trade book rows; returns only fills not seen before."""
+        fills = []
+        with self._cond:
+            for row in rows or []:
+                orderid = str(row.get("orderid") or "")
+                if not orderid:
+                    continue
+                fillid = str(row.get("fillid") or row.get("tradeid") or f"{orderid}:{row.get('filltime') or ''}")
+                seen = self._fills.setdefault(orderid, {})
+                if fillid in seen:
+                    continue
+                size = _float(row.get("fillsize") or row.get("filledshares") or row.get("quantity"))
+                price = _float(row.get("fillprice") or row.get("averageprice"))
+                seen[fillid] = (size, price)
+                total = sum(s for s, _ in seen.values())
+                avg = sum(s * p for s, p in seen.values()) / total if total else price
+                fills.append({"orderid": orderid, "fillid": fillid, "symbol": row.get("tradingsymbol"),
+                              "side": row.get("transactiontype"), "size": size, "price": price,
+                              "filled": total, "avg_price": avg})
+            if fills:
+                self._cond.notify_all()
+        self._stats["fills"] += len(fills)
+        return fills
+
+    # --- polling ---------------------------------------------------------------------------
+    def poll(self):
+        """One bulk refresh (order book + trade book). Emits and returns (events, fills)."""
+        self._stats["polls"] += 1
+        self._stats["requests"] += 2
+        events = self.apply_order_book((self.order_book_fn() or {}).get("data"))
+        fills = self.apply_trade_book((self.trade_book_fn() or {}).get("data"))
+        self._emit(self._listeners, events)
+        self._emit(self._fill_listeners, fills)
+        return events, fills
+
+    def _expire_watched(self):
+        """Drops tracked ids the order book still doesn't list after watch_timeout (unknown to the broker)."""
+        now = time.monotonic()
+        with self._cond:
+            expired = [o for o, deadline in self._watched.items() if now >= deadline]
+            for orderid in expired:
+                del self._watched[orderid]
+        for orderid in expired:
+            self._stats["expired"] += 1
+            print(f"⚠️ Order {orderid} never appeared in the order book; no longer tracked")
+
+    def _live(self):
+        self._expire_watched()
+        return bool(self._watched) or any(r["state"] not in TERMINAL for r in self._orders.values())
+
+    def _run(self):
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                errors = 0
+            except Exception as e:
+                errors += 1
+                self._stats["errors"] += 1
+                print(f"❌ Order tracker poll failed: {e}")
+            interval = self.fast if self._live() else self.slow
+            if errors:
+                interval = min(ORDER_POLL_MAX_BACKOFF, interval * 2 ** errors)
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="order-tracker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def track(self, orderid):
+        """Marks an order as in flight: switches to fast polling (until it is terminal, or for at most
+        watch_timeout if the order book never lists it) and triggers a poll now."""
+        if orderid:
+            orderid = str(orderid)
+            with self._cond:
+                if orderid not in self._orders:
+                    self._watched.setdefault(orderid, time.monotonic() + self.watch_timeout)
+            self.start()
+            self._wake.set()
+
+    # --- queries (no requests) -------------------------------------------------------------
+    def status(self, orderid):
+        record = self._orders.get(str(orderid))
+        return None if record is None else dict(record)
+
+    def order_for_tag(self, tag):
+        orderid = self._by_tag.get(tag)
+        return None if orderid is None else self.status(orderid)
+
+    def orders_for(self, symbol):
+        return [self.status(o) | {"orderid": o} for o in sorted(self._by_symbol.get(symbol, ()))]
+
+    def open_orders(self):
+        return {o: dict(r) for o, r in self._orders.items() if r["state"] not in TERMINAL}
+
+    def wait_for(self, orderid, states=TERMINAL, timeout=None):
+        """Blocks until the order reaches one of `states` (or timeout); returns its record or None."""
+        orderid = str(orderid)
+        self.track(orderid)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                record = self._orders.get(orderid)
+                if record is not None and record["state"] in states:
+                    return dict(record)
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def stats(self):
+        return dict(self._stats, orders=len(self._orders), live=len(self.open_orders()))
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker():
+    """Process-wide tracker against the live broker (its poll thread starts on first track())."""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = OrderTracker()
+    return _tracker
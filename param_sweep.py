@@ -0,0 +1,117 @@
+# param_sweep.py
+# Parallel grid search over the live exit settings (TAKE_PROFIT / STOP_LOSS / TRAIL_BUFFER / MAX_HOLD_DAYS).
+# The price and signal panels are placed in shared memory once; every worker process maps the same
+# read-only buffers instead of receiving its own pickled copy.
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from portfolio_backtest import run_portfolio_backtest, forward_filled
+
+DEFAULT_GRID = {
+    "take_profit": [5, 10, 15, 20, 30],
+    "stop_loss": [2, 3, 5, 8],
+    "trail_buffer": [None, 1, 1.5, 2, 2.5, 3],
+    "max_hold_days": [1, 3, 5, 10],
+}
+RANK_COLUMNS = ["sharpe", "max_drawdown", "hit_rate"]
+
+
+class SharedPanels:
+    """Copies named arrays into shared memory blocks; use as a context manager to unlink them."""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.spec = {}
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+            self.blocks.append(block)
+            self.spec[name] = (block.name, values.shape, values.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+_panels = {}
+_blocks = []
+
+
+def _attach(spec):
+    """Worker initializer: maps the shared panels read-only (no copy)."""
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        _blocks.append(block)
+        _panels[name] = array
+
+
+def _run_chunk(combos, fixed):
+    rows = []
+    for params in combos:
+        try:
+            result = run_portfolio_backtest(_panels["close"], _panels["buy"], _panels["sell"],
+                                            marks=_panels["marks"], **fixed, **params)
+            rows.append({**params, **result["stats"]})
+        except Exception as e:
+            rows.append({**params, "error": str(e)})
+    return rows
+
+
+def grid_combinations(grid=DEFAULT_GRID):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def run_sweep(close, buy, sell=None, grid=DEFAULT_GRID, workers=None, chunk_size=8, **fixed):
+    """Evaluates every grid combination across a process pool, returns a table ranked by Sharpe."""
+    close = np.asarray(close, dtype=np.float64)
+    buy = np.asarray(buy, dtype=bool)
+    sell = np.zeros_like(buy) if sell is None else np.asarray(sell, dtype=bool)
+    combos = grid_combinations(grid)
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    rows = []
+    with SharedPanels({"close": close, "buy": buy, "sell": sell, "marks": forward_filled(close)}) as shared:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(shared.spec,)) as pool:
+            for chunk_rows in pool.map(_run_chunk, chunks, itertools.repeat(fixed)):
+                rows.extend(chunk_rows)
+
+    table = pd.DataFrame(rows)
+    if table.empty or "sharpe" not in table:
+        return table
+    # ✅ Best Sharpe first; ties broken by shallower drawdown, then hit rate
+    return table.sort_values(RANK_COLUMNS, ascending=[False, False, False]).reset_index(drop=True)
+
+
+def sweep_universe(model, symbols, period="3y", grid=DEFAULT_GRID, workers=None, **fixed):
+    """Nightly entry point: load the universe, score it once, sweep the grid."""
+    from portfolio_backtest import load_close_panel, model_signal_panel
+
+    close, _, _ = load_close_panel(symbols, period)
+    buy, sell = model_signal_panel(model, close)
+    return run_sweep(close, buy, sell, grid=grid, workers=workers, **fixed)
+
+
+if __name__ == "__main__":
+    import joblib
+    from time import perf_counter
+
+    df_stocks = pd.read_csv("nifty500list.csv")
+    universe = [f"{s.strip()}.NS" for s in df_stocks["Symbol"] if isinstance(s, str)]
+    start = perf_counter()
+    ranked = sweep_universe(joblib.load("ai_model/advanced_model.pkl"), universe)
+    os.makedirs("reports", exist_ok=True)
+    ranked.to_csv("reports/param_sweep.csv", index=False)
+    print(ranked.head(20).to_string())
+    print(f"✅ {len(ranked)} combinations in {perf_counter() - start:.1f}s → reports/param_sweep.csv")
@@ -0,0 +1,152 @@
+# portfolio_backtest.py
+# Portfolio-level backtester over the whole universe that replays the live rules:
+#   entries  — bot.trade_logic: BUY signals in universe order, first TOP_N that cash can afford,
+#              each sized as int(cash // price), symbols already held are skipped
+#   exits    — bot.monitor_holdings: TAKE_PROFIT / STOP_LOSS (₹ per share), SELL signal, MAX_HOLD_DAYS
+#              plus the trailing rule of strategies.should_exit_trade (in profit and price < peak - buffer)
+# Each bar is one vectorized step across all symbols; only the <= TOP_N entries are sized one by one.
+import numpy as np
+import pandas as pd
+from indicators import compute_features
+
+EXIT_REASONS = {1: "TP", 2: "SL", 3: "TRAIL", 4: "SIGNAL", 5: "MAX_HOLD", 6: "END"}
+PREDICTION_FEATURES = ["SMA", "RSI", "MACD", "Signal"]   # bot.predict_signal inputs
+
+
+def load_close_panel(symbols, period="3y", interval="1d"):
+    """Date-aligned close panel (symbols x dates) from the OHLCV store; NaN where a symbol has no bar."""
+    from ohlcv_store import get_history_many
+
+    frames = get_history_many(list(symbols), period=period, interval=interval)
+    closes = pd.DataFrame({s: frames[s]["Close"] for s in symbols if s in frames and not frames[s].empty})
+    closes = closes.sort_index()
+    return closes.to_numpy(dtype=np.float64).T, list(closes.columns), closes.index
+
+
+def model_signal_panel(model, close, features=PREDICTION_FEATURES):
+    """Scores every (symbol, bar) with one model.predict call. Returns (buy, sell) bool panels."""
+    computed = compute_features(close, features)
+    stack = np.stack([computed[name] for name in features], axis=-1).reshape(-1, len(features))
+    complete = np.isfinite(stack).all(axis=1)
+    preds = np.zeros(len(stack), dtype=bool)
+    if complete.any():
+        X = pd.DataFrame(stack[complete], columns=features)
+        preds[complete] = np.asarray(model.predict(X)) == 1
+    buy = preds.reshape(close.shape)
+    sell = (~preds & complete).reshape(close.shape)
+    return buy, sell
+
+
+def forward_filled(close):
+    """Close panel with gaps filled by each symbol's last known price."""
+    return pd.DataFrame(np.asarray(close, dtype=np.float64).T).ffill().to_numpy().T
+
+
+def run_portfolio_backtest(close, buy, sell=None, take_profit=10.0, stop_loss=3.0, trail_buffer=2.0,
+                           max_hold_days=5, top_n=5, initial_cash=100000.0, max_positions=None,
+                           symbols=None, dates=None, marks=None):
+    """Simulates the live entry/exit rules over a symbols x time close panel.
+
+    buy / sell are bool panels of the same shape (sell=None disables signal exits,
+    trail_buffer=None disables the trailing stop). marks can pass a precomputed
+    forward_filled(close) when running many simulations. Returns a dict with the
+    equity curve, a trades DataFrame and summary stats.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n_symbols, n_bars = close.shape
+    buy = np.asarray(buy, dtype=bool)
+    sell = np.zeros_like(buy) if sell is None else np.asarray(sell, dtype=bool)
+    valid = np.isfinite(close)
+    # ✅ Mark-to-market on the last known price when a held symbol has no bar
+    marks = forward_filled(close) if marks is None else marks
+
+    qty = np.zeros(n_symbols, dtype=np.int64)
+    entry = np.zeros(n_symbols)
+    peak = np.zeros(n_symbols)
+    entry_bar = np.zeros(n_symbols, dtype=np.int64)
+    cash = float(initial_cash)
+    equity = np.empty(n_bars)
+    trades = []
+
+    def close_positions(mask, prices, bar, reasons):
+        nonlocal cash
+        for i in np.flatnonzero(mask):
+            cash += qty[i] * prices[i]
+            trades.append((i, entry_bar[i], bar, entry[i], prices[i], int(qty[i]),
+                           (prices[i] - entry[i]) * qty[i], EXIT_REASONS[int(reasons[i])]))
+        qty[mask] = 0
+
+    for t in range(n_bars):
+        price = close[:, t]
+        held = (qty > 0) & valid[:, t]
+
+        # --- exits (monitor_holdings), one vectorized pass over every open position ---
+        if held.any():
+            peak = np.where(held, np.maximum(peak, price), peak)
+            pnl = price - entry
+            reason = np.zeros(n_symbols, dtype=np.int8)
+            reason[held & (pnl >= take_profit)] = 1
+            reason[(reason == 0) & held & (pnl <= -stop_loss)] = 2
+            if trail_buffer is not None:
+                reason[(reason == 0) & held & (pnl > 0) & (price < peak - trail_buffer)] = 3
+            reason[(reason == 0) & held & sell[:, t]] = 4
+            reason[(reason == 0) & held & (t - entry_bar >= max_hold_days)] = 5
+            close_positions(reason > 0, price, t, reason)
+
+        # --- entries (trade_logic): first top_n affordable BUYs in universe order ---
+        candidates = np.flatnonzero(buy[:, t] & valid[:, t] & (price <= cash))[:top_n]
+        for i in candidates:
+            if qty[i] > 0:
+                continue
+            if max_positions is not None and np.count_nonzero(qty) >= max_positions:
+                break
+            n = int(cash // price[i])
+            if n < 1:
+                continue
+            qty[i], entry[i], peak[i], entry_bar[i] = n, price[i], price[i], t
+            cash -= n * price[i]
+
+        equity[t] = cash + np.nansum(qty * marks[:, t])
+
+    if n_bars:
+        final = np.where(qty > 0, marks[:, -1], 0.0)
+        close_positions(qty > 0, final, n_bars - 1, np.full(n_symbols, 6))
+
+    names = symbols if symbols is not None else list(range(n_symbols))
+    index = dates if dates is not None else np.arange(n_bars)
+    trades_df = pd.DataFrame(trades, columns=["symbol", "entry_bar", "exit_bar", "entry", "exit", "qty", "pnl", "reason"])
+    if len(trades_df):
+        trades_df["symbol"] = [names[i] for i in trades_df["symbol"]]
+        trades_df["entry_time"] = [index[i] for i in trades_df["entry_bar"]]
+        trades_df["exit_time"] = [index[i] for i in trades_df["exit_bar"]]
+
+    return {
+        "equity": pd.Series(equity, index=index, name="Equity"),
+        "trades": trades_df,
+        "stats": summarize(equity, trades_df, initial_cash),
+    }
+
+
+def summarize(equity, trades, initial_cash):
+    """Total return, annualised Sharpe (daily bars), max drawdown and hit rate."""
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) == 0:
+        return {"total_return": 0.0, "sharpe": 0.0, "max_drawdown": 0.0, "hit_rate": 0.0, "trades": 0}
+    curve = np.concatenate([[initial_cash], equity])
+    returns = curve[1:] / curve[:-1] - 1
+    std = returns.std()
+    running_max = np.maximum.accumulate(curve)
+    return {
+        "total_return": float(curve[-1] / initial_cash - 1),
+        "sharpe": float(returns.mean() / std * np.sqrt(252)) if std > 0 else 0.0,
+        "max_drawdown": float((curve / running_max - 1).min()),
+        "hit_rate": float((trades["pnl"] > 0).mean()) if len(trades) else 0.0,
+        "trades": int(len(trades)),
+    }
+
+
+def backtest_universe(model, symbols, period="3y", **params):
+    """End-to-end: load closes, score with the model, simulate the live rules."""
+    close, names, dates = load_close_panel(symbols, period)
+    buy, sell = model_signal_panel(model, close)
+    return run_portfolio_backtest(close, buy, sell, symbols=names, dates=dates, **params)
@@ -0,0 +1,110 @@
+# price_service.py
+# Single source of live prices: batched REST quotes + websocket ticks behind a TTL snapshot.
+import os
+import time
+import threading
+from instrument_master import normalize_symbol, get_token
+
+PRICE_TTL = float(os.getenv("PRICE_TTL", "2.0"))   # ✅ Seconds a snapshot price stays usable
+QUOTE_BATCH_SIZE = 50                                # ✅ Angel One quote API limit per request
+
+
+def _default_quote_fn(exchange_tokens):
+    from angel_api import get_quotes
+    return get_quotes(exchange_tokens)
+
+
+class PriceService:
+    """Per-symbol price snapshot refreshed by batched quotes and websocket ticks."""
+
+    def __init__(self, quote_fn=None, token_lookup=None, ttl=PRICE_TTL, batch_size=QUOTE_BATCH_SIZE,
+                 exchange="NSE"):
+        self.quote_fn = quote_fn or _default_quote_fn
+        self.token_lookup = token_lookup or (lambda symbol: get_token(symbol, exchange))
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.exchange = exchange
+        self._snapshot = {}           # symbol -> (price, updated_at, source)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "ticks": 0}
+
+    def _store(self, symbol, price, updated_at, source):
+        with self._lock:
+            current = self._snapshot.get(symbol)
+            # ✅ Never let an older quote overwrite a fresher websocket tick (or vice versa)
+            if current is None or updated_at >= current[1]:
+                self._snapshot[symbol] = (price, updated_at, source)
+
+    def on_tick(self, symbol, ltp, updated_at=None):
+        """Websocket feed hook: records the latest traded price for a symbol."""
+        self.stats["ticks"] += 1
+        self._store(normalize_symbol(symbol), float(ltp), updated_at or time.time(), "ws")
+
+    def snapshot(self):
+        """Returns {symbol: (price, updated_at, source)} without touching the network."""
+        with self._lock:
+            return dict(self._snapshot)
+
+    def peek(self, symbol):
+        """(price, updated_at, source) for one symbol from the snapshot, or None. Never fetches."""
+        return self._snapshot.get(normalize_symbol(symbol))
+
+    def _fresh(self, symbol, max_age, now):
+        entry = self._snapshot.get(symbol)
+        if entry and now - entry[1] <= max_age:
+            return entry[0]
+        return None
+
+    def _fetch(self, symbols):
+        by_token = {}
+        for symbol in symbols:
+            token = self.token_lookup(symbol)
+            if token:
+                by_token[str(token)] = symbol
+            else:
+                print(f"⚠️ No symbol token for {symbol}, cannot quote it.")
+        tokens = list(by_token)
+        for i in range(0, len(tokens), self.batch_size):
+            batch = tokens[i:i + self.batch_size]
+            self.stats["requests"] += 1
+            try:
+                response = self.quote_fn({self.exchange: batch})
+                fetched = (response.get("data") or {}).get("fetched") or []
+            except Exception as e:
+                print(f"❌ Quote batch failed ({len(batch)} tokens): {e}")
+                continue
+            now = time.time()
+            for quote in fetched:
+                symbol = by_token.get(str(quote.get("symbolToken")))
+                if symbol and quote.get("ltp") is not None:
+                    self._store(symbol, float(quote["ltp"]), now, "rest")
+
+    def get_prices(self, symbols, max_age=None):
+        """Returns {symbol: price} for every symbol it could price, fetching stale ones in batches."""
+        max_age = self.ttl if max_age is None else max_age
+        keys = {symbol: normalize_symbol(symbol) for symbol in symbols}
+        now = time.time()
+        with self._lock:
+            stale = sorted({key for key in keys.values() if self._fresh(key, max_age, now) is None})
+        self.stats["hits"] += len(set(keys.values())) - len(stale)
+        self.stats["misses"] += len(stale)
+        if stale:
+            self._fetch(stale)
+        snap = self.snapshot()
+        return {symbol: snap[key][0] for symbol, key in keys.items()
+                if key in snap and snap[key][1] >= now - max_age}
+
+    def get_price(self, symbol, max_age=None):
+        return self.get_prices([symbol], max_age).get(symbol)
+
+
+# ✅ Process-wide instance shared by bot, executor, websocket feed and dashboards
+price_service = PriceService()
+
+
+def get_live_prices(symbols, max_age=None):
+    return price_service.get_prices(symbols, max_age)
+
+
+def get_live_price(symbol, max_age=None):
+    return price_service.get_price(symbol, max_age)
@@ -0,0 +1,101 @@
+# runtime.py
+# Lazy runtime container: credentials, broker client, funds, model and instrument data are created on
+# first use instead of at import, so `import scheduler` or opening a dashboard costs no network round trips.
+import threading
+
+
+class Runtime:
+    """Named resources built once by their factory on first access (thread-safe, one build per name)."""
+
+    def __init__(self):
+        self._factories = {}
+        self._values = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, cache=True):
+        """cache=False resources are looked up through the factory every time (it caches on its own)."""
+        with self._lock:
+            self._factories[name] = (factory, cache)
+            self._locks.setdefault(name, threading.Lock())
+            self._values.pop(name, None)
+
+    def get(self, name):
+        if name in self._values:
+            return self._values[name]
+        try:
+            factory, cache = self._factories[name]
+        except KeyError:
+            raise AttributeError(f"Unknown runtime resource: {name}") from None
+        if not cache:
+            return factory()
+        with self._locks[name]:
+            if name not in self._values:
+                self._values[name] = factory()
+            return self._values[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get(name)
+
+    def reset(self, name=None):
+        """Drops a cached resource (or all) so the next access rebuilds it."""
+        with self._lock:
+            if name is None:
+                self._values.clear()
+            else:
+                self._values.pop(name, None)
+
+    def loaded(self):
+        return sorted(self._values)
+
+
+# === Factories (imports are deferred so this module stays cheap to import) ===
+def _tokens():
+    from credentials import credentials
+
+    return credentials.tokens()
+
+
+def _broker():
+    import angel_api
+
+    return angel_api.client
+
+
+def _available_funds():
+    from funds import get_available_funds
+
+    funds_data = get_available_funds()
+    if funds_data and funds_data.get("status"):
+        return float(funds_data["data"].get("availablecash", 0))
+    print(f"❌ Failed to fetch funds: {(funds_data or {}).get('error', 'Unknown error')}")
+    return 0.0
+
+
+def _model():
+    import model_cache
+
+    return model_cache.load_model(model_cache.NIFTY25_MODEL_URL)
+
+
+def _instruments():
+    import instrument_master
+
+    return instrument_master.get_index()
+
+
+def _option_chain():
+    import option_chain
+
+    return option_chain.get_chain()
+
+
+runtime = Runtime()
+runtime.register("tokens", _tokens, cache=False)              # expiry handled by credentials
+runtime.register("broker", _broker)
+runtime.register("available_funds", _available_funds)
+runtime.register("model", _model)
+runtime.register("instruments", _instruments, cache=False)    # rebuilt daily by instrument_master
+runtime.register("option_chain", _option_chain, cache=False)  # rebuilt daily by option_chain
@@ -20,8 +20,22 @@ def get_market_status():
     """Returns current market status for use in UI."""
     return "🟢 OPEN" if is_market_open() else "🔴 CLOSED"
 
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
 def schedule_daily_trade():
-    """Starts background scheduler for AI trade logic + trailing/exit logic."""
+    """Starts background scheduler for AI trade logic + trailing/exit logic (once per process).
+
+    Dashboards call this on every Streamlit rerun; later calls return the running scheduler.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            return _scheduler
+        _scheduler = _start_scheduler()
+        return _scheduler
+
+def _start_scheduler():
     scheduler = BackgroundScheduler(timezone=INDIA_TZ)
 
     def run_trade():
@@ -43,7 +57,7 @@ def schedule_daily_trade():
     # ✅ Schedule trade logic daily at 9:15 AM IST
     scheduler.add_job(run_trade, trigger="cron", hour=9, minute=15)
 
-    # 🔁 Schedule exit check every 10 minutes
+    # 🔁 Backstop exit check every 10 minutes (TP/SL/trailing/max-hold already fire per tick in exit_engine)
     scheduler.add_job(run_exit_check, trigger="interval", minutes=10)
 
     # 📩 Schedule daily summary email at 4:30 PM IST
@@ -51,3 +65,4 @@ def schedule_daily_trade():
 
     scheduler.start()
     print("⏱️ Scheduler started")
+    return scheduler
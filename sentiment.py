@@ -0,0 +1,163 @@
+# sentiment.py
+# News sentiment scores (headline count per symbol, as strategies has always used) behind a TTL cache.
+# Fetches for many symbols run concurrently on a bounded thread pool sharing one pooled requests.Session.
+# Failures are cached for a shorter TTL so a blocked source isn't hammered on every scan. Sources are
+# pluggable: GoogleNewsSource scrapes search results, and FixtureSource replays recorded HTML files offline.
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+import requests
+from requests.adapters import HTTPAdapter
+
+SENTIMENT_TTL = float(os.getenv("SENTIMENT_TTL", "900"))                  # a good score is reused for 15 min
+SENTIMENT_FAILURE_TTL = float(os.getenv("SENTIMENT_FAILURE_TTL", "120"))  # a failure is not retried for 2 min
+SENTIMENT_CONNECTIONS = int(os.getenv("SENTIMENT_CONNECTIONS", "8"))
+SENTIMENT_TIMEOUT = float(os.getenv("SENTIMENT_TIMEOUT", "5"))
+SENTIMENT_SOURCE = os.getenv("SENTIMENT_SOURCE", "google")                # "google" or "fixtures:<dir>"
+
+# ✅ Precompiled once: a Google result headline is a <div> whose class attribute contains these classes
+HEADLINE_RE = re.compile(r'<div\b[^>]*\bclass="[^"]*BNeawe vvjwJb AP7Wnd[^"]*"', re.IGNORECASE)
+
+
+def query_name(symbol):
+    return symbol.replace(".NS", "").strip().upper()
+
+
+def count_headlines(html):
+    return len(HEADLINE_RE.findall(html or ""))
+
+
+class GoogleNewsSource:
+    """Google search result page for "<symbol> stock news"."""
+
+    name = "google"
+    url = "https://www.google.com/search"
+    headers = {"User-Agent": "Mozilla/5.0"}
+
+    def __init__(self, timeout=SENTIMENT_TIMEOUT):
+        self.timeout = timeout
+
+    def fetch(self, session, symbol):
+        response = session.get(self.url, params={"q": f"{query_name(symbol)} stock news"},
+                               headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def parse(self, html):
+        return count_headlines(html)
+
+
+class FixtureSource(GoogleNewsSource):
+    """Recorded pages (<directory>/<SYMBOL>.html) parsed like live ones; no network."""
+
+    name = "fixtures"
+
+    def __init__(self, directory, latency=0.0):
+        self.directory = directory
+        self.latency = latency       # simulated round trip, for benchmarks
+
+    def fetch(self, session, symbol):
+        if self.latency:
+            time.sleep(self.latency)
+        with open(os.path.join(self.directory, f"{query_name(symbol)}.html"), encoding="utf-8") as f:
+            return f.read()
+
+
+class SentimentService:
+    """Concurrent, single-flight, TTL-cached sentiment scores (None = unknown / failed)."""
+
+    def __init__(self, source=None, ttl=SENTIMENT_TTL, failure_ttl=SENTIMENT_FAILURE_TTL,
+                 max_connections=SENTIMENT_CONNECTIONS):
+        self.source = source or GoogleNewsSource()
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="sentiment")
+        self._cache = {}            # symbol -> (score or None, expires_at)
+        self._inflight = {}         # symbol -> Future
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "fetches": 0, "failures": 0}
+
+    def _load(self, symbol):
+        try:
+            score = self.source.parse(self.source.fetch(self.session, symbol))
+            ttl = self.ttl
+        except Exception as e:
+            print(f"[News Sentiment] Error for {symbol}: {e}")
+            score, ttl = None, self.failure_ttl
+            self._stats["failures"] += 1
+        with self._lock:
+            self._cache[symbol] = (score, time.monotonic() + ttl)
+            self._inflight.pop(symbol, None)
+        return score
+
+    def _cached(self, symbol, now):
+        entry = self._cache.get(symbol)
+        if entry is not None and now < entry[1]:
+            return entry
+        return None
+
+    def prefetch(self, symbols):
+        """Starts fetches for every symbol not cached or already in flight; returns {symbol: Future}."""
+        now = time.monotonic()
+        futures = {}
+        with self._lock:
+            for symbol in dict.fromkeys(symbols):
+                if self._cached(symbol, now) is not None:
+                    continue
+                future = self._inflight.get(symbol)
+                if future is None:
+                    self._stats["fetches"] += 1
+                    future = self._pool.submit(self._load, symbol)
+                    self._inflight[symbol] = future
+                futures[symbol] = future
+        return futures
+
+    def scores(self, symbols, timeout=None):
+        """{symbol: score or None} for many symbols, fetched concurrently (None when not ready by timeout)."""
+        symbols = list(dict.fromkeys(symbols))
+        futures = self.prefetch(symbols)
+        if futures:
+            wait_futures(list(futures.values()), timeout=timeout)
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for symbol in symbols:
+                entry = self._cached(symbol, now)
+                if entry is not None and symbol not in futures:
+                    self._stats["hits"] += 1
+                result[symbol] = entry[0] if entry is not None else None
+        return result
+
+    def score(self, symbol, timeout=None):
+        return self.scores([symbol], timeout).get(symbol)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, cached=len(self._cache), inflight=len(self._inflight))
+
+
+def make_source(spec=SENTIMENT_SOURCE):
+    if spec.startswith("fixtures:"):
+        return FixtureSource(spec.split(":", 1)[1])
+    return GoogleNewsSource()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_sentiment_service():
+    """Process-wide service on SENTIMENT_SOURCE."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = SentimentService(make_source())
+    return _service
+
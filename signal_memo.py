@@ -0,0 +1,85 @@
+# signal_memo.py
+# Per-bar memo for features and model signals. An entry is keyed by (kind, symbol) and is valid for one
+# (last bar timestamp, model hash) pair. Strategies, exit checks, bot.monitor_holdings and the dashboards
+# therefore compute a symbol's features / prediction at most once per new bar (or new model), whoever
+# asks first. Only the latest bar is kept per key, so memory stays bounded by the universe size.
+import threading
+
+NO_MODEL = "none"
+
+
+def model_key(model):
+    """Stable identity of the model behind a prediction: LazyModel's content hash, else the object id."""
+    if model is None:
+        return NO_MODEL
+    sha = getattr(model, "sha", None)
+    return sha if isinstance(sha, str) and sha else f"id:{id(model)}"
+
+
+def last_bar(df):
+    """Timestamp of the newest row of a candle / history frame (None when empty)."""
+    return None if df is None or not len(df) else df.index[-1]
+
+
+class SignalMemo:
+    """(kind, symbol) -> value for the current (bar, model); single-flight per key."""
+
+    def __init__(self):
+        self._entries = {}       # (kind, symbol) -> (bar, model, value)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _key_lock(self, key):
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._lock:
+                lock = self._locks.setdefault(key, threading.Lock())
+        return lock
+
+    def get(self, kind, symbol, bar, compute, model=NO_MODEL):
+        """Value memoized for (bar, model); compute() runs only on a new bar / model (or bar None)."""
+        key = (kind, symbol)
+        entry = self._entries.get(key)
+        if bar is not None and entry is not None and entry[0] == bar and entry[1] == model:
+            self._stats["hits"] += 1
+            return entry[2]
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if bar is not None and entry is not None and entry[0] == bar and entry[1] == model:
+                self._stats["hits"] += 1
+                return entry[2]
+            self._stats["misses"] += 1
+            value = compute()
+            if bar is not None:
+                self._entries[key] = (bar, model, value)
+            return value
+
+    def put(self, kind, symbol, bar, value, model=NO_MODEL):
+        """Stores a value computed elsewhere (e.g. a batch scan) for (bar, model)."""
+        if bar is not None:
+            self._entries[(kind, symbol)] = (bar, model, value)
+
+    def peek(self, kind, symbol):
+        """Latest memoized value whatever its bar (None if never computed). Never computes."""
+        entry = self._entries.get((kind, symbol))
+        return None if entry is None else entry[2]
+
+    def latest(self, kind):
+        """{symbol: (bar, value)} for one kind, for dashboards."""
+        return {symbol: (bar, value) for (k, symbol), (bar, _, value) in list(self._entries.items()) if k == kind}
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[1] == symbol]:
+                    self._entries.pop(key, None)
+
+    def stats(self):
+        return dict(self._stats, entries=len(self._entries))
+
+
+# ✅ Process-wide memo shared by strategies, bot, exit checks and dashboards
+signal_memo = SignalMemo()
@@ -1,8 +1,8 @@
 # model/signal_predictor.py
-import yfinance as yf
+from ohlcv_store import get_history
 
 def predict_signal(symbol):
-    df = yf.download(f"{symbol}.NS", period="7d", interval="1d")
+    df = get_history(f"{symbol}.NS", period="7d", interval="1d")
     df['daily_return'] = df['Close'].pct_change()
 
     # Simple logic: if uptrend in last 2 days
@@ -0,0 +1,70 @@
+# startup_benchmark.py
+# Measures the import cost of each module in a fresh interpreter and fails if a budget is exceeded.
+# Any socket connect during import is recorded (and refused): imports must not touch the network.
+# Usage: python startup_benchmark.py [module ...]   (STARTUP_BUDGET=seconds per module, default 3.0)
+import os
+import sys
+import json
+import subprocess
+
+DEFAULT_BUDGET = float(os.getenv("STARTUP_BUDGET", "3.0"))
+MODULES = [
+    "runtime", "model_cache", "broker_client", "angel_api", "token_utils", "funds",
+    "instrument_master", "option_chain", "price_service", "indicator_engine", "websocket_data", "tick_feed",
+    "executor", "fno_executor", "strategies", "helpers", "alerts", "bot", "scheduler",
+]
+BUDGETS = {"bot": 5.0, "scheduler": 5.0}   # ✅ pandas/plotly imports dominate these two
+
+_PROBE = r"""
+import json, socket, sys, time
+connects = []
+def _refuse(self, address, *args):
+    connects.append(str(address))
+    raise OSError("network access during import")
+socket.socket.connect = _refuse
+socket.socket.connect_ex = _refuse
+start = time.perf_counter()
+error = None
+try:
+    __import__(sys.argv[1])
+except BaseException as e:
+    error = f"{type(e).__name__}: {e}"
+print(json.dumps({"seconds": time.perf_counter() - start, "connects": connects, "error": error}))
+"""
+
+
+def measure(module, timeout=120):
+    """Imports one module in a clean subprocess; returns {seconds, connects, error}."""
+    proc = subprocess.run([sys.executable, "-c", _PROBE, module], capture_output=True, text=True,
+                          timeout=timeout, cwd=os.path.dirname(os.path.abspath(__file__)))
+    lines = proc.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return {"seconds": None, "connects": [], "error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def run(modules=MODULES, budget=DEFAULT_BUDGET):
+    """Prints a per-module report and returns the list of failures."""
+    failures = []
+    for module in modules:
+        result = measure(module)
+        limit = BUDGETS.get(module, budget)
+        problems = []
+        if result["error"]:
+            problems.append(result["error"])
+        if result["connects"]:
+            problems.append(f"{len(result['connects'])} network connect(s): {', '.join(result['connects'][:3])}")
+        if result["seconds"] is not None and result["seconds"] > limit:
+            problems.append(f"over budget ({limit:.1f}s)")
+        seconds = f"{result['seconds']:.3f}s" if result["seconds"] is not None else "   n/a"
+        print(f"{'❌' if problems else '✅'} {module:<18} {seconds:>8}  {'; '.join(problems)}")
+        if problems:
+            failures.append((module, problems))
+    return failures
+
+
+if __name__ == "__main__":
+    failures = run(sys.argv[1:] or MODULES)
+    print(f"\n{len(failures)} module(s) failed the startup budget." if failures else "\n✅ All imports within budget.")
+    sys.exit(1 if failures else 0)
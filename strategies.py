@@ -1,56 +1,68 @@
 import os
 import numpy as np
-import requests
-from bs4 import BeautifulSoup
-import re
 from datetime import datetime
-from websocket_data import get_realtime_candles  # <-- WebSocket real-time candles
-from token_utils import fetch_model_from_gist
-
-# === Load AI Model (From Gist) ===
+from websocket_data import get_realtime_candles, get_candle_arrays  # <-- WebSocket real-time candles
+from model_cache import lazy_model
+from indicator_engine import indicator_engine
+from indicators import rsi as panel_rsi, add_features
+from sentiment import get_sentiment_service, SENTIMENT_TIMEOUT
+from signal_memo import signal_memo, model_key
+
+# === AI Model (local cache, loaded on first prediction) ===
 MODEL_GIST_URL = "https://gist.githubusercontent.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/nifty25_model.pkl"
-model = None
-ai_enabled = False
-
-try:
-    model = fetch_model_from_gist(MODEL_GIST_URL)
-    ai_enabled = True
-    print("✅ AI model loaded from Gist.")
-except Exception as e:
-    print(f"⚠️ AI model load failed: {e}. Fallback to rule-based strategies.")
+model = lazy_model(MODEL_GIST_URL)
+ai_enabled = True
 
 # === RSI Computation ===
 def compute_rsi(prices, period=14):
-    delta = np.diff(prices)
-    gain = np.where(delta > 0, delta, 0)
-    loss = np.where(delta < 0, -delta, 0)
-    avg_gain = np.convolve(gain, np.ones(period)/period, mode='valid')
-    avg_loss = np.convolve(loss, np.ones(period)/period, mode='valid')
-    rs = avg_gain / (avg_loss + 1e-6)
-    rsi = 100 - (100 / (1 + rs))
-    rsi = np.concatenate(([50]*(period-1), rsi))  # Pad with neutral RSI
-    return rsi
+    rsi = panel_rsi(prices, period, eps=1e-6)
+    return np.where(np.isnan(rsi), 50, rsi)  # Pad warm-up with neutral RSI
+
+# === Live features from the incremental indicator engine (None until warmed up) ===
+def get_live_features(symbol, required=("MA10", "MA20", "RSI")):
+    features = indicator_engine.latest(symbol)
+    if features and all(np.isfinite(features[k]) for k in required):
+        return features
+    return None
+
+# === Memo keys: the websocket's current 1-min bar ===
+def live_bar(symbol):
+    ts, _ = get_candle_arrays(symbol)
+    return ts[-1] if ts is not None and len(ts) else None
+
+# === Buffered 1-min candles with strategy features, built once per bar and shared ===
+def get_live_frame(symbol):
+    def build():
+        df = get_realtime_candles(symbol)
+        if df.empty:
+            return df
+        add_features(df, ["Return", "MA10", "MA20"])
+        df["RSI"] = compute_rsi(df["Close"].values, 14)
+        return df
+    return signal_memo.get("live_frame", symbol, live_bar(symbol), build)
 
 # === 1. AI Signal Strategy ===
 def get_ai_signal(symbol):
-    if not ai_enabled or model is None:
+    if not ai_enabled or not model:
         print(f"[AI] {symbol}: Model not loaded. Skipping AI strategy.")
         return "HOLD"
+    # ✅ One prediction per (symbol, bar, model) however many strategies / views ask
+    return signal_memo.get("ai_live", symbol, live_bar(symbol), lambda: _compute_ai_signal(symbol),
+                           model=model_key(model))
 
+def _compute_ai_signal(symbol):
     try:
-        df = get_realtime_candles(symbol)
-        if df.empty:
-            raise ValueError("No price data from websocket")
-
-        df["Return"] = df["Close"].pct_change()
-        df["MA10"] = df["Close"].rolling(window=10).mean()
-        df["MA20"] = df["Close"].rolling(window=20).mean()
-        df["RSI"] = compute_rsi(df["Close"].values, 14)
-        df.dropna(inplace=True)
-
         features = ["MA10", "MA20", "RSI"]
-        X = df[features]
-        latest = X.iloc[-1].values.reshape(1, -1)
+        live = get_live_features(symbol, features)
+        if live is not None:
+            latest = np.array([[live[f] for f in features]])
+        else:
+            df = get_live_frame(symbol)
+            if df.empty:
+                raise ValueError("No price data from websocket")
+
+            X = df[features].dropna()
+            latest = X.iloc[-1].values.reshape(1, -1)
         prediction = model.predict(latest)[0]
         prob = model.predict_proba(latest)[0][1]
 
@@ -62,11 +74,18 @@ def get_ai_signal(symbol):
 
 # === 2. RSI Signal Strategy ===
 def get_rsi_signal(symbol):
+    return signal_memo.get("rsi_live", symbol, live_bar(symbol), lambda: _compute_rsi_signal(symbol))
+
+def _compute_rsi_signal(symbol):
     try:
-        df = get_realtime_candles(symbol)
-        if df.empty:
-            raise ValueError("No RSI data")
-        rsi = compute_rsi(df["Close"].values, 14)[-1]
+        live = get_live_features(symbol, ("RSI",))
+        if live is not None:
+            rsi = live["RSI"]
+        else:
+            df = get_live_frame(symbol)
+            if df.empty:
+                raise ValueError("No RSI data")
+            rsi = df["RSI"].iloc[-1]
         print(f"[RSI] {symbol}: RSI = {rsi:.2f}")
         if rsi < 30:
             return "BUY"
@@ -79,20 +98,15 @@ def get_rsi_signal(symbol):
         return "HOLD"
 
 # === 3. News Sentiment Score ===
-def get_sentiment_score(symbol):
-    try:
-        query = symbol.replace(".NS", "")
-        url = f"https://www.google.com/search?q={query}+stock+news"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        results = soup.find_all("div", class_=re.compile("BNeawe vvjwJb AP7Wnd"))
-        score = len(results)
-        print(f"[Sentiment] {symbol}: News count = {score}")
-        return score
-    except Exception as e:
-        print(f"[News Sentiment] Error for {symbol}: {e}")
-        return 0
+def get_sentiment_score(symbol, timeout=SENTIMENT_TIMEOUT):
+    """News count from the shared cached/concurrent fetcher; None if unknown (failed or not ready)."""
+    score = get_sentiment_service().score(symbol, timeout=timeout)
+    print(f"[Sentiment] {symbol}: News count = {score}")
+    return score
+
+def prefetch_sentiment(symbols):
+    """Starts concurrent sentiment fetches for a whole universe before per-symbol signals are computed."""
+    get_sentiment_service().prefetch(symbols)
 
 # === 4. Multi-Strategy Signal Aggregator ===
 def get_final_signal(symbol):
@@ -114,9 +128,10 @@ def get_final_signal(symbol):
         elif rsi_signal == "SELL":
             sell_votes += 1
 
-        if sentiment_score > 4:
+        # ✅ Unknown sentiment (fetch failed / timed out) casts no vote
+        if sentiment_score is not None and sentiment_score > 4:
             buy_votes += 1
-        elif sentiment_score < 2:
+        elif sentiment_score is not None and sentiment_score < 2:
             sell_votes += 1
 
         print(f"[Final Signal] {symbol} → BUY votes: {buy_votes}, SELL votes: {sell_votes}")
@@ -130,34 +145,43 @@ def get_final_signal(symbol):
         print(f"[Final Signal] Error for {symbol}: {e}")
         return "HOLD"
 
+# === 4b. Signals for a whole watchlist: every news fetch starts up front and runs concurrently ===
+def get_final_signals(symbols):
+    symbols = list(dict.fromkeys(symbols))
+    prefetch_sentiment(symbols)
+    return {symbol: get_final_signal(symbol) for symbol in symbols}
+
 # === 5. Exit Logic ===
 def should_exit_trade(symbol, entry_price, buy_time, risk=1, reward=3, trailing_buffer=1.5, max_days=3):
+    """Exit rule that fired ("TRAIL", "TP", "SL", "MAX_HOLD", like ExitEngine) or None to keep holding."""
     try:
-        df = get_realtime_candles(symbol)
-        if df.empty:
+        # ✅ Zero-copy close column: the live price must not wait for the next bar, so no memo here
+        _, columns = get_candle_arrays(symbol)
+        closes = columns.get("Close")
+        if closes is None or not len(closes):
             raise ValueError("No intraday data")
 
-        current_price = df["Close"].iloc[-1]
+        current_price = closes[-1]
         days_held = (datetime.now() - buy_time).days
         profit = current_price - entry_price
-        peak_price = df["Close"].max()
+        peak_price = closes.max()
 
         tp = risk * reward
         sl = risk
 
         if profit > 0 and current_price < (peak_price - trailing_buffer):
             print(f"🔽 Trailing SL hit for {symbol}")
-            return True
+            return "TRAIL"
         if profit >= tp:
             print(f"🎯 Take Profit hit ({tp}) for {symbol}")
-            return True
+            return "TP"
         elif profit <= -sl:
             print(f"🛑 Stop Loss hit ({sl}) for {symbol}")
-            return True
+            return "SL"
         elif days_held >= max_days:
             print(f"📅 Max hold duration hit for {symbol}")
-            return True
-        return False
+            return "MAX_HOLD"
+        return None
     except Exception as e:
         print(f"[Exit Logic] Error for {symbol}: {e}")
-        return False
+        return None
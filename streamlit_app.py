@@ -3,27 +3,29 @@ import os
 import json
 import pandas as pd
 import streamlit as st
-import plotly.graph_objects as go
-import base64
-import joblib
 import requests
 import asyncio
 import websockets
 import threading
 from datetime import datetime
-from io import BytesIO
 from alerts import send_telegram_alert, send_trade_summary_email
 from generate_access_token import generate_token
-from executor import place_order, get_live_price
-from strategies import get_final_signal, should_exit_trade
+from executor import place_order, get_live_price, get_live_prices
+from strategies import get_final_signal, prefetch_sentiment, should_exit_trade
 from scheduler import schedule_daily_trade
 from helpers import load_holdings, save_holdings, run_backtest
 from manual_trade import manual_trade_ui
 from angel_api import get_ltp
 from utils import convert_to_ist
+import instrument_master
+import model_cache
+import dashboard_data
+from signal_memo import signal_memo
+from websocket_data import update_realtime_candle
 from token_utils import is_token_fresh
 from funds import get_available_funds
 from bot import trade_logic, monitor_holdings
+from trade_journal import get_journal
 
 st.set_page_config(layout="wide", page_title="Smart AI Trading Dashboard")
 st.title("📈 Smart AI Trading Dashboard - Angel One")
@@ -45,10 +47,7 @@ if 'refresh' in params:
 MODEL_GIST_URL = "https://gist.githubusercontent.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/nifty25_model_b64.txt"
 @st.cache_resource(show_spinner="Loading AI model...")
 def load_model():
-    response = requests.get(MODEL_GIST_URL)
-    base64_str = response.text.strip()
-    model_bytes = BytesIO(base64.b64decode(base64_str))
-    return joblib.load(model_bytes)
+    return model_cache.load_model(MODEL_GIST_URL)  # ✅ disk cache; Gist only revalidated in background
 
 try:
     ai_model = load_model()
@@ -80,25 +79,35 @@ def_qty = st.sidebar.number_input("Quantity", value=1)
 # === Live Price Panel ===
 st.sidebar.header("📈 Live Price")
 selected_stock = st.sidebar.selectbox("Choose Stock", STOCK_LIST)
-placeholder = st.empty()
+prefetch_sentiment(STOCK_LIST)  # ✅ one concurrent fetch for the watchlist; per-tick signals hit the cache
+
+# ✅ Redraws only the price widget every LIVE_REFRESH seconds; reads the shared snapshot, no network
+@st.fragment(run_every=dashboard_data.LIVE_REFRESH)
+def live_price_panel(symbol):
+    price, updated_at = dashboard_data.live_price(symbol)
+    if price is None:
+        st.info(f"⏳ Waiting for the first price of {symbol}…")
+        return
+    last = st.session_state.get("live_price_last", {})
+    reference = last.get(symbol, price)
+    st.metric(f"Live Price: {symbol}", f"₹ {price:,.2f}", delta=f"{price - reference:+.2f}")
+    st.caption(f"Updated {datetime.fromtimestamp(updated_at).strftime('%H:%M:%S')}")
+    last[symbol] = price
+    st.session_state["live_price_last"] = last
 
-# === Load Master Symbol Token ===
-@st.cache_data
-def load_master():
-    return pd.read_csv("master.csv")
+live_price_panel(selected_stock)
 
-symbol_token_df = load_master()
+# === Symbol Token Lookup (in-memory instrument master) ===
 def get_token(symbol):
-    try:
-        token_row = symbol_token_df[symbol_token_df['symbol'] == symbol.replace(".NS", "")]
-        return str(token_row.iloc[0]['token'])
-    except IndexError:
+    token = instrument_master.get_token(symbol)
+    if token is None:
         print(f"⚠️ Token not found for: {symbol}")
         return ""
+    return token
 
-# === WebSocket Feed ===
-async def live_websocket():
-    token = get_token(selected_stock)
+# === WebSocket Feed (one per symbol per process; ticks go to the shared price snapshot) ===
+async def live_websocket(symbol):
+    token = get_token(symbol)
     ws_url = f"wss://smartapisocket.angelone.in/smart-stream?clientCode={os.getenv('ANGEL_CLIENT_CODE')}&feedToken={os.getenv('ANGEL_FEED_TOKEN')}&apiKey={os.getenv('ANGEL_API_KEY')}"
 
     async with websockets.connect(ws_url) as ws:
@@ -122,53 +131,72 @@ async def live_websocket():
                 data = json.loads(msg)
                 if 'ltp' in data:
                     ltp = float(data['ltp'])
-                    fig = go.Figure(go.Indicator(mode="number+delta", value=ltp, title=f"Live Price: {selected_stock}"))
-                    placeholder.plotly_chart(fig, use_container_width=True)
+                    update_realtime_candle(symbol, ltp)  # ✅ price snapshot, 1-min candles, tick listeners
 
                     # === Signal Check ===
-                    signal = get_final_signal(selected_stock, ltp, ai_model)
+                    signal = get_final_signal(symbol)  # ✅ memoized per 1-min bar: one compute per bar, not per tick
                     if signal == "BUY":
-                        place_order(selected_stock, "BUY", def_qty)
-                        send_telegram_alert(selected_stock, "BUY", ltp, def_tp, def_sl)
+                        place_order(symbol, "BUY", def_qty)
+                        send_telegram_alert(symbol, "BUY", ltp, def_tp, def_sl)
                     elif signal == "SELL":
-                        place_order(selected_stock, "SELL", def_qty)
-                        send_telegram_alert(selected_stock, "SELL", ltp, def_tp, def_sl)
+                        place_order(symbol, "SELL", def_qty)
+                        send_telegram_alert(symbol, "SELL", ltp, def_tp, def_sl)
 
                 await asyncio.sleep(1)
             except Exception as e:
-                st.error(f"WebSocket Error: {e}")
+                print(f"❌ WebSocket Error ({symbol}): {e}")
                 break
 
-# === Start WebSocket Thread ===
-threading.Thread(target=lambda: asyncio.run(live_websocket()), daemon=True).start()
+@st.cache_resource
+def _websocket_feeds():
+    return {}
+
+# === Start WebSocket Thread (reruns reuse the running feed) ===
+def ensure_websocket(symbol):
+    feeds = _websocket_feeds()
+    thread = feeds.get(symbol)
+    if thread is None or not thread.is_alive():
+        thread = threading.Thread(target=lambda: asyncio.run(live_websocket(symbol)), daemon=True)
+        feeds[symbol] = thread
+        thread.start()
+
+ensure_websocket(selected_stock)
+
+# === Strategy Signals (read from the per-bar signal memo the tick loop fills; never computes) ===
+with st.expander("🧭 Strategy signals (current 1-min bar)"):
+    strategy_signals = dashboard_data.memo_signals("ai_live", "rsi_live")
+    if strategy_signals.empty:
+        st.caption("⏳ Signals appear after the first websocket bar.")
+    else:
+        st.dataframe(strategy_signals, hide_index=True, use_container_width=True)
+    live_features = signal_memo.peek("live_frame", selected_stock)
+    if live_features is not None and len(live_features):
+        st.caption(f"Features for {selected_stock}")
+        st.dataframe(live_features[["Close", "MA10", "MA20", "RSI"]].tail(5), use_container_width=True)
 
 # === Manual Trade UI ===
 manual_trade_ui(STOCK_LIST, def_tp, def_sl, available_cash)
 
 def show_last_trade():
-    log_file = "logs/trades.csv"
-    if not os.path.exists(log_file):
-        st.sidebar.info("📭 No trades yet.")
-        return
-
-    df = pd.read_csv(log_file)
-    if df.empty:
+    last_trades = get_journal().tail(1)  # ✅ one indexed read, not the whole log
+    if not last_trades:
         st.sidebar.info("📭 No trades yet.")
         return
 
-    last = df.iloc[-1]
+    last = last_trades[0]
 
     st.sidebar.markdown("## 🧾 Last Trade")
     st.sidebar.success(f"🕒 {last['timestamp']}")
     st.sidebar.markdown(f"**Symbol:** `{last['symbol']}`")
-    st.sidebar.markdown(f"**Option:** `{last['option']}`")
-    st.sidebar.markdown(f"**Strike:** `{last['strike']}`")
-    st.sidebar.markdown(f"**Signal:** `{last['signal']}`")
+    st.sidebar.markdown(f"**Action:** `{last['action']}`")
+    st.sidebar.markdown(f"**Strategy:** `{last['strategy']}`")
+    st.sidebar.markdown(f"**Reason:** `{last['reason']}`")
     st.sidebar.markdown(f"**Qty:** `{last['qty']}`")
 
 # === Holdings Auto-Exit ===
 st.sidebar.header("📊 Holdings Portfolio")
 holdings = load_holdings()
+get_live_prices(list(holdings))  # ✅ One batched quote for all holdings
 for symbol, data in holdings.copy().items():
     entry = data["entry"]
     qty = data["qty"]
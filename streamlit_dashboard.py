@@ -1,226 +1,96 @@
-import os
-import json
 import pandas as pd
 import streamlit as st
-import yfinance as yf
-import plotly.graph_objects as go
-import base64
-import pickle
-import http.client
 from datetime import datetime
-import requests
-import joblib
-import gspread
-
-# ✅ Load trained AI model
-try:
-    model = joblib.load("ai_model/advanced_model.pkl")
-    print("✅ Model loaded successfully.")
-except Exception as e:
-    model = None
-    print(f"❌ Model loading failed: {e}")
 
 # ✅ This must be the first Streamlit command
 st.set_page_config(layout="wide", page_title="Smart AI Trading Dashboard")
 
-from generate_access_token import generate_token
 from alerts import send_telegram_alert, send_trade_summary_email
-from executor import place_order, get_live_price
-from strategies import get_final_signal, should_exit_trade
+from strategies import should_exit_trade
 from scheduler import schedule_daily_trade, get_market_status
-from helpers import load_holdings, save_holdings, run_backtest
+from helpers import save_holdings, run_backtest
 from manual_trade import manual_trade_ui
-from angel_api import place_order, cancel_order, get_ltp, get_trade_book
-from utils import convert_to_ist
-print("✅ Dashboard started")
-
-GIST_RAW_URL = "https://gist.github.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/access_token.json"
-
-def fetch_access_token_from_gist(gist_url):
-    try:
-        response = requests.get(gist_url)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error("❌ Failed to fetch access_token.json from Gist")
-            return None
-    except Exception as e:
-        st.error(f"❌ Error fetching access_token.json: {e}")
-        return None
-
-def is_token_fresh():
-    try:
-        file_path = "access_token.json"
-        if not os.path.exists(file_path):
-            return False
-        token_time = datetime.fromtimestamp(os.path.getmtime(file_path)).date()
-        return token_time == datetime.now().date()
-    except:
-        return False
-
-tokens = fetch_access_token_from_gist(GIST_RAW_URL)
-
-if tokens:
-    with open("access_token.json", "w") as f:
-        json.dump(tokens, f, indent=2)
-
-if not tokens or not is_token_fresh():
-    st.warning("⚠️ Token not fresh. Regenerating...")
-    generate_token()
-    tokens = fetch_access_token_from_gist(GIST_RAW_URL)
-    if tokens:
-        with open("access_token.json", "w") as f:
-            json.dump(tokens, f, indent=2)
-    else:
-        st.error("❌ Failed to fetch token even after regeneration.")
-        st.stop()
-
-try:
-    token_time = datetime.fromtimestamp(os.path.getmtime("access_token.json"))
+from angel_api import place_order
+from ohlcv_store import get_history
+from trade_journal import log_trade
+from trade_charts import trade_chart
+from signal_memo import signal_memo
+import dashboard_data as data
+
+# ✅ Every source below is refreshed by background threads shared by all sessions; reruns only read memory
+data.warm()
+
+token_time = data.get("token_time")
+if token_time:
     st.sidebar.markdown(f"📅 Token refreshed: **{token_time.strftime('%Y-%m-%d %H:%M:%S')}**")
-except:
-    st.sidebar.warning("⚠️ Token timestamp not available.")
-
-if tokens:
-    access_token = tokens.get("access_token")
-    feed_token = tokens.get("feed_token")
-    api_key = tokens.get("api_key")
-    client_code = tokens.get("client_code")
+elif data.sources["token_time"].error:
+    st.sidebar.error(f"❌ Failed to fetch token: {data.sources['token_time'].error}")
 else:
-    st.stop()
-
-def decode_and_save_base64(input_file, output_file):
-    with open(input_file, "rb") as f:
-        base64_data = f.read()
-    decoded_data = base64.b64decode(base64_data)
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "wb") as f:
-        f.write(decoded_data)
-
-MODEL_PATH = "ai_model/advanced_model.pkl"
-try:
-    with open(MODEL_PATH, "rb") as f:
-        ai_model = pickle.load(f)
-    print("✅ AI model loaded successfully")
-except Exception as e:
-    ai_model = None
-    print(f"❌ Failed to load AI model: {e}")
-
-print("✅ Dashboard initialization complete")
-print("✅ App started")
+    st.sidebar.warning("⚠️ Token timestamp not available.")
 
 st.title("📈 Smart AI Trading Dashboard - Angel One")
 st.sidebar.markdown(f"🕒 Market Status: **{get_market_status()}**")
 
-API_KEY = tokens.get("api_key")
-JWT_TOKEN = tokens.get("access_token")
-CLIENT_CODE = tokens.get("client_code")
-LOCAL_IP = os.getenv('CLIENT_LOCAL_IP')
-PUBLIC_IP = os.getenv('CLIENT_PUBLIC_IP')
-MAC_ADDRESS = os.getenv('MAC_ADDRESS')
-
-def get_available_funds():
-    try:
-        conn = http.client.HTTPSConnection("apiconnect.angelone.in")
-        headers = {
-            'Authorization': f'Bearer {JWT_TOKEN}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json',
-            'X-UserType': 'USER',
-            'X-SourceID': 'WEB',
-            'X-ClientLocalIP': os.getenv('CLIENT_LOCAL_IP'),
-            'X-ClientPublicIP': os.getenv('CLIENT_PUBLIC_IP'),
-            'X-MACAddress': os.getenv('MAC_ADDRESS'),
-            'X-PrivateKey': os.getenv('API_KEY')
-        }
-        conn.request("GET", "/rest/secure/angelbroking/user/v1/getRMS", headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-        return json.loads(data.decode("utf-8"))
-    except Exception as e:
-        return {"status": False, "error": str(e)}
-
-funds = get_available_funds()
-if funds.get("status"):
-    available_funds = float(funds['data']['availablecash'])
+available_funds = data.get("funds")
+if available_funds is not None:
     st.metric("💰 Available Cash", f"₹ {available_funds}")
 else:
     available_funds = 0
-    st.error(f"Failed to fetch funds: {funds.get('error')}")
+    if data.sources["funds"].error:
+        st.error(f"Failed to fetch funds: {data.sources['funds'].error}")
+    else:
+        st.info("⏳ Loading funds…")
 
-try:
-    df_stocks = pd.read_csv("nifty500list.csv")
-    STOCK_LIST = [f"{s.strip()}.NS" for s in df_stocks["Symbol"] if isinstance(s, str)]
-except:
-    STOCK_LIST = ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]
+STOCK_LIST = data.get("stock_list")
 
 st.sidebar.header("⚙️ Trade Settings")
 def_tp = st.sidebar.number_input("Take Profit (₹)", value=10.0)
 def_sl = st.sidebar.number_input("Stop Loss (₹)", value=5.0)
 def_qty = st.sidebar.number_input("Quantity", value=1)
 
-from oauth2client.service_account import ServiceAccountCredentials
-
-# Define required columns globally to avoid NameError
-required_columns = [
-    "timestamp", "symbol", "action", "qty", "entry", "tp", "sl", "exit_price", "pnl", "status",
-    "strategy", "reason", "holding_days", "exit_time", "trailing_sl_used",
-    "market_condition", "model_confidence"
-]
-
-# Load credentials from environment
-GOOGLE_CREDENTIALS_JSON = os.getenv("GOOGLE_CREDENTIALS_JSON")
-
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-
-if GOOGLE_CREDENTIALS_JSON:
-    try:
-        creds_dict = json.loads(GOOGLE_CREDENTIALS_JSON)
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
-
-        # Try loading the sheet
-        sheet = client.open_by_key("1GTmmYKh6cFwtSTpWATMDoL0Z0RgQ5OWNaHklOeUXPQs").worksheet("TradeLog")
-        records = sheet.get_all_records()
-
-        # Create dataframe from records or empty columns
-        if records:
-            df_trades = pd.DataFrame(records)
-        else:
-            df_trades = pd.DataFrame(columns=required_columns)
-
-        # Ensure all required columns exist
-        for col in required_columns:
-            if col not in df_trades.columns:
-                df_trades[col] = None
-
-        st.success("✅ Loaded trade log from Google Sheets with full detail.")
+df_trades = data.trades_frame()
+if data.sources["trades"].error:
+    st.error(f"❌ Trade log load failed: {data.sources['trades'].error}")
 
-    except Exception as e:
-        st.error(f"❌ Google Sheets load failed: {e}")
-        df_trades = pd.DataFrame(columns=required_columns)
-else:
-    st.error("❌ Google credentials environment variable (GOOGLE_CREDENTIALS_JSON) missing.")
-    df_trades = pd.DataFrame(columns=required_columns)
-    
 st.sidebar.header("📊 Holdings Portfolio")
-holdings = load_holdings()
-
-if holdings:
-    for symbol, data in holdings.items():
-        entry_price = data["entry"]
-        qty = data["qty"]
-        buy_time = datetime.fromisoformat(data["buy_time"])
-        live_price = get_live_price(symbol)
+holdings = dict(data.get("holdings"))   # ✅ copy: the cached dict is shared by every session
+prices = data.get("prices")
+
+# ✅ Redraws only this panel every LIVE_REFRESH seconds from the shared price snapshot
+@st.fragment(run_every=data.LIVE_REFRESH)
+def holdings_pnl_panel():
+    live_holdings = data.get("holdings")
+    if not live_holdings:
+        st.success("✅ No current holdings.")
+        return
+    total = 0.0
+    for symbol, info in live_holdings.items():
+        entry_price = info["entry"]
+        qty = info["qty"]
+        live_price, _ = data.live_price(symbol)
+        if live_price is None:
+            st.write(f"**{symbol}** ⏳ waiting for price")
+            continue
         pnl = (live_price - entry_price) * qty
-
-        st.sidebar.write(f"**{symbol}**")
-        st.sidebar.write(f"🟢 Entry: ₹{entry_price:.2f}")
-        st.sidebar.write(f"📈 Live: ₹{live_price:.2f}")
-        st.sidebar.write(f"💰 PnL: ₹{pnl:.2f}")
-        st.sidebar.write("---")
-else:
-    st.sidebar.success("✅ No current holdings.")
+        total += pnl
+
+        st.write(f"**{symbol}**")
+        st.write(f"🟢 Entry: ₹{entry_price:.2f}")
+        st.write(f"📈 Live: ₹{live_price:.2f}")
+        st.write(f"💰 PnL: ₹{pnl:.2f}")
+        st.write("---")
+    st.metric("💼 Open PnL", f"₹ {total:,.2f}")
+
+with st.sidebar:
+    holdings_pnl_panel()
+
+# ✅ Model signals memoized per (symbol, daily bar, model) by the scheduled scan / monitor_holdings
+with st.sidebar.expander("🧠 Model signals (latest daily bar)"):
+    model_signals = data.memo_signals("ai_daily")
+    if model_signals.empty:
+        st.caption("No scan has run in this process yet.")
+    else:
+        st.dataframe(model_signals, hide_index=True, use_container_width=True)
 
 st.sidebar.header("📈 Bot Traded Stock Chart")
 bot_symbols = sorted(df_trades["symbol"].unique().tolist())
@@ -228,49 +98,42 @@ bot_stock = st.sidebar.selectbox("View Traded Stock", bot_symbols)
 
 if bot_stock:
     st.subheader(f"📊 Live Chart: {bot_stock}")
-    chart_df = yf.download(bot_stock, period="7d", interval="15m")
-    fig = go.Figure()
-
-    fig.add_trace(go.Candlestick(
-        x=chart_df.index, open=chart_df["Open"],
-        high=chart_df["High"], low=chart_df["Low"],
-        close=chart_df["Close"], name="Candles"))
+    chart_df = data.get_chart(bot_stock)
+    if chart_df is None:
+        st.info("⏳ Loading chart…")
+        chart_df = pd.DataFrame(columns=["Open", "High", "Low", "Close"])
 
+    # ✅ Downsampled candles + one marker trace per side, cached by (symbol, range)
     trades = df_trades[df_trades["symbol"] == bot_stock]
-    for _, row in trades.iterrows():
-        fig.add_trace(go.Scatter(
-            x=[row["timestamp"]], y=[row["entry"]],
-            mode="markers+text", name=row["action"],
-            text=row["action"], textposition="top center",
-            marker=dict(size=10, color="green" if row["action"] == "BUY" else "red")
-        ))
-
+    fig = trade_chart(bot_stock, chart_df, trades, range_key=("7d", "15m"), title=f"{bot_stock} (7d, 15m)")
     st.plotly_chart(fig, use_container_width=True)
 
 manual_trade_ui(STOCK_LIST, def_tp, def_sl, available_funds)
 
-for symbol, data in holdings.copy().items():
-    entry = data["entry"]
-    qty = data["qty"]
-    buy_time = datetime.fromisoformat(data["buy_time"])
-    current_price = get_live_price(symbol)
+for symbol, info in holdings.copy().items():
+    entry = info["entry"]
+    qty = info["qty"]
+    buy_time = datetime.fromisoformat(info["buy_time"])
+    current_price = prices.get(symbol)
+    if current_price is None:
+        continue
 
-    if should_exit_trade(symbol, entry, buy_time, def_tp, def_sl, trailing_buffer=2.5, max_days=3):
+    exit_rule = should_exit_trade(symbol, entry, buy_time, def_tp, def_sl, trailing_buffer=2.5, max_days=3)
+    if exit_rule:
         place_order(symbol, "SELL", qty)
-        send_telegram_alert(symbol, "SELL", current_price, 0, 0)
-        with open("trade_log.csv", "a") as log:
-            log.write(f"{datetime.now()},{symbol},SELL,{qty},{current_price},0,0\n")
+        send_telegram_alert(symbol, "SELL", current_price, 0, 0, reason=f"Auto exit {exit_rule}")
+        log_trade(symbol, "SELL", qty, entry=entry, exit_price=current_price, pnl=(current_price - entry) * qty,
+                  status="CLOSED", strategy="dashboard", reason=f"AUTO_EXIT_{exit_rule}",
+                  trailing_sl_used=exit_rule == "TRAIL",
+                  holding_days=(datetime.now() - buy_time).days, exit_time=datetime.now())
         holdings.pop(symbol, None)
         save_holdings(holdings)
-        st.warning(f"🚨 Auto EXIT: {symbol} at ₹{current_price:.2f}")
+        data.refresh("holdings")
+        st.warning(f"🚨 Auto EXIT ({exit_rule}): {symbol} at ₹{current_price:.2f}")
     else:
         pnl = (current_price - entry) * qty
-        st.info(f"📌 Holding {symbol} | PnL ₹{pnl:.2f}")
-
-#from utils import load_model  # or wherever your model loading function is
-def load_model(path="ai_model/advanced_model.pkl"):
-    """Load the trained AI model from .pkl file."""
-    return joblib.load(path)
+        model_signal = signal_memo.peek("ai_daily", symbol) or "—"
+        st.info(f"📌 Holding {symbol} | PnL ₹{pnl:.2f} | AI: {model_signal}")
 
 st.header("🧪 Backtest AI Strategy")
 backtest_stock = st.selectbox("📉 Select Stock for Backtest", STOCK_LIST)
@@ -281,11 +144,12 @@ backtest_stock = st.selectbox("📉 Select Stock for Backtest", STOCK_LIST)
 #backtest_stock = st.text_input("Enter stock symbol (e.g. INFY.NS):", "RELIANCE.NS")
 
 if st.button("Run Backtest"):
+    model = data.get("model")
     if model is None:
         st.error("❌ AI Model not loaded. Please check advanced_model.pkl")
     else:
         try:
-            df = yf.download(backtest_stock, period="6mo", interval="1d")
+            df = get_history(backtest_stock, period="6mo", interval="1d")
             if df.empty:
                 st.warning("No data found for the selected stock.")
             else:
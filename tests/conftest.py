@@ -0,0 +1,6 @@
+import os
+import sys
+
+# ✅ The bot's modules live at the repo root; test helpers (fake_broker) live next to the tests
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(TESTS), TESTS]
@@ -0,0 +1,118 @@
+# tests/fake_broker.py
+# Local stand-in for the Angel One REST API, used by the tests to drive broker_client / order flow
+# without touching the real exchange.
+import json
+import time
+import random
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ORDER_PATH = "/rest/secure/angelbroking/order/v1"
+
+
+class FakeBroker:
+    """In-memory order book behind the handful of endpoints the bot uses."""
+
+    def __init__(self, latency=0.0, prices=None, timeout_rate=0.0, stall=0.0):
+        self.latency = latency
+        self.drop_next = 0                 # requests to handle and then answer by closing the connection
+        self.prices = prices or {}
+        self.timeout_rate = timeout_rate   # share of placeOrder calls whose reply is held back after the fill
+        self.stall = stall
+        self.orders = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(100000)
+
+    def handle(self, method, path, body):
+        if self.latency:
+            time.sleep(self.latency)
+        if path == f"{ORDER_PATH}/placeOrder":
+            with self.lock:
+                order_id = str(next(self._ids))
+                self.orders[order_id] = dict(body, orderid=order_id, status="complete",
+                                             filledshares=str(body.get("quantity", 0)),
+                                             averageprice=self.prices.get(body.get("tradingsymbol"), 100.0))
+            if self.timeout_rate and random.random() < self.timeout_rate:
+                time.sleep(self.stall)   # ✅ order is on the book but the client times out
+            return {"status": True, "message": "SUCCESS", "data": {"orderid": order_id}}
+        if path in (f"{ORDER_PATH}/modifyOrder", f"{ORDER_PATH}/cancelOrder"):
+            with self.lock:
+                order = self.orders.get(body.get("orderid"))
+                if order is None:
+                    return {"status": False, "message": "Order not found", "errorcode": "AB1008"}
+                if path.endswith("cancelOrder"):
+                    order["status"] = "cancelled"
+                else:
+                    order.update(price=body.get("price"), quantity=body.get("quantity"))
+            return {"status": True, "message": "SUCCESS", "data": {"orderid": body.get("orderid")}}
+        if path == f"{ORDER_PATH}/getOrderBook":
+            with self.lock:
+                return {"status": True, "message": "SUCCESS", "data": list(self.orders.values())}
+        if path == f"{ORDER_PATH}/getTradeBook":
+            with self.lock:
+                fills = [o for o in self.orders.values() if o["status"] == "complete"]
+            return {"status": True, "message": "SUCCESS", "data": fills}
+        if path == f"{ORDER_PATH}/getLtpData":
+            symbol = body.get("tradingsymbol")
+            return {"status": True, "message": "SUCCESS",
+                    "data": {"tradingsymbol": symbol, "symboltoken": body.get("symboltoken"),
+                             "ltp": self.prices.get(symbol, round(random.uniform(90, 110), 2))}}
+        if path.rstrip("/") == "/rest/secure/angelbroking/market/v1/quote":
+            fetched = [{"exchange": exchange, "symbolToken": token, "tradingSymbol": token,
+                        "ltp": self.prices.get(token, round(random.uniform(90, 110), 2))}
+                       for exchange, tokens in body.get("exchangeTokens", {}).items() for token in tokens]
+            return {"status": True, "message": "SUCCESS", "data": {"fetched": fetched, "unfetched": []}}
+        if path.startswith(f"{ORDER_PATH}/details/"):
+            with self.lock:
+                order = self.orders.get(path.rsplit("/", 1)[-1])
+            if order is None:
+                return {"status": False, "message": "Order not found", "errorcode": "AB1008"}
+            return {"status": True, "message": "SUCCESS", "data": order}
+        return {"status": False, "message": f"Unknown endpoint {path}", "errorcode": "AB404"}
+
+
+def _make_handler(broker):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # ✅ keep-alive
+        disable_nagle_algorithm = True
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                body = {}
+            payload = json.dumps(broker.handle(self.command, self.path, body)).encode("utf-8")
+            with broker.lock:
+                drop, broker.drop_next = broker.drop_next > 0, max(0, broker.drop_next - 1)
+            if drop:
+                self.close_connection = True   # ✅ request processed, connection lost before the reply
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            try:
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True   # client already gave up (timeout simulation)
+
+        do_GET = _reply
+        do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_fake_broker(port=0, latency=0.0, prices=None, timeout_rate=0.0, stall=0.0):
+    """Starts the stand-in server on a daemon thread, returns (server, broker, port)."""
+    broker = FakeBroker(latency=latency, prices=prices, timeout_rate=timeout_rate, stall=stall)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(broker))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, broker, server.server_address[1]
+
@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import Future
+import pytest
+
+bot = pytest.importorskip("bot")
+from order_pipeline import OrderStateUnknown
+
+PRICES = {"AAA.NS": 2000.0, "BBB.NS": 600.0, "CCC.NS": 300.0}   # one share each out of 3000
+
+
+class _StuckPipeline:
+    """Accepts every BUY and resolves nothing until the test says so."""
+
+    def __init__(self):
+        self.futures = {}
+
+    def submit(self, symbol, side, qty, tag=None, **_):
+        self.futures[symbol] = Future()
+        return self.futures[symbol]
+
+
+@pytest.fixture
+def trade_logic(monkeypatch):
+    pipeline = _StuckPipeline()
+    monkeypatch.setattr(bot, "STOCK_LIST", list(PRICES))
+    monkeypatch.setattr(bot, "portfolio", {})
+    monkeypatch.setattr(bot, "available_funds", 3000.0)
+    monkeypatch.setattr(bot, "ORDER_RESULT_TIMEOUT", 0.3)
+    monkeypatch.setattr(bot, "is_market_open", lambda: True)
+    monkeypatch.setattr(bot, "scan_universe", lambda symbols: ({s: "BUY" for s in symbols}, {}))
+    monkeypatch.setattr(bot, "get_live_prices", lambda symbols: {s: PRICES[s] for s in symbols})
+    monkeypatch.setattr(bot, "get_live_price", PRICES.get)
+    monkeypatch.setattr(bot, "get_pipeline", lambda: pipeline)
+    monkeypatch.setattr(bot, "_order_by_tag", lambda tag: None)
+    monkeypatch.setattr(bot, "send_telegram_alert", lambda *a, **k: None)
+    return pipeline
+
+
+def test_slow_orders_share_one_deadline_and_keep_funds_reserved(trade_logic):
+    start = time.perf_counter()
+    bot.trade_logic()
+    assert time.perf_counter() - start < 2 * bot.ORDER_RESULT_TIMEOUT     # not 3 x the timeout
+    assert len(trade_logic.futures) == 3 and bot.available_funds == pytest.approx(100.0)
+
+
+def test_late_results_settle_the_reservation(trade_logic):
+    bot.trade_logic()
+    # ✅ Late results arrive on pipeline threads: a rejection releases, an unknown state keeps the reservation
+    trade_logic.futures["AAA.NS"].set_exception(OrderStateUnknown("tag", OSError("order book down")))
+    assert bot.available_funds == pytest.approx(100.0)
+    trade_logic.futures["BBB.NS"].set_result({"status": False, "message": "RMS rejected"})
+    assert bot.available_funds == pytest.approx(700.0)
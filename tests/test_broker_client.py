@@ -0,0 +1,48 @@
+import http.client
+import pytest
+from broker_client import BrokerClient
+from fake_broker import start_fake_broker, ORDER_PATH
+
+
+@pytest.fixture
+def broker():
+    server, broker, port = start_fake_broker(prices={"SBIN-EQ": 812.5})
+    client = BrokerClient("127.0.0.1", port, use_tls=False, pool_size=2)
+    yield broker, client
+    client.close()
+    server.shutdown()
+
+
+def test_requests_reuse_one_keep_alive_connection(broker):
+    _, client = broker
+    for _ in range(50):
+        response = client.request("POST", f"{ORDER_PATH}/getLtpData", {"tradingsymbol": "SBIN-EQ", "symboltoken": "3045"})
+        assert response["data"]["ltp"] == 812.5
+    stats = client.stats()
+    assert stats["requests"] == 50
+    assert stats["handshakes"] == 1
+    assert stats["reused"] == 49
+
+
+def test_error_response_is_parsed(broker):
+    _, client = broker
+    response = client.request("GET", f"{ORDER_PATH}/details/404")
+    assert response["status"] is False
+    assert response["errorcode"] == "AB1008"
+
+
+def test_write_is_not_resent_when_the_connection_drops_after_the_send(broker):
+    fake, client = broker
+    client.request("POST", f"{ORDER_PATH}/getOrderBook")      # pooled connection to reuse
+    fake.drop_next = 1
+    with pytest.raises((http.client.HTTPException, OSError)):
+        client.request("POST", f"{ORDER_PATH}/placeOrder", {"tradingsymbol": "SBIN-EQ", "quantity": 1})
+    assert len(fake.orders) == 1
+
+
+def test_read_is_resent_on_a_fresh_connection_after_a_drop(broker):
+    fake, client = broker
+    client.request("POST", f"{ORDER_PATH}/getOrderBook")
+    fake.drop_next = 1
+    assert client.request("POST", f"{ORDER_PATH}/getOrderBook").status
+    assert client.stats()["reconnects"] == 1
@@ -0,0 +1,56 @@
+import time
+import threading
+import pandas as pd
+import dashboard_data
+import signal_memo
+from dashboard_data import CachedSource, KeyedSource
+
+
+def test_get_returns_the_default_without_waiting_for_a_slow_loader():
+    release = threading.Event()
+
+    def loader():
+        release.wait(5)
+        return "loaded"
+
+    source = CachedSource("slow", loader, ttl=None, default="default")
+    start = time.perf_counter()
+    assert source.get() == "default"
+    assert time.perf_counter() - start < 0.05
+    release.set()
+    source._thread.join(5)
+    assert source.get() == "loaded" and source.status()["error"] is None
+
+
+def test_failed_load_keeps_the_last_value_and_records_the_error():
+    values = iter(["first"])
+    source = CachedSource("flaky", lambda: next(values), ttl=60, default=None)
+    source.load()
+    source.load()
+    assert source.value == "first"
+    assert source.status()["error"] is not None and source._failures == 1
+
+
+def test_keyed_source_loads_each_key_once_and_drops_idle_keys():
+    calls = []
+    charts = KeyedSource("chart", lambda symbol: calls.append(symbol) or symbol.lower(), ttl=None, idle=-1)
+    charts.get("TCS")
+    deadline = time.time() + 5
+    while charts.get("TCS") is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert charts.get("TCS") == "tcs" and calls == ["TCS"]
+    assert charts._alive(("TCS",)) is False and charts.status() == {}
+
+
+def test_memo_signals_reads_the_latest_bar_per_symbol(monkeypatch):
+    memo = signal_memo.SignalMemo()
+    monkeypatch.setattr(signal_memo, "signal_memo", memo)
+    bar = pd.Timestamp("2024-01-01 10:15")
+    memo.put("ai_live", "TCS", bar, "BUY")
+    memo.put("rsi_live", "TCS", bar, "HOLD")
+    memo.put("ai_live", "INFY", bar, "SELL")
+    frame = dashboard_data.memo_signals("ai_live", "rsi_live")
+    assert list(frame["symbol"]) == ["INFY", "TCS"]
+    assert list(frame["ai_live"]) == ["SELL", "BUY"]
+    assert frame.loc[frame["symbol"] == "TCS", "rsi_live bar"].iloc[0] == bar
+    assert dashboard_data.memo_signals("unused").empty
@@ -0,0 +1,96 @@
+import time
+import pytest
+from exit_engine import ExitEngine, DAY
+
+
+class Broker:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.orders = []
+
+    def __call__(self, symbol, side, qty):
+        self.orders.append((symbol, side, qty))
+        return {"status": self.ok, "data": {"orderid": str(len(self.orders))}}
+
+
+def engine_with(broker, **kwargs):
+    exits = []
+    engine = ExitEngine(take_profit=10, stop_loss=3, trail_buffer=2, max_hold_days=5, exit_fn=broker,
+                        on_exit=lambda symbol, position, price, reason, response: exits.append((symbol, reason, price)),
+                        **kwargs)
+    return engine, exits
+
+
+@pytest.mark.parametrize("prices, reason", [
+    ([105, 110], "TP"),
+    ([99, 97], "SL"),
+    ([104, 101.5], "TRAIL"),       # in profit and 2.5 below the 104 peak
+])
+def test_price_rules(prices, reason):
+    broker = Broker()
+    engine, exits = engine_with(broker)
+    engine.open("RELIANCE.NS", 100.0, 5)
+    fired = [engine.on_tick("RELIANCE-EQ", p) for p in prices]   # ✅ symbols are normalized
+    engine.shutdown()
+    assert fired == [None, reason]
+    assert exits == [("RELIANCE.NS", reason, prices[-1])]
+    assert broker.orders == [("RELIANCE.NS", "SELL", 5)]
+
+
+def test_no_exit_inside_the_band():
+    engine, exits = engine_with(Broker())
+    engine.open("TCS.NS", 100.0, 1)
+    assert [engine.on_tick("TCS.NS", p) for p in (101, 99, 101.5, 98)] == [None] * 4
+    engine.shutdown()
+    assert exits == [] and engine.is_open("TCS.NS")
+
+
+def test_max_hold():
+    engine, exits = engine_with(Broker())
+    engine.open("INFY.NS", 100.0, 1, opened_at=time.time() - 5 * DAY - 1)
+    assert engine.on_tick("INFY.NS", 100.5) == "MAX_HOLD"
+    engine.shutdown()
+    assert exits[0][1] == "MAX_HOLD"
+
+
+def test_each_position_exits_once():
+    broker = Broker()
+    engine, exits = engine_with(broker)
+    engine.open("SBIN.NS", 100.0, 1)
+    engine.on_tick("SBIN.NS", 111)
+    engine.on_tick("SBIN.NS", 112)
+    engine.shutdown()
+    assert len(broker.orders) == 1 and len(exits) == 1
+    assert engine.claim("SBIN.NS")      # monitor_holdings may take over once the engine is done
+
+
+def test_claimed_position_is_left_to_the_caller():
+    broker = Broker()
+    engine, _ = engine_with(broker)
+    engine.open("SBIN.NS", 100.0, 1)
+    assert engine.claim("SBIN.NS")
+    assert engine.on_tick("SBIN.NS", 120) is None
+    engine.shutdown()
+    assert broker.orders == []
+
+
+def test_failed_exit_is_restored_for_a_retry():
+    broker = Broker(ok=False)
+    engine, exits = engine_with(broker)
+    engine.open("ITC.NS", 100.0, 1)
+    engine.on_tick("ITC.NS", 96)
+    engine._pool.shutdown(wait=True)
+    assert exits == [] and engine.is_open("ITC.NS")
+    assert engine.on_tick("ITC.NS", 95) is None    # backs off for RETRY_AFTER seconds
+    assert engine.latency_stats()["failed"] == 1
+
+
+def test_latency_is_recorded_from_the_exchange_timestamp():
+    engine, _ = engine_with(Broker())
+    engine.open("LT.NS", 100.0, 1)
+    engine.on_tick("LT.NS", 111, ts_ns=time.time_ns() - 50_000_000)
+    engine.shutdown()
+    stats = engine.latency_stats()
+    assert stats["exits"] == 1
+    assert stats["exchange_p50_ms"] >= 50
+    assert stats["dispatch_p50_ms"] < stats["ack_p50_ms"] < stats["exchange_p50_ms"]
@@ -0,0 +1,20 @@
+import numpy as np
+from indicator_engine import IncrementalIndicators, verify_against_pandas, RESUM_EVERY
+
+
+def test_streaming_indicators_match_pandas():
+    closes = 100 + np.cumsum(np.random.default_rng(7).normal(0, 1, 3 * RESUM_EVERY))
+    diffs = verify_against_pandas(closes.tolist())
+    assert set(diffs) >= {"Return", "MA10", "MA20", "SMA", "RSI", "MACD", "Signal"}
+    assert max(diffs.values()) < 1e-8
+
+
+def test_snapshot_restore_continues_the_same_stream():
+    closes = 100 + np.cumsum(np.random.default_rng(8).normal(0, 1, 200))
+    live, restored = IncrementalIndicators(), None
+    for i, close in enumerate(closes):
+        expected = live.update(close)
+        if i == 100:
+            restored = IncrementalIndicators.restore(live.snapshot())
+        elif restored is not None:
+            assert restored.update(close) == expected
@@ -0,0 +1,66 @@
+import json
+import time
+from datetime import date
+import pytest
+import instrument_master
+
+SCRIP_MASTER = [
+    {"symbol": "SBIN-EQ", "token": "3045", "exch_seg": "NSE", "lotsize": "1", "tick_size": "5"},
+    {"symbol": "NIFTY28NOV2424000CE", "token": "43210", "exch_seg": "NFO", "lotsize": "25", "tick_size": "5",
+     "strike": "2400000", "expiry": "28NOV2024", "instrumenttype": "OPTIDX", "name": "NIFTY"},
+]
+
+
+@pytest.fixture
+def master(tmp_path, monkeypatch):
+    """Empty cache dir, a one-row master.csv and a switchable scrip master download."""
+    state = {"online": False, "downloads": 0}
+
+    def download(day):
+        state["downloads"] += 1
+        if not state["online"]:
+            raise OSError("network down")
+        path = instrument_master._cache_path(day)
+        with open(path, "w") as f:
+            json.dump(SCRIP_MASTER, f)
+        return path
+
+    (tmp_path / "cache").mkdir()
+    monkeypatch.setattr(instrument_master, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(instrument_master, "_master_csv_records",
+                        lambda: [{"symbol": "RELIANCE", "token": "2885", "exch_seg": "NSE"}])
+    monkeypatch.setattr(instrument_master, "_download_scrip_master", download)
+    monkeypatch.setattr(instrument_master, "_index", None)
+    monkeypatch.setattr(instrument_master, "_rebuild_failed_at", 0.0)
+    monkeypatch.setattr(instrument_master, "_rebuilding", False)
+    return state
+
+
+def _wait_for_rebuild():
+    deadline = time.time() + 5
+    while instrument_master._rebuilding and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_fallback_is_not_stamped_today_and_the_download_is_retried(master, monkeypatch):
+    index = instrument_master.get_index()
+    assert index.built_on < date.today() and index.token("RELIANCE") == "2885"
+
+    # ✅ Within REBUILD_RETRY_SECS: no new download attempt
+    assert instrument_master.get_index() is index and master["downloads"] == 1
+
+    master["online"] = True
+    monkeypatch.setattr(instrument_master, "REBUILD_RETRY_SECS", 0)
+    assert instrument_master.get_index() is index      # stale snapshot while the rebuild runs
+    _wait_for_rebuild()
+    fresh = instrument_master.get_index()
+    assert fresh.built_on == date.today() and fresh.token("SBIN") == "3045"
+    assert fresh.lot_size("NIFTY28NOV2424000CE", "NFO") == 25
+
+
+def test_older_cached_file_keeps_its_own_date(master):
+    path = instrument_master._cache_path(date(2024, 11, 27))
+    with open(path, "w") as f:
+        json.dump(SCRIP_MASTER, f)
+    index = instrument_master.get_index()
+    assert index.built_on == date(2024, 11, 27) and index.token("SBIN-EQ") == "3045"
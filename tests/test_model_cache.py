@@ -0,0 +1,28 @@
+import time
+from types import SimpleNamespace
+import model_cache
+from model_cache import LazyModel
+
+
+def test_failed_load_is_not_retried_until_the_backoff_expires(monkeypatch):
+    calls = []
+
+    def load_model(url):
+        calls.append(url)
+        if len(calls) < 3:
+            raise OSError("gist unreachable")
+        return "fitted model"
+
+    clock = [1000.0]
+    monkeypatch.setattr(model_cache, "load_model", load_model)
+    monkeypatch.setattr(model_cache, "time", SimpleNamespace(monotonic=lambda: clock[0], time=time.time))
+    model = LazyModel("https://example.invalid/model.txt")
+
+    assert not model and not model and len(calls) == 1           # second guard answered from the backoff
+    clock[0] += model_cache.MODEL_RETRY_MIN
+    assert not model and len(calls) == 2
+    clock[0] += model_cache.MODEL_RETRY_MIN                        # backoff doubled: still waiting
+    assert not model and len(calls) == 2
+    clock[0] += model_cache.MODEL_RETRY_MIN
+    assert model and len(calls) == 3
+    assert model._failures == 0 and model._failure is None
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import ohlcv_store
+
+
+def _bars(index, start=100.0):
+    close = start + np.arange(len(index), dtype=np.float64)
+    return pd.DataFrame({"Open": close - 0.5, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(len(index), 1000.0)}, index=index)
+
+
+def _days(n):
+    today = pd.Timestamp.now(tz="UTC").normalize().tz_localize(None)
+    return pd.date_range(end=today, periods=n, freq="D", unit="ns", name="Date")
+
+
+def _store(monkeypatch, tmp_path, download):
+    calls = []
+
+    def fake_download(tickers, interval, period=None, start=None):
+        calls.append({"tickers": tickers, "interval": interval, "period": period, "start": start})
+        return download(calls[-1])
+
+    monkeypatch.setattr(ohlcv_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(ohlcv_store, "OFFLINE", False)
+    monkeypatch.setattr(ohlcv_store, "_download", fake_download)
+    return calls
+
+
+def test_daily_history_round_trips_through_the_store(monkeypatch, tmp_path):
+    days = _days(10)
+    calls = _store(monkeypatch, tmp_path, lambda call: _bars(days))
+
+    first = ohlcv_store.get_history("AAA.NS", period="1mo", interval="1d")
+    second = ohlcv_store.get_history("AAA.NS", period="1mo", interval="1d")
+
+    assert [c["period"] for c in calls] == ["1mo"]                  # second read answered from disk
+    pd.testing.assert_frame_equal(first, _bars(days), check_freq=False)
+    pd.testing.assert_frame_equal(second, first)
+    assert isinstance(np.load(tmp_path / "1d" / "AAA.NS" / "Close.npy", mmap_mode="r"), np.memmap)
+
+
+def test_intraday_history_keeps_its_timezone(monkeypatch, tmp_path):
+    last = pd.Timestamp.now(tz="Asia/Kolkata").floor("15min")
+    bars = pd.date_range(end=last, periods=8, freq="15min", unit="ns", name="Datetime")
+    _store(monkeypatch, tmp_path, lambda call: _bars(bars))
+
+    frame = ohlcv_store.get_history("AAA.NS", period="5d", interval="15m")
+
+    assert str(frame.index.tz) == "Asia/Kolkata"
+    pd.testing.assert_frame_equal(frame, _bars(bars), check_freq=False)
+
+
+def test_refresh_fetches_only_the_tail_and_replaces_the_last_bar(monkeypatch, tmp_path):
+    days = _days(10)
+    stored, tail = days[:-1], days[-2:]
+
+    def download(call):
+        if call["period"]:
+            return _bars(stored)
+        return _bars(tail, start=500.0)      # revised last stored bar + one new bar
+
+    calls = _store(monkeypatch, tmp_path, download)
+    ohlcv_store.get_history("AAA.NS", period="1mo", interval="1d")
+    monkeypatch.setattr(ohlcv_store, "MIN_REFRESH_SECONDS", 0)
+    frame = ohlcv_store.get_history("AAA.NS", period="1mo", interval="1d")
+
+    assert [c["period"] for c in calls] == ["1mo", None]
+    assert pd.Timestamp(calls[1]["start"]) == stored[-1]             # tail starts at the last stored bar
+    assert list(frame.index) == list(days)
+    assert frame["Close"].tolist() == [100.0 + i for i in range(8)] + [500.0, 501.0]
+    assert len(np.load(tmp_path / "1d" / "AAA.NS" / "ts.npy")) == len(days)
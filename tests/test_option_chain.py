@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+import option_chain
+import instrument_master
+from instrument_master import InstrumentIndex
+
+
+def _nifty(expiry, strikes):
+    return [{"symbol": f"NIFTY{expiry:%d%b%y}{strike}{side}".upper(), "token": str(1000 + i), "exch_seg": "NFO",
+             "name": "NIFTY", "strike": str(strike * 100), "expiry": f"{expiry:%d%b%Y}".upper(),
+             "instrumenttype": "OPTIDX", "lotsize": "25"}
+            for i, (strike, side) in enumerate((s, side) for s in strikes for side in ("CE", "PE"))]
+
+
+def test_chain_follows_the_instrument_master_index(monkeypatch):
+    expiry = date.today() + timedelta(days=3)
+    stale = InstrumentIndex(_nifty(expiry, [24000, 24050]), built_on=date.today() - timedelta(days=1))
+    fresh = InstrumentIndex(_nifty(expiry, [24000, 24050, 24100]))
+    current = {"index": stale}
+    monkeypatch.setattr(instrument_master, "get_index", lambda: current["index"])
+    monkeypatch.setattr(option_chain, "_chain", None)
+
+    chain = option_chain.get_chain()
+    assert chain.source_index is stale and option_chain.get_chain() is chain
+    assert chain.option("NIFTY", 24110, "CE")[2] == 24050
+
+    current["index"] = fresh    # ✅ today's scrip master swapped in by the background rebuild
+    rebuilt = option_chain.get_chain()
+    assert rebuilt is not chain and rebuilt.source_index is fresh
+    symbol, _, strike, nearest = rebuilt.option("NIFTY", 24110, "CE")
+    assert strike == 24100 and nearest == expiry and symbol.endswith("CE")
@@ -0,0 +1,112 @@
+import time
+import threading
+import pytest
+from broker_client import BrokerClient
+from fake_broker import start_fake_broker, ORDER_PATH
+from order_pipeline import OrderPipeline, OrderStateUnknown, find_order_by_tag
+
+
+def test_lost_response_is_deduplicated_by_ordertag():
+    # ✅ Every placeOrder reaches the book but its reply is held back past the client timeout
+    server, broker, port = start_fake_broker(timeout_rate=1.0, stall=0.3)
+    client = BrokerClient("127.0.0.1", port, use_tls=False, timeout=0.1)
+
+    def place_fn(symbol, side, qty, ordertag=None):
+        return client.request("POST", f"{ORDER_PATH}/placeOrder",
+                              {"tradingsymbol": symbol, "transactiontype": side, "quantity": qty, "ordertag": ordertag})
+
+    def find_fn(tag):
+        return find_order_by_tag(tag, lambda: client.request("GET", f"{ORDER_PATH}/getOrderBook"))
+
+    pipeline = OrderPipeline(place_fn, find_fn, rate=100, burst=10, backoff=0.01)
+    results = pipeline.place_many([(f"SYM{i}", "BUY", 1) for i in range(5)], timeout=5)
+    pipeline.close()
+    server.shutdown()
+
+    assert all(r["status"] and r.get("deduplicated") for r in results)
+    assert sorted(r["data"]["orderid"] for r in results) == sorted(broker.orders)
+    tags = [o["ordertag"] for o in broker.orders.values()]
+    assert len(tags) == len(set(tags)) == 5
+    assert pipeline.stats()["deduped"] == 5
+
+
+def _timed_out_placement(book):
+    """place_fn whose first request reaches the book (after `book.lag` s) but whose reply is lost."""
+    placed = []
+
+    def place_fn(symbol, side, qty, ordertag=None):
+        placed.append(ordertag)
+        threading.Timer(book["lag"], lambda: book["orders"].append({"ordertag": ordertag, "orderid": "42"})).start()
+        raise TimeoutError("read timed out")
+
+    return place_fn, placed
+
+
+def test_failed_order_book_read_is_never_treated_as_not_found():
+    book = {"lag": 0.0, "orders": []}
+    place_fn, placed = _timed_out_placement(book)
+
+    def find_fn(tag):
+        raise OSError("order book unavailable")
+
+    pipeline = OrderPipeline(place_fn, find_fn, backoff=0.01, workers=1)
+    with pytest.raises(OrderStateUnknown):
+        pipeline.submit("TCS", "BUY", 1).result(timeout=5)
+    pipeline.close()
+    assert len(placed) == 1 and pipeline.stats()["unknown"] == 1
+
+
+def test_order_book_lag_is_waited_out_before_re_placing():
+    book = {"lag": 0.2, "orders": []}
+    place_fn, placed = _timed_out_placement(book)
+    find_fn = lambda tag: next((o for o in book["orders"] if o["ordertag"] == tag), None)
+
+    pipeline = OrderPipeline(place_fn, find_fn, backoff=0.01, workers=1, book_lag=1.0)
+    response = pipeline.submit("TCS", "BUY", 1).result(timeout=5)
+    pipeline.close()
+    assert response["deduplicated"] and response["data"]["orderid"] == "42"
+    assert len(placed) == 1
+
+
+def test_find_order_by_tag_raises_on_an_error_payload():
+    with pytest.raises(RuntimeError):
+        find_order_by_tag("T1", lambda: {"status": False, "message": "session expired"})
+    assert find_order_by_tag("T1", lambda: {"status": True, "data": None}) is None
+
+
+def test_retryable_error_is_retried_with_the_same_tag():
+    calls = []
+
+    def place_fn(symbol, side, qty, ordertag=None):
+        calls.append(ordertag)
+        if len(calls) == 1:
+            return {"status": False, "errorcode": "AB1004", "message": "try again"}
+        return {"status": True, "data": {"orderid": "1"}}
+
+    pipeline = OrderPipeline(place_fn, lambda tag: None, backoff=0.01, workers=1)
+    assert pipeline.submit("TCS", "BUY", 1, tag="T1").result(timeout=5)["status"]
+    pipeline.close()
+    assert calls == ["T1", "T1"]
+
+
+def test_rejection_is_not_retried():
+    calls = []
+
+    def place_fn(symbol, side, qty, ordertag=None):
+        calls.append(symbol)
+        return {"status": False, "errorcode": "AB4008", "message": "insufficient funds"}
+
+    pipeline = OrderPipeline(place_fn, lambda tag: None, backoff=0.01, workers=1)
+    response = pipeline.submit("TCS", "BUY", 1).result(timeout=5)
+    pipeline.close()
+    assert response["errorcode"] == "AB4008" and calls == ["TCS"]
+    assert pipeline.stats()["rejected"] == 1
+
+
+def test_submissions_respect_the_rate_limit():
+    pipeline = OrderPipeline(lambda *a, **k: {"status": True, "data": {}}, lambda tag: None, rate=50, burst=5)
+    start = time.perf_counter()
+    pipeline.place_many([("SYM", "BUY", 1)] * 20, timeout=5)
+    elapsed = time.perf_counter() - start
+    pipeline.close()
+    assert elapsed >= (20 - 5) / 50 * 0.9
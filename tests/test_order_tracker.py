@@ -0,0 +1,50 @@
+import time
+import pytest
+from broker_client import BrokerClient
+from fake_broker import start_fake_broker, ORDER_PATH
+from order_tracker import OrderTracker, FILLED
+
+
+@pytest.fixture
+def broker():
+    server, broker, port = start_fake_broker()
+    client = BrokerClient("127.0.0.1", port, use_tls=False, pool_size=2)
+    yield client
+    client.close()
+    server.shutdown()
+
+
+def _tracker(client, **kwargs):
+    return OrderTracker(lambda: client.request("POST", f"{ORDER_PATH}/getOrderBook"),
+                        lambda: client.request("POST", f"{ORDER_PATH}/getTradeBook"), **kwargs)
+
+
+def test_one_poll_resolves_every_order(broker):
+    ids = [broker.request("POST", f"{ORDER_PATH}/placeOrder", {"tradingsymbol": f"SYM{i}", "quantity": 1})
+           ["data"]["orderid"] for i in range(20)]
+    tracker = _tracker(broker)
+    events, fills = tracker.poll()
+    assert len(events) == len(fills) == 20 and tracker.stats()["requests"] == 2
+    assert all(tracker.status(o)["state"] == FILLED for o in ids)
+
+
+def test_unknown_tracked_order_stops_fast_polling(broker):
+    tracker = _tracker(broker, fast=0.02, slow=30, watch_timeout=0.2)
+    tracker.track("999999")     # the broker never lists it
+    time.sleep(0.1)
+    assert tracker._live()
+    time.sleep(0.4)
+    polls = tracker.stats()["polls"]
+    time.sleep(0.3)
+    tracker.stop()
+    assert not tracker._live() and tracker.stats()["expired"] == 1
+    assert tracker.stats()["polls"] == polls      # back on the slow interval
+
+
+def test_tracked_order_is_live_until_terminal(broker):
+    orderid = broker.request("POST", f"{ORDER_PATH}/placeOrder", {"tradingsymbol": "SBIN-EQ", "quantity": 1})["data"]["orderid"]
+    tracker = _tracker(broker, fast=0.02, slow=30, watch_timeout=0.2)
+    tracker.track(orderid)
+    assert tracker.wait_for(orderid, timeout=5)["state"] == FILLED
+    tracker.stop()
+    assert not tracker._live() and tracker.stats()["expired"] == 0
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import FEATURES, compute_features, latest_feature_rows, right_aligned_panel
+
+LENGTHS = {"AAA": 60, "BBB": 35, "CCC": 21, "DDD": 12}   # DDD is too short to score
+
+
+def _history(symbol):
+    n = LENGTHS[symbol]
+    rng = np.random.default_rng(sum(map(ord, symbol)))
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({"Close": close}, index=pd.date_range(end="2024-06-28", periods=n, freq="B"))
+
+
+def _pandas_features(close):
+    """The original per-symbol pandas pipeline (helpers.compute_rsi, ewm MACD), independent of indicators.py."""
+    delta = close.diff()
+    rs = delta.clip(lower=0).rolling(14).mean() / (-delta.clip(upper=0)).rolling(14).mean()
+    ema12, ema26 = close.ewm(span=12, adjust=False).mean(), close.ewm(span=26, adjust=False).mean()
+    macd = ema12 - ema26
+    return pd.DataFrame({
+        "Return": close.pct_change(), "MA10": close.rolling(10).mean(), "MA20": close.rolling(20).mean(),
+        "SMA": close.rolling(14).mean(), "RSI": 100 - 100 / (1 + rs), "EMA12": ema12, "EMA26": ema26,
+        "MACD": macd, "Signal": macd.ewm(span=9, adjust=False).mean(),
+    })[FEATURES]
+
+
+def test_panel_latest_rows_match_the_pandas_pipeline():
+    histories = [_history(symbol) for symbol in LENGTHS]
+    panel = right_aligned_panel([df["Close"].to_numpy() for df in histories])
+    rows, has_row = latest_feature_rows(compute_features(panel, FEATURES), FEATURES)
+    for i, df in enumerate(histories):
+        expected = _pandas_features(df["Close"]).dropna()
+        assert has_row[i] == (not expected.empty)
+        if has_row[i]:
+            np.testing.assert_allclose(rows[i], expected.iloc[-1].to_numpy(), rtol=0, atol=1e-9)
+
+
+class _Model:
+    """Stands in for the daily model: BUY when RSI is above 50 and MACD above its signal line."""
+
+    def predict(self, X):
+        return ((X["RSI"] > 50) & (X["MACD"] > X["Signal"])).astype(int).to_numpy()
+
+
+def test_scan_universe_matches_per_symbol_predict_signal(monkeypatch):
+    bot = pytest.importorskip("bot")
+    import signal_memo
+
+    monkeypatch.setattr(bot, "model", _Model())
+    monkeypatch.setattr(bot, "download_history_batch", lambda symbols, **_: {s: _history(s) for s in symbols})
+    monkeypatch.setattr(bot, "get_history", lambda symbol, **_: _history(symbol))
+
+    monkeypatch.setattr(bot, "signal_memo", signal_memo.SignalMemo())
+    serial = {symbol: bot.predict_signal(symbol) for symbol in LENGTHS}
+    monkeypatch.setattr(bot, "signal_memo", signal_memo.SignalMemo())   # the scan must not read serial results
+    batch, _ = bot.scan_universe(list(LENGTHS))
+
+    assert batch == serial
+    assert serial["DDD"] == "HOLD" and set(serial.values()) >= {"BUY", "SELL"}
+    assert bot.verify_scan_parity(list(LENGTHS)) == {}
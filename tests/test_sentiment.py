@@ -0,0 +1,41 @@
+import os
+import time
+from sentiment import FixtureSource, SentimentService
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "sentiment")
+
+
+class CountingSource(FixtureSource):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.fetches = []
+
+    def fetch(self, session, symbol):
+        self.fetches.append(symbol)
+        return super().fetch(session, symbol)
+
+
+def test_recorded_pages_are_counted():
+    service = SentimentService(FixtureSource(FIXTURES))
+    scores = service.scores(["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS"])
+    assert scores == {"RELIANCE.NS": 6, "TCS.NS": 1, "INFY.NS": 0, "HDFCBANK.NS": 2}
+
+
+def test_scores_are_cached_for_ttl():
+    source = CountingSource(FIXTURES)
+    service = SentimentService(source, ttl=60)
+    service.scores(["RELIANCE.NS", "TCS.NS"])
+    assert service.scores(["RELIANCE.NS", "TCS.NS"]) == {"RELIANCE.NS": 6, "TCS.NS": 1}
+    assert sorted(source.fetches) == ["RELIANCE.NS", "TCS.NS"]
+
+
+def test_failure_is_cached_for_failure_ttl_only():
+    source = CountingSource(FIXTURES)
+    service = SentimentService(source, ttl=60, failure_ttl=0.2)
+    assert service.score("MISSING.NS") is None
+    assert service.score("MISSING.NS") is None
+    assert source.fetches == ["MISSING.NS"]
+    time.sleep(0.25)
+    assert service.score("MISSING.NS") is None
+    assert source.fetches == ["MISSING.NS", "MISSING.NS"]
+    assert service.stats()["failures"] == 2
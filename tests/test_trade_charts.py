@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("plotly")
+import trade_charts
+from trade_charts import downsample_ohlc, build_trade_chart, trade_chart
+
+
+def _candles(n=10000):
+    idx = pd.date_range("2024-01-01", periods=n, freq="min")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.1, n))
+    return pd.DataFrame({"Open": close, "High": close + 0.2, "Low": close - 0.2, "Close": close}, index=idx)
+
+
+def _trades(candles, n=300):
+    picks = np.sort(np.random.default_rng(1).integers(0, len(candles), n))
+    close = candles["Close"].to_numpy()
+    return pd.DataFrame({"timestamp": candles.index[picks], "entry": close[picks], "exit_price": close[picks] + 1,
+                         "action": np.where(picks % 2, "BUY", "SELL"), "qty": 1, "reason": "test"})
+
+
+def test_downsample_keeps_the_true_high_and_low():
+    df = _candles()
+    df.iloc[1234, df.columns.get_loc("High")] = 500.0     # one-minute spike
+    df.iloc[4321, df.columns.get_loc("Low")] = 1.0
+    bars = downsample_ohlc(df, max_points=100)
+    assert len(bars) == 100
+    assert bars["High"].max() == 500.0 and bars["Low"].min() == 1.0
+    assert bars["Open"].iloc[0] == df["Open"].iloc[0] and bars["Close"].iloc[-1] == df["Close"].iloc[-1]
+
+
+def test_markers_are_one_trace_per_side():
+    df = _candles()
+    fig = build_trade_chart("TEST", df, _trades(df), max_candles=200, max_markers=50)
+    names = [trace["name"] for trace in fig.data]
+    assert names == ["Candles", "BUY", "SELL"]
+    assert all(len(trace["x"]) <= 50 for trace in fig.data[1:])
+
+
+def test_cache_misses_when_an_older_candle_is_corrected(monkeypatch):
+    monkeypatch.setattr(trade_charts, "_cache", type(trade_charts._cache)())
+    df = _candles(1000)
+    first = trade_chart("TEST", df, range_key="1d")
+    assert trade_chart("TEST", df.copy(), range_key="1d") is first
+    corrected = df.copy()
+    corrected.iloc[10, corrected.columns.get_loc("Close")] += 1.0
+    assert trade_chart("TEST", corrected, range_key="1d") is not first
@@ -0,0 +1,107 @@
+import os
+import threading
+import pytest
+from trade_journal import TradeJournal, to_frame
+
+
+def _fill(journal):
+    for i in range(6):
+        journal.append(timestamp=f"2024-01-0{1 + i % 3} 10:00:00", symbol=f"SYM{i % 2}", action="SELL",
+                       qty=1, entry=100.0, exit_price=101.5, pnl=1.5, strategy="test")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "trade_log.csv")
+
+
+def test_queries_read_only_matching_records(path):
+    journal = TradeJournal(path, fsync=False)
+    _fill(journal)
+    assert [r["symbol"] for r in journal.for_date("2024-01-01")] == ["SYM0", "SYM1"]
+    assert len(journal.for_symbol("SYM0")) == 3
+    assert [r["timestamp"][:10] for r in journal.for_symbol("SYM1", since="2024-01-02")] == ["2024-01-02", "2024-01-03"]
+    assert journal.tail(1)[0]["timestamp"].startswith("2024-01-03")
+    assert to_frame(journal.all())["pnl"].sum() == pytest.approx(9.0)
+    journal.close()
+
+
+def test_partial_last_line_is_cut_on_reopen(path):
+    journal = TradeJournal(path, fsync=False)
+    _fill(journal)
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b"2024-01-04 10:00:00,SYM9,BU")   # crash mid-write
+    journal = TradeJournal(path, fsync=False)
+    assert len(journal) == 6 and "SYM9" not in journal.symbols()
+    assert open(path, "rb").read().endswith(b"\n")
+    journal.append(timestamp="2024-01-04 10:00:00", symbol="SYM9", action="BUY", qty=1)
+    assert journal.tail(1)[0]["symbol"] == "SYM9"
+    journal.close()
+
+
+def test_missing_index_entries_are_rebuilt_from_the_journal(path):
+    journal = TradeJournal(path, fsync=False)
+    _fill(journal)
+    journal.close()
+    index_path = f"{path}.idx"
+    lines = open(index_path).readlines()
+    open(index_path, "w").writelines(lines[:2])   # crash before the index writes
+    journal = TradeJournal(path, fsync=False)
+    assert len(journal) == 6 and len(journal.for_symbol("SYM1")) == 3
+    assert len(open(index_path).readlines()) == 6
+    journal.close()
+
+
+def test_index_past_a_replaced_journal_is_ignored(path):
+    journal = TradeJournal(path, fsync=False)
+    _fill(journal)
+    journal.close()
+    os.remove(path)
+    journal = TradeJournal(path, fsync=False)
+    journal.append(timestamp="2024-02-01 10:00:00", symbol="NEW", action="BUY", qty=1)
+    journal.close()
+    journal = TradeJournal(path, fsync=False)
+    assert [r["symbol"] for r in journal.all()] == ["NEW"]
+    assert journal.for_date("2024-01-01") == []
+    journal.close()
+
+
+def test_writers_in_other_processes_are_seen_by_queries(path):
+    bot, dashboard = TradeJournal(path, fsync=False), TradeJournal(path, fsync=False)
+    bot.append(timestamp="2024-03-01 09:30:00", symbol="TCS", action="BUY", qty=1)
+    assert dashboard.tail(1)[0]["symbol"] == "TCS"
+
+    def write(journal, symbol):
+        for _ in range(50):
+            journal.append(timestamp="2024-03-01 10:00:00", symbol=symbol, action="BUY", qty=1)
+
+    threads = [threading.Thread(target=write, args=(j, s)) for j, s in ((bot, "INFY"), (dashboard, "SBIN"))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(bot) == len(dashboard) == 101
+    assert len(bot.for_symbol("SBIN")) == len(dashboard.for_symbol("INFY")) == 50
+    bot.close()
+    dashboard.close()
+
+    # ✅ Every sidecar entry written by either writer points at its own line
+    reopened = TradeJournal(path, fsync=False)
+    assert len(open(f"{path}.idx").readlines()) == 101
+    assert [r["symbol"] for r in reopened.for_date("2024-03-01")].count("INFY") == 50
+    reopened.close()
+
+
+def test_sidecar_entry_pointing_at_the_wrong_line_is_rebuilt(path):
+    journal = TradeJournal(path, fsync=False)
+    _fill(journal)
+    journal.close()
+    index_path = f"{path}.idx"
+    lines = open(index_path).readlines()
+    offset, length, day, symbol = lines[3].rstrip("\n").split(",")
+    lines[3] = f"{offset},{length},{day},SYM9\n"     # same bounds, wrong record
+    open(index_path, "w").writelines(lines)
+    journal = TradeJournal(path, fsync=False)
+    assert "SYM9" not in journal.symbols() and len(journal.for_symbol("SYM1")) == 3
+    journal.close()
@@ -0,0 +1,17 @@
+from websocket_data import BAR_NS, CandleRing
+
+
+def test_frame_is_not_changed_by_later_ticks_or_a_wrapped_ring():
+    ring = CandleRing(capacity=3)
+    for minute in range(3):
+        ring.update(minute * BAR_NS, 100.0 + minute, 10.0)
+    frame = ring.frame()
+
+    ring.update(2 * BAR_NS + 1, 150.0, 5.0)              # current bar keeps ticking
+    for minute in range(3, 7):                            # ...and the ring wraps past every handed-out row
+        ring.update(minute * BAR_NS, 200.0 + minute, 10.0)
+
+    assert frame["Close"].tolist() == [100.0, 101.0, 102.0]
+    assert frame["Volume"].tolist() == [10.0, 10.0, 10.0]
+    assert ring.frame()["Close"].tolist() == [204.0, 205.0, 206.0]
+    frame["RSI"] = 50.0                                   # consumers own their copy
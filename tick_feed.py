@@ -0,0 +1,190 @@
+# tick_feed.py
+# SmartAPI WebSocket 2.0 LTP feed for the bot process. Binary ticks are decoded and handed to
+# websocket_data.update_realtime_candle (price snapshot, 1-min candles, live indicators and tick listeners
+# such as bot.exit_engine). Subscriptions follow the open positions; the socket reconnects with backoff.
+import os
+import json
+import time
+import struct
+import threading
+from collections import deque
+import numpy as np
+from credentials import credentials
+from instrument_master import get_token
+
+FEED_URL = "wss://smartapisocket.angelone.in/smart-stream"
+HEARTBEAT_SECS = 10                 # SmartAPI drops a socket that sends no "ping" for 30 s
+RECONNECT_MAX = float(os.getenv("TICK_FEED_RECONNECT_MAX", "60"))
+LATENCY_SAMPLES = 10000
+MODE_LTP = 1
+ACTION_UNSUBSCRIBE, ACTION_SUBSCRIBE = 0, 1
+EXCHANGE_TYPES = {"NSE": 1, "NFO": 2, "BSE": 3, "BFO": 4, "MCX": 5, "CDS": 13}
+
+# ✅ LTP-mode packet: mode, exchange type, token (NUL padded), sequence, exchange time (ms), LTP (paise)
+LTP_PACKET = struct.Struct("<BB25sqqq")
+
+
+def parse_ltp_packet(message):
+    """(exchange_type, token, exchange_ts_ms, ltp) from a binary tick, or None for anything else."""
+    if not isinstance(message, (bytes, bytearray)) or len(message) < LTP_PACKET.size:
+        return None
+    _, exchange_type, token, _, exchange_ts, ltp = LTP_PACKET.unpack_from(message)
+    return exchange_type, token.split(b"\0", 1)[0].decode("ascii"), exchange_ts, ltp / 100.0
+
+
+class TickFeed:
+    """One websocket for every subscribed symbol; ticks go to on_tick(symbol, ltp, exchange_ts_ms)."""
+
+    def __init__(self, on_tick=None, url=FEED_URL, mode=MODE_LTP):
+        if on_tick is None:
+            from websocket_data import update_realtime_candle as on_tick
+        self.on_tick = on_tick
+        self.url = url
+        self.mode = mode
+        self._symbols = {}          # (exchange_type, token) -> symbol as the caller named it
+        self._lock = threading.Lock()
+        self._ws = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lag_ms = deque(maxlen=LATENCY_SAMPLES)     # exchange timestamp -> tick decoded here
+        self._stats = {"ticks": 0, "connects": 0, "errors": 0}
+
+    # --- subscriptions ---------------------------------------------------------------------
+    def _keys(self, symbols, exchange):
+        keys = {}
+        for symbol in symbols:
+            token = get_token(symbol, exchange)
+            if token is None:
+                print(f"⚠️ Tick feed: no token for {symbol}")
+                continue
+            keys[(EXCHANGE_TYPES[exchange], token)] = symbol
+        return keys
+
+    def subscribe(self, *symbols, exchange="NSE"):
+        """Adds symbols to the feed (starting it on first use)."""
+        with self._lock:
+            new = {key: symbol for key, symbol in self._keys(symbols, exchange).items() if key not in self._symbols}
+            self._symbols.update(new)
+        if new:
+            self._send(ACTION_SUBSCRIBE, new)
+        self.start()
+
+    def unsubscribe(self, *symbols, exchange="NSE"):
+        with self._lock:
+            gone = {key: symbol for key, symbol in self._keys(symbols, exchange).items()
+                    if self._symbols.pop(key, None) is not None}
+        if gone:
+            self._send(ACTION_UNSUBSCRIBE, gone)
+
+    def symbols(self):
+        with self._lock:
+            return sorted(self._symbols.values())
+
+    def _request(self, action, keys):
+        token_list = {}
+        for exchange_type, token in keys:
+            token_list.setdefault(exchange_type, []).append(token)
+        return {"correlationID": "smartbot", "action": action, "params": {
+            "mode": self.mode,
+            "tokenList": [{"exchangeType": t, "tokens": tokens} for t, tokens in token_list.items()],
+        }}
+
+    def _send(self, action, keys):
+        ws = self._ws
+        if ws is None:
+            return          # _on_open subscribes everything once connected
+        try:
+            ws.send(json.dumps(self._request(action, keys)))
+        except Exception as e:
+            print(f"⚠️ Tick feed (un)subscribe failed, applied on reconnect: {e}")
+
+    # --- socket ----------------------------------------------------------------------------
+    def _on_open(self, ws):
+        self._stats["connects"] += 1
+        with self._lock:
+            keys = list(self._symbols)
+        if keys:
+            ws.send(json.dumps(self._request(ACTION_SUBSCRIBE, keys)))
+        print(f"✅ Tick feed connected ({len(keys)} symbols)")
+
+    def _on_message(self, ws, message):
+        tick = parse_ltp_packet(message)
+        if tick is None:
+            return          # "pong" heartbeats and other modes
+        exchange_type, token, exchange_ts, ltp = tick
+        symbol = self._symbols.get((exchange_type, token))
+        if symbol is None:
+            return
+        self._stats["ticks"] += 1
+        self._lag_ms.append(time.time() * 1000 - exchange_ts)
+        self.on_tick(symbol, ltp, exchange_ts)
+
+    def _on_error(self, ws, error):
+        self._stats["errors"] += 1
+        print(f"❌ Tick feed error: {error}")
+
+    def _connect(self):
+        import websocket
+
+        tokens = credentials.tokens()
+        headers = {
+            "Authorization": tokens["access_token"],
+            "x-api-key": tokens.get("api_key"),
+            "x-client-code": tokens.get("client_code"),
+            "x-feed-token": tokens.get("feed_token"),
+        }
+        self._ws = websocket.WebSocketApp(self.url, header=headers, on_open=self._on_open,
+                                          on_message=self._on_message, on_error=self._on_error)
+        self._ws.run_forever(ping_interval=HEARTBEAT_SECS, ping_payload="ping")
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self._connect()
+            except Exception as e:
+                self._on_error(None, e)
+            finally:
+                self._ws = None
+            if time.monotonic() - started > 2 * RECONNECT_MAX:
+                backoff = 1.0       # the connection was healthy for a while
+            self._stop.wait(backoff)
+            backoff = min(RECONNECT_MAX, backoff * 2)
+
+    def start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="tick-feed", daemon=True)
+                    self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+
+    def stats(self):
+        """Ticks / reconnects plus exchange-to-bot lag in ms (includes clock skew to the exchange)."""
+        stats = dict(self._stats, symbols=len(self._symbols), connected=self._ws is not None)
+        lag = np.fromiter(list(self._lag_ms), dtype=np.float64)
+        if len(lag):
+            stats["lag_p50_ms"] = float(np.percentile(lag, 50))
+            stats["lag_p99_ms"] = float(np.percentile(lag, 99))
+        return stats
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_tick_feed():
+    """Process-wide feed into websocket_data (connects on the first subscribe)."""
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                _feed = TickFeed()
+    return _feed
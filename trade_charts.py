@@ -0,0 +1,132 @@
+# trade_charts.py
+# Trade chart builder for the dashboard and bot: candles are cut to the viewport and bucketed into at most
+# CHART_MAX_CANDLES OHLC bars (first open / max high / min low / last close, so spikes survive), trade
+# markers are one vectorized Scatter per side, and finished figures are cached by (symbol, range, data).
+import os
+import zlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+CHART_MAX_CANDLES = int(os.getenv("CHART_MAX_CANDLES", "1500"))
+CHART_MAX_MARKERS = int(os.getenv("CHART_MAX_MARKERS", "2000"))    # per side
+CHART_CACHE_SIZE = 64
+SIDE_STYLE = {
+    "BUY": dict(color="green", symbol="triangle-up"),
+    "SELL": dict(color="red", symbol="triangle-down"),
+}
+
+
+def downsample_ohlc(df, max_points=CHART_MAX_CANDLES):
+    """Merges consecutive candles into <= max_points buckets, keeping each bucket's true high and low."""
+    n = len(df)
+    if n <= max_points:
+        return df
+    starts = np.linspace(0, n, max_points, endpoint=False).astype(np.int64)
+    out = {}
+    if "Open" in df:
+        out["Open"] = df["Open"].to_numpy()[starts]
+    if "High" in df:
+        out["High"] = np.maximum.reduceat(df["High"].to_numpy(dtype=np.float64), starts)
+    if "Low" in df:
+        out["Low"] = np.minimum.reduceat(df["Low"].to_numpy(dtype=np.float64), starts)
+    if "Close" in df:
+        out["Close"] = df["Close"].to_numpy()[np.append(starts[1:] - 1, n - 1)]
+    if "Volume" in df:
+        out["Volume"] = np.add.reduceat(df["Volume"].to_numpy(dtype=np.float64), starts)
+    return pd.DataFrame(out, index=df.index[starts])
+
+
+def thin(frame, max_points):
+    """Evenly spaced subset of rows (always keeps the last one)."""
+    if len(frame) <= max_points:
+        return frame
+    keep = np.unique(np.append(np.linspace(0, len(frame) - 1, max_points - 1).astype(np.int64), len(frame) - 1))
+    return frame.iloc[keep]
+
+
+def marker_traces(trades, start=None, end=None, max_markers=CHART_MAX_MARKERS):
+    """One Scatter per side for every trade in [start, end]: BUY at entry, SELL at exit_price (else entry)."""
+    if trades is None or trades.empty:
+        return []
+    ts = pd.to_datetime(trades["timestamp"], errors="coerce", format="mixed")
+    entry = pd.to_numeric(trades.get("entry"), errors="coerce")
+    exit_price = pd.to_numeric(trades.get("exit_price"), errors="coerce") if "exit_price" in trades else entry
+    action = trades["action"].astype(str).str.upper()
+    price = entry.where(action == "BUY", exit_price.fillna(entry))
+    frame = pd.DataFrame({"ts": ts, "price": price, "action": action,
+                          "qty": trades.get("qty", ""), "reason": trades.get("reason", "")})
+    frame = frame.dropna(subset=["ts", "price"])
+    if start is not None and len(frame):
+        tz, ts_tz = getattr(start, "tz", None), frame["ts"].dt.tz
+        if tz is not None and ts_tz is None:
+            frame["ts"] = frame["ts"].dt.tz_localize(tz)
+        elif tz is None and ts_tz is not None:
+            frame["ts"] = frame["ts"].dt.tz_localize(None)
+        frame = frame[(frame["ts"] >= start) & (frame["ts"] <= end)]
+    traces = []
+    for side, style in SIDE_STYLE.items():
+        rows = thin(frame[frame["action"] == side], max_markers)
+        if rows.empty:
+            continue
+        hover = side + " ×" + rows["qty"].astype(str) + " @ ₹" + rows["price"].round(2).astype(str) \
+            + " " + rows["reason"].fillna("").astype(str)
+        traces.append(go.Scatter(x=rows["ts"].to_numpy(), y=rows["price"].to_numpy(), mode="markers", name=side,
+                                 marker=dict(size=10, **style), hovertext=hover.to_numpy(), hoverinfo="text+x"))
+    return traces
+
+
+def build_trade_chart(symbol, candles, trades=None, start=None, end=None,
+                      max_candles=CHART_MAX_CANDLES, max_markers=CHART_MAX_MARKERS, title=None):
+    """Candlestick (or close line) for the viewport plus one marker trace per side."""
+    candles = candles if candles is not None else pd.DataFrame()
+    if len(candles) and (start is not None or end is not None):
+        candles = candles.loc[start:end]
+    bars = downsample_ohlc(candles.dropna(subset=[c for c in ("Close",) if c in candles]), max_candles)
+    fig = go.Figure()
+    if len(bars) and {"Open", "High", "Low", "Close"} <= set(bars.columns):
+        fig.add_trace(go.Candlestick(x=bars.index, open=bars["Open"].to_numpy(), high=bars["High"].to_numpy(),
+                                     low=bars["Low"].to_numpy(), close=bars["Close"].to_numpy(), name="Candles"))
+    elif len(bars) and "Close" in bars:
+        fig.add_trace(go.Scatter(x=bars.index, y=bars["Close"].to_numpy(), mode="lines", name="Price"))
+    window = (bars.index[0], bars.index[-1]) if len(bars) else (None, None)
+    for trace in marker_traces(trades, *window, max_markers=max_markers):
+        fig.add_trace(trace)
+    fig.update_layout(title=title or f"{symbol} Trade Chart", xaxis_rangeslider_visible=False,
+                      xaxis_title="Date", yaxis_title="Price")
+    return fig
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _fingerprint(df):
+    """Length, last timestamp and a checksum over every row, so a rewritten older candle or trade
+    (e.g. a yfinance adjustment in the OHLCV store) changes the cache key."""
+    if df is None or not len(df):
+        return 0
+    numeric = [c for c in ("Open", "High", "Low", "Close") if c in df]
+    if numeric:     # candles: checksum of the raw price columns (~5 ms per 100k rows)
+        checksum = zlib.crc32(np.ascontiguousarray(df[numeric].to_numpy(dtype=np.float64)).tobytes())
+    else:           # trade log: mixed dtypes
+        checksum = int(pd.util.hash_pandas_object(df, index=False).sum())
+    return (len(df), str(df.index[-1]), checksum)
+
+
+def trade_chart(symbol, candles, trades=None, range_key=None, **kwargs):
+    """build_trade_chart memoized by (symbol, range_key) and a cheap fingerprint of the inputs."""
+    key = (symbol, range_key, _fingerprint(candles), _fingerprint(trades))
+    with _cache_lock:
+        fig = _cache.get(key)
+        if fig is not None:
+            _cache.move_to_end(key)
+            return fig
+    fig = build_trade_chart(symbol, candles, trades, **kwargs)
+    with _cache_lock:
+        _cache[key] = fig
+        while len(_cache) > CHART_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return fig
@@ -0,0 +1,279 @@
+# trade_journal.py
+# Append-only trade journal (trade_log.csv, headerless, fixed 17-column schema). Each record is one
+# O_APPEND write followed by fsync, so a crash leaves at most a partial last line, which is cut off on open.
+# A sidecar index (offset, length, date, symbol per record) lets date / symbol queries read only the
+# matching lines with pread instead of re-parsing the whole file. Writers in several processes serialise on
+# an flock, and each process indexes the others' appends before answering a query.
+import os
+import io
+import csv
+import threading
+from contextlib import contextmanager
+from datetime import datetime, date as date_cls
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:     # Windows: single-process use only
+    fcntl = None
+
+TRADE_LOG_FILE = os.getenv("TRADE_LOG_FILE", "trade_log.csv")
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "1") != "0"
+
+COLUMNS = [
+    "timestamp", "symbol", "action", "qty", "entry", "tp", "sl", "exit_price", "pnl", "status",
+    "strategy", "reason", "holding_days", "exit_time", "trailing_sl_used", "market_condition",
+    "model_confidence",
+]
+NUMERIC_COLUMNS = ["qty", "entry", "tp", "sl", "exit_price", "pnl", "holding_days", "model_confidence"]
+
+
+def _format(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    if isinstance(value, float):
+        return f"{value:.4f}".rstrip("0").rstrip(".")
+    return str(value)
+
+
+def encode_record(record):
+    """One CSV line (with trailing newline) in COLUMNS order; unknown keys are rejected."""
+    unknown = set(record) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown trade journal fields: {sorted(unknown)}")
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow([_format(record.get(c)) for c in COLUMNS])
+    return buffer.getvalue().encode("utf-8")
+
+
+def decode_line(line):
+    """Parses one journal line into a dict (older, shorter rows are padded with "")."""
+    values = next(csv.reader([line.decode("utf-8").rstrip("\n")]), [])
+    values = (values + [""] * len(COLUMNS))[:len(COLUMNS)]
+    return dict(zip(COLUMNS, values))
+
+
+def _index_key(record):
+    return record["timestamp"][:10], record["symbol"]
+
+
+class TradeJournal:
+    """Crash-safe append-only journal with an in-memory (date, symbol) -> offsets index.
+
+    Several processes (bot, scheduler, both dashboards) append to the same file: appends and recovery hold
+    an exclusive flock, and every query first indexes whatever other processes appended since.
+    """
+
+    def __init__(self, path=TRADE_LOG_FILE, fsync=JOURNAL_FSYNC):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._reset()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._index_fd = os.open(self.index_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        with self._file_lock():
+            self._recover()
+
+    def _reset(self):
+        self._entries = []        # [(offset, length, day, symbol)] in file order
+        self._by_date = {}        # "YYYY-MM-DD" -> [entry position]
+        self._by_symbol = {}      # symbol -> [entry position]
+        self._indexed_to = 0      # journal bytes covered by _entries
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared with other processes writing this journal (no-op where flock is missing)."""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # --- open / recovery -------------------------------------------------------------------
+    def _recover(self):
+        size = os.fstat(self._fd).st_size
+        if size:
+            # ✅ A crash mid-write leaves a partial last line: cut it back to the last newline
+            tail_start = max(0, size - 65536)
+            tail = os.pread(self._fd, size - tail_start, tail_start)
+            if not tail.endswith(b"\n"):
+                cut = tail.rfind(b"\n")
+                size = tail_start + cut + 1 if cut >= 0 else (0 if tail_start == 0 else size)
+                os.ftruncate(self._fd, size)
+                print(f"⚠️ Trade journal: dropped a partial last record in {self.path}")
+        indexed_to = self._load_index(size)
+        if indexed_to < size:
+            self._scan(indexed_to, size)
+            self._rewrite_index()
+
+    def _load_index(self, size):
+        """Loads sidecar entries that match the journal lines they point at; returns the offset they cover up to."""
+        end, stale = 0, False
+        data = os.pread(self._fd, size, 0) if size else b""
+        try:
+            with open(self.index_path) as f:
+                for line in f:
+                    parts = line.rstrip("\n").split(",", 3)
+                    if len(parts) != 4 or not parts[0].isdigit() or not parts[1].isdigit():
+                        stale = True
+                        break
+                    offset, length = int(parts[0]), int(parts[1])
+                    record = data[offset:offset + length]
+                    # ✅ Bounds alone miss a replaced journal or an entry with a wrong offset: check the line itself
+                    if offset != end or offset + length > size or not record.endswith(b"\n") \
+                            or _index_key(decode_line(record)) != (parts[2], parts[3]):
+                        stale = True
+                        break
+                    self._add(offset, length, parts[2], parts[3])
+                    end = offset + length
+        except FileNotFoundError:
+            pass
+        self._indexed_to = end
+        if stale and end == size:
+            self._rewrite_index()
+        return end
+
+    def _scan(self, start, size):
+        """Indexes journal lines in [start, size) (first open, a crash before the index write, or records
+        appended by another process). A trailing line without its newline is left for the next scan."""
+        data = os.pread(self._fd, size - start, start)
+        offset = start
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                self._add(offset, len(line), *_index_key(decode_line(line)))
+            offset += len(line)
+        self._indexed_to = offset
+
+    def _refresh(self):
+        """Catches the in-memory index up with the file (call with self._lock held)."""
+        size = os.fstat(self._fd).st_size
+        if size < self._indexed_to:
+            print(f"⚠️ Trade journal {self.path} shrank, re-indexing")
+            self._reset()
+        if size > self._indexed_to:
+            self._scan(self._indexed_to, size)
+
+    def _rewrite_index(self):
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w") as f:
+            f.writelines(self._index_line(*entry) for entry in self._entries)
+        os.replace(tmp, self.index_path)
+        os.close(self._index_fd)
+        self._index_fd = os.open(self.index_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    @staticmethod
+    def _index_line(offset, length, day, symbol):
+        return f"{offset},{length},{day},{symbol}\n"
+
+    def _add(self, offset, length, day, symbol):
+        position = len(self._entries)
+        self._entries.append((offset, length, day, symbol))
+        self._by_date.setdefault(day, []).append(position)
+        self._by_symbol.setdefault(symbol, []).append(position)
+
+    # --- writes ----------------------------------------------------------------------------
+    def append(self, **fields):
+        """Writes one trade (fields from COLUMNS; timestamp defaults to now). Returns the stored record."""
+        fields.setdefault("timestamp", datetime.now())
+        line = encode_record(fields)
+        record = decode_line(line)
+        day, symbol = _index_key(record)
+        with self._lock, self._file_lock():
+            os.write(self._fd, line)
+            # ✅ O_APPEND leaves the file offset at the end of our own write: exact even with other writers
+            offset = os.lseek(self._fd, 0, os.SEEK_CUR) - len(line)
+            if self.fsync:
+                os.fsync(self._fd)
+            # ✅ The index is derived data: no fsync, it is rebuilt from the journal tail on open. Written
+            # under the flock, so sidecar lines from every process stay in journal order.
+            os.write(self._index_fd, self._index_line(offset, len(line), day, symbol).encode("utf-8"))
+            self._refresh()     # other processes' records, then ours
+        return record
+
+    # --- queries (cost proportional to the result) ------------------------------------------
+    def _read(self, positions):
+        entries = self._entries
+        return [decode_line(os.pread(self._fd, entries[p][1], entries[p][0])) for p in positions]
+
+    def for_date(self, day=None):
+        """Trades on one calendar day (date, datetime or "YYYY-MM-DD"; default today)."""
+        day = day or date_cls.today()
+        key = day if isinstance(day, str) else day.strftime("%Y-%m-%d")
+        with self._lock:
+            self._refresh()
+            positions = list(self._by_date.get(key, ()))
+            return self._read(positions)
+
+    def for_symbol(self, symbol, since=None):
+        """One symbol's history, optionally only from `since` (date or "YYYY-MM-DD") on."""
+        since = since if since is None or isinstance(since, str) else since.strftime("%Y-%m-%d")
+        with self._lock:
+            self._refresh()
+            positions = [p for p in self._by_symbol.get(symbol, ())
+                         if since is None or self._entries[p][2] >= since]
+            return self._read(positions)
+
+    def tail(self, n=1):
+        with self._lock:
+            self._refresh()
+            positions = list(range(max(0, len(self._entries) - n), len(self._entries)))
+            return self._read(positions)
+
+    def all(self):
+        with self._lock:
+            self._refresh()
+            return self._read(range(len(self._entries)))
+
+    def symbols(self):
+        with self._lock:
+            self._refresh()
+            return sorted(s for s in self._by_symbol if s)
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._entries)
+
+    def close(self):
+        os.close(self._index_fd)
+        os.close(self._fd)
+
+
+def to_frame(records):
+    """DataFrame with the journal schema: numeric columns as floats, timestamp parsed."""
+    df = pd.DataFrame(records, columns=COLUMNS)
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", format="mixed")
+    return df
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Process-wide journal on TRADE_LOG_FILE (opened and recovered on first use)."""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = TradeJournal()
+    return _journal
+
+
+# ✅ Shortcut used by the bot, dashboards and F&O executor
+def log_trade(symbol, action, qty, **fields):
+    try:
+        return get_journal().append(symbol=symbol, action=action, qty=qty, **fields)
+    except Exception as e:
+        print(f"❌ Trade journal write failed for {symbol}: {e}")
+        return None
@@ -1,68 +1,18 @@
-import os
-import json
-import http.client
-import requests
-from datetime import datetime
+from credentials import credentials
 
-# ✅ Gist URL for access token
-gist_url = "https://gist.github.com/Trade-Bot-sys/c4a038ffd89d3f8b13f3f26fb3fb72ac/raw/access_token.json"
+# ✅ Tokens come from the shared in-memory credential cache (refreshed once, on expiry)
+def __getattr__(name):
+    if name == "tokens":
+        return credentials.tokens()
+    if name in ("access_token", "api_key", "client_code"):
+        return credentials.get(name)
+    raise AttributeError(f"module 'utils.funds' has no attribute {name!r}")
 
-# ✅ Download and store token
-def fetch_access_token():
-    try:
-        response = requests.get(gist_url)
-        return response.json() if response.status_code == 200 else None
-    except Exception as e:
-        st.error(f"❌ Error fetching token: {e}")
-        return None
-
-def is_token_fresh():
-    try:
-        token_time = datetime.fromtimestamp(os.path.getmtime("access_token.json")).date()
-        return token_time == datetime.now().date()
-    except:
-        return False
-
-# ✅ Get and validate tokens
-tokens = fetch_access_token()
-if tokens:
-    with open("access_token.json", "w") as f:
-        json.dump(tokens, f, indent=2)
-
-if not tokens or not is_token_fresh():
-    st.warning("⚠️ Token not fresh. Regenerating...")
-    generate_token()
-    tokens = fetch_access_token()
-    if tokens:
-        with open("access_token.json", "w") as f:
-            json.dump(tokens, f, indent=2)
-    else:
-        st.error("❌ Token fetch failed.")
-        st.stop()
-
-  # ✅ Extract token data
-access_token = tokens.get("access_token")
-api_key = tokens.get("api_key")
-client_code = tokens.get("client_code")
-
-# ✅ Get funds
+# ✅ Get funds (same pooled broker client as angel_api)
 def get_available_funds():
     try:
-        conn = http.client.HTTPSConnection("apiconnect.angelone.in")
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json',
-            'X-UserType': 'USER',
-            'X-SourceID': 'WEB',
-            'X-ClientLocalIP': os.getenv('CLIENT_LOCAL_IP'),
-            'X-ClientPublicIP': os.getenv('CLIENT_PUBLIC_IP'),
-            'X-MACAddress': os.getenv('MAC_ADDRESS'),
-            'X-PrivateKey': os.getenv('API_KEY')
-        }
-        conn.request("GET", "/rest/secure/angelbroking/user/v1/getRMS", headers=headers)
-        res = conn.getresponse()
-        return json.loads(res.read().decode("utf-8"))
+        from angel_api import get_rms
+
+        return get_rms()
     except Exception as e:
         return {"status": False, "error": str(e)}
-
@@ -1,31 +1,137 @@
-from collections import defaultdict
+import os
+import time
+import threading
+import numpy as np
 import pandas as pd
-from datetime import datetime
-
-# Dictionary to store real-time candle data per symbol
-candles = defaultdict(list)
-
-# 🟢 Called every time new LTP (last traded price) is received from WebSocket
-def update_realtime_candle(symbol, ltp):
-    now = datetime.now().replace(second=0, microsecond=0)
-    if not candles[symbol] or candles[symbol][-1]["timestamp"] != now:
-        # Start a new 1-minute candle
-        candles[symbol].append({
-            "timestamp": now,
-            "Open": ltp,
-            "High": ltp,
-            "Low": ltp,
-            "Close": ltp
-        })
-    else:
-        # Update current candle
-        candle = candles[symbol][-1]
-        candle["High"] = max(candle["High"], ltp)
-        candle["Low"] = min(candle["Low"], ltp)
-        candle["Close"] = ltp
-
-# 🔁 Returns a DataFrame of all 1-min candles for the symbol
+from price_service import price_service
+from indicator_engine import indicator_engine
+
+CANDLE_CAPACITY = int(os.getenv("CANDLE_CAPACITY", "512"))  # ✅ 1-min bars kept per symbol
+BAR_NS = 60 * 1_000_000_000
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class CandleRing:
+    """Fixed-capacity 1-minute OHLCV ring buffer backed by NumPy columns.
+
+    Every bar is written twice (slot and slot + capacity) so the latest `count`
+    bars are always one contiguous slice: view() is zero-copy and a tick only
+    does scalar writes into preallocated arrays. frame() copies that slice, so
+    frames handed to consumers never change underneath them.
+    """
+
+    def __init__(self, capacity=CANDLE_CAPACITY):
+        self.capacity = capacity
+        self.ts = np.zeros(2 * capacity, dtype=np.int64)          # bar start, epoch ns (UTC)
+        self.data = np.zeros((len(COLUMNS), 2 * capacity), dtype=np.float64)
+        self.bars = 0                                              # total bars ever started
+        self.lock = threading.Lock()
+
+    def update(self, ts_ns, price, volume=0.0):
+        """Applies one tick. Ticks older than the current bar are ignored."""
+        bar = ts_ns - ts_ns % BAR_NS
+        with self.lock:
+            slot = (self.bars - 1) % self.capacity
+            if self.bars and bar == self.ts[slot]:
+                data = self.data
+                for i in (slot, slot + self.capacity):
+                    if price > data[1, i]:
+                        data[1, i] = price
+                    if price < data[2, i]:
+                        data[2, i] = price
+                    data[3, i] = price
+                    data[4, i] += volume
+                return
+            if self.bars and bar < self.ts[slot]:
+                return
+            slot = self.bars % self.capacity
+            for i in (slot, slot + self.capacity):
+                self.ts[i] = bar
+                self.data[0, i] = self.data[1, i] = self.data[2, i] = self.data[3, i] = price
+                self.data[4, i] = volume
+            self.bars += 1
+
+    def __len__(self):
+        return min(self.bars, self.capacity)
+
+    def view(self):
+        """Returns (timestamps, {column: array}) as read-only zero-copy views, oldest bar first.
+
+        The views alias the ring: the current bar keeps changing with ticks and older rows are
+        overwritten once the ring wraps, so use them right away and copy anything you keep."""
+        with self.lock:
+            count = len(self)
+            start = (self.bars - count) % self.capacity
+            ts = self.ts[start:start + count]
+            block = self.data[:, start:start + count]
+        ts = ts.view("datetime64[ns]")
+        ts.flags.writeable = False
+        columns = {}
+        for i, name in enumerate(COLUMNS):
+            column = block[i]
+            column.flags.writeable = False
+            columns[name] = column
+        return ts, columns
+
+    def frame(self):
+        """Returns the buffered bars as a DataFrame that owns its data (safe to cache and mutate)."""
+        with self.lock:
+            count = len(self)
+            start = (self.bars - count) % self.capacity
+            ts = self.ts[start:start + count].copy()
+            block = self.data[:, start:start + count].copy()
+        columns = {name: block[i] for i, name in enumerate(COLUMNS)}
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(ts.view("datetime64[ns]"), name="timestamp"),
+                            copy=False)
+
+
+# Ring buffer of real-time 1-min candles per symbol
+candles = {}
+_candles_lock = threading.Lock()
+
+
+def _ring(symbol):
+    ring = candles.get(symbol)
+    if ring is None:
+        with _candles_lock:
+            ring = candles.setdefault(symbol, CandleRing())
+    return ring
+
+
+# Tick listeners: fn(symbol, ltp, ts_ns), called on the websocket thread — keep them O(1)
+tick_listeners = []
+
+
+def add_tick_listener(fn):
+    if fn not in tick_listeners:
+        tick_listeners.append(fn)
+
+
+# 🟢 Called every time new LTP (last traded price) is received from WebSocket.
+# exchange_ts is the tick's exchange timestamp in epoch milliseconds (SmartAPI `exchange_timestamp`).
+def update_realtime_candle(symbol, ltp, exchange_ts=None, volume=0.0):
+    ts_ns = int(exchange_ts) * 1_000_000 if exchange_ts else time.time_ns()
+    price_service.on_tick(symbol, ltp, ts_ns / 1e9)  # ✅ Websocket price feeds the shared snapshot
+    _ring(symbol).update(ts_ns, float(ltp), float(volume))
+    indicator_engine.on_price(symbol, ts_ns - ts_ns % BAR_NS, float(ltp))  # ✅ O(1) live indicators
+    for listener in tick_listeners:
+        try:
+            listener(symbol, ltp, ts_ns)
+        except Exception as e:
+            print(f"❌ Tick listener error for {symbol}: {e}")
+
+
+# 🔁 Zero-copy (timestamps, {column: array}) views of the symbol's 1-min candles (see CandleRing.view)
+def get_candle_arrays(symbol):
+    ring = candles.get(symbol)
+    if ring is None:
+        return None, {}
+    return ring.view()
+
+
+# 🔁 Returns a DataFrame copy of the buffered 1-min candles for the symbol (UTC bar times)
 def get_realtime_candles(symbol):
-    if symbol not in candles:
+    ring = candles.get(symbol)
+    if ring is None or not len(ring):
         return pd.DataFrame()
-    return pd.DataFrame(candles[symbol]).set_index("timestamp")
+    return ring.frame()